@@ -1,10 +1,18 @@
-from flask import Flask, request, jsonify, send_from_directory
-from SPARQLWrapper import SPARQLWrapper, JSON
+import os
+import sys
+import time
+import sqlite3
+from flask import Flask, Response, request, jsonify, send_from_directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from sparql_client import get_client
+from search_index import SearchIndex
 
 app = Flask(__name__, static_folder="static")
 
 # SPARQL_ENDPOINT = "http://localhost:7200/repositories/zbmath-kg" #graphdb
 SPARQL_ENDPOINT = "http://localhost:3030/dataset/sparql" #fuseki
+SEARCH_INDEX = os.environ.get("ZBMATH_SEARCH")  # search_index.py index directory, for /search
+search_index = SearchIndex(SEARCH_INDEX) if SEARCH_INDEX else None
 
 @app.route("/")
 def index():
@@ -17,15 +25,32 @@ def query():
     if not sparql_query:
         return jsonify({"error": "No query provided"}), 400
 
-    sparql = SPARQLWrapper(SPARQL_ENDPOINT)
-    sparql.setQuery(sparql_query)
-    sparql.setReturnFormat(JSON)
-
+    # one pooled client for all requests; the JSON result is passed through as it arrives
+    # (and served from the result cache next time, unless the request sets "cache": false)
     try:
-        results = sparql.query().convert()
-        return jsonify(results)
+        content_type, chunks = get_client(SPARQL_ENDPOINT).stream(sparql_query, "json", use_cache=data.get("cache", True))
+        return Response(chunks, content_type=content_type)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/search")
+def search():
+    # ranked full-text search over titles, reviews and keywords:
+    # /search?q=spectral sequence&limit=20&start=1950&end=1989 (&any=1: any word, &syntax=1: FTS5 query)
+    text = request.args.get("q", "").strip()
+    if not text:
+        return jsonify({"error": "No query provided"}), 400
+    if search_index is None:
+        return jsonify({"error": "No search index configured (ZBMATH_SEARCH)"}), 503
+    try:
+        limit = max(1, min(request.args.get("limit", 20, type=int), 1000))  # SQLite: a negative LIMIT is none
+        start_year, end_year = request.args.get("start", type=int), request.args.get("end", type=int)
+        started = time.time()
+        hits = search_index.search(text, limit, start_year, end_year, syntax=bool(request.args.get("syntax")),
+                                   any_term=bool(request.args.get("any")))
+    except sqlite3.OperationalError as e:  # FTS5 syntax errors
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"query": text, "results": hits, "ms": round((time.time() - started) * 1000, 1)})
+
 if __name__ == "__main__":
     app.run(debug=True)
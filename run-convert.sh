@@ -18,3 +18,6 @@ for input_file in "$INPUT_DIR"/*.jsonl; do
 
     python src/create-rdf.py "$input_file" "$output_prefix"
 done
+
+# Alternative: convert the whole input directory in parallel into one sorted, deduplicated dump
+# python src/create-rdf.py "$INPUT_DIR" "$OUTPUT_DIR_2/all.nt" --format nt --workers "$(nproc)"
@@ -0,0 +1,150 @@
+#compressed sparse row (CSR) index of the cito:cites edges, memory-mapped, for citation checks and traversal
+# python citation_graph.py build out/ citations                 (JSONL input, or N-Triples dumps)
+# python citation_graph.py query citations --cites 7309918 592551
+# python citation_graph.py query citations --refs 592551 --hops 2
+import os
+import time
+import argparse
+import numpy as np
+from kg_index import DocIds, build_csr, gather_rows, contains_pairs, collect, write_header, read_header, index_size
+
+CITATIONS_VERSION = "zbmath-citations/1"
+DIRECTIONS = ("out", "in")  # out: references of a document, in: documents citing it
+
+
+# ==== BUILD ====
+def write_citations(inputs, output_dir):
+    """Build the citation index from JSONL (ref_id) or N-Triples dumps (cito:cites).
+    Documents are the records plus every cited document, so references outside the corpus are kept."""
+    start = time.time()
+    fields = collect(inputs, ["document", "cites"], desc="Reading citations")
+    records, _ = fields["document"]
+    citing, cited = fields["cites"]
+    doc_ids = DocIds.build(np.concatenate([records, citing, cited]))
+    src, dst = doc_ids.ids(citing), doc_ids.ids(cited)
+
+    os.makedirs(output_dir, exist_ok=True)
+    doc_ids.save(os.path.join(output_dir, "doc_ids.npy"))
+    edges = 0
+    for direction, (rows, cols) in zip(DIRECTIONS, ((src, dst), (dst, src))):
+        indptr, indices = build_csr(rows, cols, len(doc_ids))
+        np.save(os.path.join(output_dir, f"{direction}.indptr.npy"), indptr)
+        np.save(os.path.join(output_dir, f"{direction}.indices.npy"), indices)
+        edges = len(indices)
+    header = write_header(output_dir, CITATIONS_VERSION, inputs, documents=len(doc_ids),
+                          records=int(len(np.unique(records))), citations=int(edges))
+    print(f"✅ Citation index saved to {output_dir}: {header['records']} records, {header['documents']} documents, "
+          f"{edges} citations, {index_size(output_dir) / 2**20:.1f} MB in {time.time() - start:.1f}s")
+    return header
+
+
+# ==== QUERY ====
+class CitationGraph:
+    """cito:cites adjacency in both directions, memory-mapped. Documents are given and returned as zbMATH
+    document numbers (592551, "592551" or "https://zbmath.org/592551"); unknown documents have no citations."""
+
+    def __init__(self, path):
+        self.header = read_header(path, CITATIONS_VERSION)
+        self.doc_ids = DocIds.load(os.path.join(path, "doc_ids.npy"))
+        self.adjacency = {direction: (np.load(os.path.join(path, f"{direction}.indptr.npy"), mmap_mode="r"),
+                                      np.load(os.path.join(path, f"{direction}.indices.npy"), mmap_mode="r"))
+                          for direction in DIRECTIONS}
+
+    def _neighbors(self, ids, direction):
+        indptr, indices = self.adjacency[direction]
+        return gather_rows(indptr, indices, ids)
+
+    def neighbors(self, doc, direction="out"):
+        i = self.doc_ids.id(doc)
+        if i < 0:
+            return np.zeros(0, dtype=np.int64)
+        return self.doc_ids.docs(self._neighbors([i], direction))
+
+    def references(self, doc):
+        """Documents cited by doc"""
+        return self.neighbors(doc, "out")
+
+    def cited_by(self, doc):
+        """Documents citing doc"""
+        return self.neighbors(doc, "in")
+
+    def degrees(self, docs, direction="out"):
+        ids = self.doc_ids.ids(docs)
+        indptr, _ = self.adjacency[direction]
+        known = ids >= 0
+        degrees = np.zeros(len(ids), dtype=np.int64)
+        degrees[known] = indptr[ids[known] + 1] - indptr[ids[known]]
+        return degrees
+
+    def cites_pairs(self, citing, cited):
+        """Boolean array: does citing[i] cite cited[i]? Millions of pairs in one vectorized pass."""
+        a, b = self.doc_ids.ids(citing), self.doc_ids.ids(cited)
+        result = np.zeros(len(a), dtype=bool)
+        known = (a >= 0) & (b >= 0)
+        indptr, indices = self.adjacency["out"]
+        result[known] = contains_pairs(indptr, indices, a[known], b[known])
+        return result
+
+    def cites(self, citing, cited):
+        return bool(self.cites_pairs([citing], [cited])[0])
+
+    def _reachable_ids(self, ids, hops, direction):
+        visited = np.zeros(len(self.doc_ids), dtype=bool)
+        frontier = np.unique(ids)
+        visited[frontier] = True
+        for _ in range(hops):
+            frontier = np.unique(self._neighbors(frontier, direction))
+            frontier = frontier[~visited[frontier]]
+            if not len(frontier):
+                break
+            visited[frontier] = True
+        visited[np.unique(ids)] = False
+        return np.flatnonzero(visited)
+
+    def reachable(self, docs, hops=2, direction="out"):
+        """Documents within hops citation steps of any of docs (out: cited, transitively; in: citing)"""
+        ids = self.doc_ids.ids(docs)
+        return self.doc_ids.docs(self._reachable_ids(ids[ids >= 0], hops, direction))
+
+    def reaches_pairs(self, sources, targets, hops=2, direction="out"):
+        """Boolean array: is targets[i] within hops citation steps of sources[i]?"""
+        if hops == 1 and direction == "out":
+            return self.cites_pairs(sources, targets)
+        a, b = self.doc_ids.ids(sources), self.doc_ids.ids(targets)
+        result = np.zeros(len(a), dtype=bool)
+        known = np.flatnonzero((a >= 0) & (b >= 0))
+        order = known[np.argsort(a[known], kind="stable")]
+        groups = np.split(order, np.flatnonzero(np.diff(a[order])) + 1) if len(order) else []
+        for group in groups:  # one traversal per distinct source
+            reached = self._reachable_ids(a[group[:1]], hops, direction)
+            result[group] = np.isin(b[group], reached, assume_unique=False)
+        return result
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the citation index (cito:cites as CSR arrays)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="JSONL files/directories or N-Triples dumps -> index directory")
+    build.add_argument("inputs", nargs="+", help="create-rdf.py input (JSONL) or output (.nt/.nq, .gz/.zst)")
+    build.add_argument("output", help="index directory")
+    query = commands.add_parser("query", help="citation lookups")
+    query.add_argument("index", help="index directory")
+    query.add_argument("--refs", help="print the documents cited by this document")
+    query.add_argument("--cited-by", help="print the documents citing this document")
+    query.add_argument("--cites", nargs=2, metavar=("CITING", "CITED"), help="does CITING cite CITED?")
+    query.add_argument("--hops", type=int, default=1, help="citation steps for --refs/--cited-by/--cites (default: 1)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        write_citations(args.inputs, args.output)
+    else:
+        graph = CitationGraph(args.index)
+        if args.cites:
+            print(bool(graph.reaches_pairs([args.cites[0]], [args.cites[1]], args.hops)[0]))
+        for doc, direction in ((args.refs, "out"), (args.cited_by, "in")):
+            if doc:
+                for number in graph.reachable([doc], args.hops, direction):
+                    print(number)
@@ -0,0 +1,190 @@
+#pairwise keyword/MSC overlap of papers with sparse matrix products: shared counts, Jaccard scores, year ordering
+# python concept_overlap.py out/ --before 1990 --after 2020 --min-shared 2 1 --output pairs.tsv
+# python concept_overlap.py all-*.nt.zst --fields keyword --min-jaccard 0.2 --citations citations
+import time
+import argparse
+import numpy as np
+from scipy import sparse
+from tqdm import tqdm
+from kg_index import DocIds, build_csr, collect
+
+BLOCK_ROWS = 4096  # left papers per sparse product: bounds the memory of one block of shared counts
+
+
+# ==== INCIDENCE MATRICES ====
+def incidence(term_sets, vocabulary=None):
+    """0/1 CSR matrix (papers x terms) of iterables of terms. Matrices built with the same vocabulary
+    (term -> column, grown in place) share their columns."""
+    vocabulary = {} if vocabulary is None else vocabulary
+    indptr, indices = [0], []
+    for terms in term_sets:
+        indices.extend({vocabulary.setdefault(term, len(vocabulary)) for term in terms if term not in (None, "")})
+        indptr.append(len(indices))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(vocabulary)))
+
+def field_incidence(docs, values, doc_ids, vocabulary=None):
+    """0/1 CSR matrix (doc_ids x terms) of the (document, value) pairs of a kg_index.collect field.
+    Returns (matrix, terms), terms being the column labels; with a vocabulary array, its columns."""
+    terms = np.unique(np.asarray(values)) if vocabulary is None else np.asarray(vocabulary)
+    rows = doc_ids.ids(docs)
+    cols = np.searchsorted(terms, np.asarray(values)) if len(terms) else np.zeros(len(rows), dtype=np.int64)
+    keep = (rows >= 0) & (cols < len(terms))
+    keep[keep] = terms[cols[keep]] == np.asarray(values)[keep]
+    indptr, indices = build_csr(rows[keep], cols[keep], len(doc_ids))
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(len(doc_ids), len(terms))), terms
+
+def _widen(matrix, columns):
+    matrix = sparse.csr_matrix(matrix, dtype=np.int32)
+    if matrix.shape[1] < columns:
+        matrix.resize((matrix.shape[0], columns))
+    return matrix
+
+
+# ==== PAIRS ====
+def overlap_pairs(left, right, min_shared=1, min_jaccard=0.0, left_years=None, right_years=None, min_gap=1,
+                  left_ids=None, right_ids=None, block_rows=BLOCK_ROWS):
+    """All pairs (i, j) of a left paper and a right paper sharing terms, computed blockwise as left @ right.T.
+
+    left, right: incidence matrices, or lists of them (one per field, e.g. keywords and MSC codes), the
+    same columns on both sides. min_shared/min_jaccard: minimum per field (a number for every field).
+    With years, only pairs where the right paper came at least min_gap years after the left one; with ids,
+    no pairs of a paper with itself. Pairs sharing no term at all are never returned.
+    Yields one block at a time: (rows, cols, shared, jaccard), shared/jaccard of shape (pairs, fields)
+    for lists of matrices, (pairs,) for single matrices."""
+    single = not isinstance(left, (list, tuple))
+    left, right = ([left], [right]) if single else (list(left), list(right))
+    min_shared = np.broadcast_to(min_shared, len(left))
+    min_jaccard = np.broadcast_to(min_jaccard, len(left))
+    widths = [max(l.shape[1], r.shape[1]) for l, r in zip(left, right)]
+    left = [_widen(l, width) for l, width in zip(left, widths)]
+    right = [_widen(r, width) for r, width in zip(right, widths)]
+    n_left, n_right = left[0].shape[0], right[0].shape[0]
+    left_years = None if left_years is None else np.asarray(left_years)
+    left_ids = None if left_ids is None else np.asarray(left_ids)
+    right_ids = None if right_ids is None else np.asarray(right_ids)
+
+    # right papers in year order: a block only multiplies with the papers late enough for its earliest paper
+    order = np.arange(n_right) if right_years is None else np.argsort(right_years, kind="stable")
+    ordered_years = None if right_years is None else np.asarray(right_years)[order]
+    right_t = [r[order].T.tocsr() for r in right]
+    left_sizes = [np.diff(l.indptr) for l in left]
+    right_sizes = [np.diff(r.indptr)[order] for r in right]
+
+    for start in range(0, n_left, block_rows):
+        stop = min(start + block_rows, n_left)
+        first = 0
+        if ordered_years is not None:
+            first = int(np.searchsorted(ordered_years, np.min(left_years[start:stop]) + min_gap))
+            if first >= n_right:
+                continue
+        counts = [l[start:stop] @ r[:, first:] for l, r in zip(left, right_t)]
+        total = counts[0] if len(counts) == 1 else sum(counts[1:], counts[0])
+        total = total.tocoo()
+        rows, cols = total.row.astype(np.int64), total.col.astype(np.int64)
+        keep = np.ones(len(rows), dtype=bool)
+        if ordered_years is not None:
+            keep &= ordered_years[cols + first] - left_years[rows + start] >= min_gap
+        shared = np.zeros((len(rows), len(left)), dtype=np.int64)
+        jaccard = np.zeros((len(rows), len(left)))
+        for k, count in enumerate(counts):
+            shared[:, k] = np.asarray(count[rows, cols]).ravel() if len(rows) else 0
+            union = left_sizes[k][rows + start] + right_sizes[k][cols + first] - shared[:, k]
+            jaccard[:, k] = shared[:, k] / np.maximum(union, 1)
+        keep &= np.all(shared >= min_shared, axis=1) & np.all(jaccard >= min_jaccard, axis=1)
+        if left_ids is not None and right_ids is not None:
+            keep &= left_ids[rows + start] != right_ids[order[cols + first]]
+        if keep.any():
+            rows, cols = rows[keep] + start, order[cols[keep] + first]
+            shared, jaccard = shared[keep], jaccard[keep]
+            yield (rows, cols, shared[:, 0], jaccard[:, 0]) if single else (rows, cols, shared, jaccard)
+
+def collect_pairs(blocks, fields=None):
+    """The pairs of all the overlap_pairs blocks as one (rows, cols, shared, jaccard), sorted by (row, col).
+    fields: the number of matrices per side for lists of them (shape of an empty result)"""
+    blocks = list(blocks)
+    if not blocks:
+        empty = np.zeros(0, dtype=np.int64)
+        shape = (0,) if fields is None else (0, fields)
+        return empty, empty, np.zeros(shape, dtype=np.int64), np.zeros(shape)
+    rows, cols, shared, jaccard = (np.concatenate(part) for part in zip(*blocks))
+    order = np.lexsort((cols, rows))
+    return rows[order], cols[order], shared[order], jaccard[order]
+
+def shared_terms(left, right, i, j, terms):
+    """Sorted labels of the terms shared by left paper i and right paper j (terms: column -> label)"""
+    a = left.indices[left.indptr[i]:left.indptr[i + 1]]
+    b = right.indices[right.indptr[j]:right.indptr[j + 1]]
+    return sorted(terms[k] for k in np.intersect1d(a, b))
+
+
+# ==== CORPUS CANDIDATES ====
+def corpus_pairs(inputs, fields=("keyword", "msc"), min_shared=1, min_jaccard=0.0, before=None, after=None,
+                 min_gap=1, citations=None, block_rows=BLOCK_ROWS):
+    """Precursor candidate pairs (earlier paper, later paper) over the whole corpus: JSONL or dumps
+    (see kg_index.py). Earlier papers issued before `before`, later ones after `after` (when given);
+    with a CitationGraph, pairs where the later paper cites the earlier one are dropped.
+    Yields (earlier, later, earlier year, later year, shared, jaccard) arrays per block."""
+    data = collect(inputs, list(fields) + ["year"], desc="Reading fields")
+    year_docs, year_values = data["year"]
+    doc_ids = DocIds.build(year_docs)  # papers with a publication year
+    years = np.full(len(doc_ids), -1, dtype=np.int64)
+    years[doc_ids.ids(year_docs)] = year_values
+    matrices = [field_incidence(*data[field], doc_ids)[0] for field in fields]
+
+    early = np.ones(len(doc_ids), dtype=bool) if before is None else years < before
+    late = np.ones(len(doc_ids), dtype=bool) if after is None else years > after
+    early, late = np.flatnonzero(early), np.flatnonzero(late)
+    left = [m[early] for m in matrices]
+    right = [m[late] for m in matrices]
+    blocks = overlap_pairs(left, right, min_shared, min_jaccard, years[early], years[late], min_gap,
+                           early, late, block_rows)
+    for rows, cols, shared, jaccard in blocks:
+        a, b = doc_ids.docs(early[rows]), doc_ids.docs(late[cols])
+        if citations is not None:
+            keep = ~citations.cites_pairs(b, a)
+            a, b, rows, cols, shared, jaccard = a[keep], b[keep], rows[keep], cols[keep], shared[keep], jaccard[keep]
+        yield a, b, years[early[rows]], years[late[cols]], shared, jaccard
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precursor candidate pairs by keyword/MSC overlap (sparse products)")
+    parser.add_argument("inputs", nargs="+", help="create-rdf.py input (JSONL) or output (.nt/.nq, .gz/.zst)")
+    parser.add_argument("--fields", nargs="+", default=["keyword", "msc"], choices=["keyword", "msc"],
+                        help="term fields to overlap (default: keyword msc)")
+    parser.add_argument("--min-shared", nargs="+", type=int, default=[1],
+                        help="minimum shared terms, one number or one per field (default: 1)")
+    parser.add_argument("--min-jaccard", nargs="+", type=float, default=[0.0],
+                        help="minimum Jaccard score, one number or one per field (default: 0)")
+    parser.add_argument("--before", type=int, help="earlier papers issued before this year")
+    parser.add_argument("--after", type=int, help="later papers issued after this year")
+    parser.add_argument("--min-gap", type=int, default=1, help="minimum years between the papers of a pair (default: 1)")
+    parser.add_argument("--citations", help="citation_graph.py index: drop pairs where the later paper cites the earlier")
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS, help=f"papers per sparse product (default: {BLOCK_ROWS})")
+    parser.add_argument("--output", default="overlap-pairs.tsv", help="output TSV file")
+    args = parser.parse_args()
+
+    for name in ("min_shared", "min_jaccard"):
+        value = getattr(args, name)
+        if len(value) not in (1, len(args.fields)):
+            parser.error(f"--{name.replace('_', '-')} takes one value or one per field")
+    citations = None
+    if args.citations:
+        from citation_graph import CitationGraph
+        citations = CitationGraph(args.citations)
+
+    start = time.time()
+    pairs = 0
+    with open(args.output, "w", encoding="utf-8") as f:
+        f.write("\t".join(["earlier", "later", "earlier_year", "later_year"]
+                          + [f"shared_{field}" for field in args.fields]
+                          + [f"jaccard_{field}" for field in args.fields]) + "\n")
+        blocks = corpus_pairs(args.inputs, args.fields, args.min_shared, args.min_jaccard, args.before, args.after,
+                              args.min_gap, citations, args.block_rows)
+        for a, b, a_year, b_year, shared, jaccard in tqdm(blocks, desc="Overlap blocks"):
+            for row in zip(a, b, a_year, b_year, shared, jaccard):
+                f.write("\t".join([str(v) for v in row[:4]] + [str(v) for v in row[4]]
+                                  + [f"{v:.4f}" for v in row[5]]) + "\n")
+            pairs += len(a)
+    print(f"✅ {pairs} candidate pairs saved to {args.output} in {time.time() - start:.1f}s")
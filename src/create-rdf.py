@@ -1,47 +1,45 @@
 #convert and clean the jsonl --> rdf ttl
-import json
-import re
 from tqdm import tqdm
-from rdflib import Graph, Literal, URIRef, Namespace, BNode
+from rdflib import Graph, Literal, URIRef, BNode
 from rdflib.namespace import DCTERMS, SKOS, FOAF, RDF, XSD, RDFS
-import urllib.parse
 import argparse
+from itertools import islice
+import os
+import tempfile
+from functools import partial
+from multiprocessing import Pool, Process
+from rdf_stream import NTriplesWriter, EntityRegistry, LineBuffer, ChunkedWriter, ZBMATH_GRAPH, merge_sorted, term_nt
+from rdf_stats import GraphStats, StatsTee, REPORT_SUFFIX, write_report
+from jsonl_io import loads, decode_record, Record, DecodeError, list_jsonl, plan_shards, iter_shard_lines, iter_offset_lines, read_line_at
+from delta_manifest import Manifest, content_hash, write_delete_update
+from rdf_hdt import write_hdt
+from rdf_terms import TermFactory, TermNamespace, make_id, split_names, safe_uri, to_safe_rdf_value
+from search_index import write_search
 
 # import warnings
 # warnings.filterwarnings("ignore", category=UserWarning, module="rdflib.plugins.serializers.nt")
 
-parser = argparse.ArgumentParser(description="Convert JSONL to RDF Turtle/N-Triples")
-parser.add_argument("input", help="Path to input JSONL file")
-parser.add_argument("output", help="Output files")
-args = parser.parse_args()
+# ==== NAMESPACES ====
+ZBMATH = TermNamespace("https://zbmath.org/")
+MSC = TermNamespace("http://msc2010.org/resources/MSC/2010/")
+SCHEMA = TermNamespace("https://schema.org/")
+CITO = TermNamespace("http://purl.org/spar/cito/")
+# each term is minted once instead of on every attribute lookup
+DCTERMS, SKOS, RDF, XSD, RDFS = (TermNamespace(str(ns)) for ns in (DCTERMS, SKOS, RDF, XSD, RDFS))
 
-INPUT_FILE = args.input
-OUTPUT_FILE = args.output
+# entity URI bases (URIRef(base + make_id(raw)), minted through the term factory)
+AUTHOR_NAME_BASE = "https://zbmath.org/author/"
+KEYWORD_BASE = "https://zbmath.org/keyword/"
+JOURNAL_BASE = "https://zbmath.org/journal/"
+PUBLISHER_BASE = "https://zbmath.org/publisher/"
 
-# ==== NAMESPACES ====
-ZBMATH = Namespace("https://zbmath.org/")
-MSC = Namespace("http://msc2010.org/resources/MSC/2010/")
-SCHEMA = Namespace("https://schema.org/")
-CITO = Namespace("http://purl.org/spar/cito/")
-
-
-# ==== GRAPH ====
-g = Graph()
-g.bind("dcterms", DCTERMS)
-# g.bind("foaf", FOAF)
-g.bind("skos", SKOS)
-g.bind("msc", MSC)
-g.bind("zbmath", ZBMATH)
-g.bind("schema", SCHEMA)
-g.bind("cito", CITO)
-g.bind("rdfs", RDFS)
 
 # ==== HELPERS ====
 MSC_INFO_FILE = "msc_codes.jsonl"  # JSONL file path
 msc_lookup = {}
 with open(MSC_INFO_FILE, "r", encoding="utf-8") as f:
     for line in f:
-        entry = json.loads(line)
+        entry = loads(line)
         msc_lookup[entry["code"]] = entry
 
 DOC_TYPE_URI_MAP = {
@@ -68,346 +66,639 @@ DOC_TYPE_URI_MAP = {
 MSC_CONCEPT = URIRef("https://zbmath.org/ontology/msc-concept")
 KEYWORD_CONCEPT = URIRef("https://zbmath.org/ontology/keyword-concept")
 
+# ==== CUSTOM PROPERTIES ====
+# integer year and decade next to the xsd:gYear of dcterms:issued: range filters without casting the literals
+YEAR = URIRef("https://zbmath.org/ontology/year")
+DECADE = URIRef("https://zbmath.org/ontology/decade")
+
 # ==== CONCEPT SCHEMES ====
 MSC_SCHEME_URI = URIRef("https://zbmath.org/msc-scheme")
 KW_SCHEME_URI = URIRef("https://zbmath.org/keyword-scheme")
 
-# Define MSC ConceptScheme
-g.add((MSC_SCHEME_URI, RDF.type, SKOS.ConceptScheme))
-g.add((MSC_SCHEME_URI, DCTERMS.title, Literal("Mathematics Subject Classification (MSC)")))
-g.add((MSC_SCHEME_URI, RDFS.label, Literal("MSC Classification")))
-
-# Define Keyword ConceptScheme
-g.add((KW_SCHEME_URI, RDF.type, SKOS.ConceptScheme))
-g.add((KW_SCHEME_URI, DCTERMS.title, Literal("zbMATH Keyword Scheme")))
-g.add((KW_SCHEME_URI, RDFS.label, Literal("zbMATH Keywords")))
-
-# === Declare Classes ===
-# Custom document types
-for short_code, doc_type_info in DOC_TYPE_URI_MAP.items():
-    uri = doc_type_info["uri"]
-    label = doc_type_info["label"]
-    g.add((uri, RDF.type, RDFS.Class))
-    g.add((uri, RDFS.label, Literal(label)))
-    g.add((uri, SKOS.notation, Literal(short_code)))
-    g.add((uri, RDFS.subClassOf, SCHEMA.ScholarlyArticle))  # NEW LINE
-
-# Custom concept types
-g.add((MSC_CONCEPT, RDF.type, RDFS.Class))
-g.add((MSC_CONCEPT, RDFS.label, Literal("MSC Concept")))
-g.add((KEYWORD_CONCEPT, RDF.type, RDFS.Class))
-g.add((KEYWORD_CONCEPT, RDFS.label, Literal("Keyword Concept")))
-
-g.add((SCHEMA.PropertyValue, RDF.type, RDFS.Class))
-g.add((SCHEMA.PropertyValue, RDFS.label, Literal("PropertyValue")))
-
-# Common schema classes
-for class_uri, label in [
-    (SCHEMA.Person, "Person"),
-    (SCHEMA.Organization, "Organization"),
-    (SCHEMA.Periodical, "Periodical"),
-    (SCHEMA.SoftwareApplication, "Software Application"),
-    (SCHEMA.Review, "Review"),
-    (SCHEMA.ScholarlyArticle, "Scholarly Article")
-]:
-    g.add((class_uri, RDF.type, RDFS.Class))
-    g.add((class_uri, RDFS.label, Literal(label)))
+def new_graph(fmt, out=None):
+    """rdflib Graph for ttl, NTriplesWriter streaming into out for nt/nq"""
+    if fmt == "ttl":
+        g = Graph()
+    else:
+        # constant memory: triples go straight to out, shared entities are deduplicated by hash
+        g = NTriplesWriter(out, graph=ZBMATH_GRAPH if fmt == "nq" else None)
+    g.bind("dcterms", DCTERMS)
+    # g.bind("foaf", FOAF)
+    g.bind("skos", SKOS)
+    g.bind("msc", MSC)
+    g.bind("zbmath", ZBMATH)
+    g.bind("schema", SCHEMA)
+    g.bind("cito", CITO)
+    g.bind("rdfs", RDFS)
+    return g
+
+def open_output(path, compress=None, stats=None):
+    """Text file for nt/nq output, or a ChunkedWriter (compressed chunk files) when compress holds
+    its options (compression, chunk_size, threads, sort). With stats (a GraphStats factory) every
+    file/chunk gets a <file>.stats.json report."""
+    if compress:
+        return ChunkedWriter(path, stats=stats, **compress)
+    out = open(path, "w", encoding="utf-8", buffering=1 << 20)
+    return StatsTee(out, path + REPORT_SUFFIX, stats()) if stats else out
+
+def stats_factory(fmt, enabled=True):
+    return partial(GraphStats, quads=fmt == "nq") if enabled else None
+
+def saved_as(path, stream):
+    if isinstance(stream, ChunkedWriter):
+        return (f"{stream.pattern.format(0)} .. ({len(stream.paths)} {stream.compression} chunks, "
+                f"{stream.raw_bytes / 2**20:.1f} MB -> {stream.compressed_bytes / 2**20:.1f} MB)")
+    return path
+
+def add_schema(g):
+    """Add concept schemes and class declarations"""
+    # Define MSC ConceptScheme
+    g.add((MSC_SCHEME_URI, RDF.type, SKOS.ConceptScheme))
+    g.add((MSC_SCHEME_URI, DCTERMS.title, Literal("Mathematics Subject Classification (MSC)")))
+    g.add((MSC_SCHEME_URI, RDFS.label, Literal("MSC Classification")))
+
+    # Define Keyword ConceptScheme
+    g.add((KW_SCHEME_URI, RDF.type, SKOS.ConceptScheme))
+    g.add((KW_SCHEME_URI, DCTERMS.title, Literal("zbMATH Keyword Scheme")))
+    g.add((KW_SCHEME_URI, RDFS.label, Literal("zbMATH Keywords")))
+
+    # === Declare Classes ===
+    # Custom document types
+    for short_code, doc_type_info in DOC_TYPE_URI_MAP.items():
+        uri = doc_type_info["uri"]
+        label = doc_type_info["label"]
+        g.add((uri, RDF.type, RDFS.Class))
+        g.add((uri, RDFS.label, Literal(label)))
+        g.add((uri, SKOS.notation, Literal(short_code)))
+        g.add((uri, RDFS.subClassOf, SCHEMA.ScholarlyArticle))  # NEW LINE
+
+    # Custom concept types
+    g.add((MSC_CONCEPT, RDF.type, RDFS.Class))
+    g.add((MSC_CONCEPT, RDFS.label, Literal("MSC Concept")))
+    g.add((KEYWORD_CONCEPT, RDF.type, RDFS.Class))
+    g.add((KEYWORD_CONCEPT, RDFS.label, Literal("Keyword Concept")))
+
+    g.add((SCHEMA.PropertyValue, RDF.type, RDFS.Class))
+    g.add((SCHEMA.PropertyValue, RDFS.label, Literal("PropertyValue")))
+
+    # Common schema classes
+    for class_uri, label in [
+        (SCHEMA.Person, "Person"),
+        (SCHEMA.Organization, "Organization"),
+        (SCHEMA.Periodical, "Periodical"),
+        (SCHEMA.SoftwareApplication, "Software Application"),
+        (SCHEMA.Review, "Review"),
+        (SCHEMA.ScholarlyArticle, "Scholarly Article")
+    ]:
+        g.add((class_uri, RDF.type, RDFS.Class))
+        g.add((class_uri, RDFS.label, Literal(label)))
 
 ###
+# make_id, split_names, safe_uri and to_safe_rdf_value live in rdf_terms.py (precompiled patterns)
+terms = TermFactory()  # one per process; pool workers inherit a copy
+
+MINT_CHUNK = 1000  # records decoded and minted together
+
+def mint_chunk(records):
+    """Batch-mint the URIs of the keywords, journals and publishers of a chunk of records"""
+    keywords, journals, publishers = [], [], []
+    for data in records:
+        keywords.extend(data.get("keyword") or ())
+        journals.append((data.get("serial_title") or [None])[0])
+        serial_publisher = (data.get("serial_publisher") or [None])[0]
+        if isinstance(serial_publisher, str):
+            publishers.extend(terms.names(serial_publisher))
+    terms.mint(KEYWORD_BASE, keywords)
+    terms.mint(JOURNAL_BASE, journals)
+    terms.mint(PUBLISHER_BASE, publishers)
 
-def make_id(text):
-    """Create URI-safe ID from text"""
-    return re.sub(r'[^a-zA-Z0-9_]', '', text.replace(" ", "_"))
-
-def split_names(raw_string):
-    """Split author/publisher names robustly"""
-    if not raw_string:
-        return []
-    if isinstance(raw_string, list):
-        raw_string = "; ".join([r for r in raw_string if r])
-    return [n.strip() for n in re.split(r'\s*;\s*', raw_string) if n.strip()]
-
-def safe_uri(uri_str):
-    """Return URIRef with percent-encoding if needed"""
-    encoded = urllib.parse.quote(uri_str, safe=":/?&=%#")
-    return URIRef(encoded)
-
-def to_safe_rdf_value(value):
-    """Try to return a safe URIRef, fall back to Literal if not a valid URI."""
-    # Attempt to detect a scheme and validate
-    match = re.match(r'^([a-zA-Z][a-zA-Z0-9+.-]*):', value)
-    if match:
-        scheme = match.group(1)
-        # If scheme is valid, try to build a URIRef
-        try:
-            encoded = urllib.parse.quote(value, safe=":/?&=%#")
-            return URIRef(encoded)
-        except Exception:
-            pass
-    # Otherwise, treat it as a plain literal
-    return Literal(value)
 
 # ==== STEP: LOAD JSONL AND BUILD CLEAN RDF ====
-with open(INPUT_FILE, "r", encoding="utf-8") as f:
-    print (f"Start processing: {INPUT_FILE}..")
-    for line in tqdm(f, desc="Building cleaned RDF"):
-        try:
-            data = json.loads(line)
-            doc_id = data.get("document_id", [None])[0]
-            if not doc_id:
+def add_record(g, data, registry, d=None):
+    """Add the triples of one JSONL record to g (Graph or NTriplesWriter).
+    Descriptive triples of shared entities go to d (the dictionary, defaults to g),
+    and only the first time the registry sees them."""
+    if d is None:
+        d = g
+    doc_id = data.get("document_id", [None])[0]
+    if not doc_id:
+        return
+    record_uri = URIRef(ZBMATH + doc_id)
+    for sink in (g, d):
+        if isinstance(sink, NTriplesWriter):
+            sink.begin_record(record_uri)
+    
+    # Title
+    title = data.get("document_title", [None])[0]
+    if title and title != "None":
+        g.add((record_uri, DCTERMS.title, Literal(title)))
+        g.add((record_uri, SCHEMA.name, Literal(title)))
+        g.add((record_uri, RDFS.label, Literal(title))) #new9/9
+
+    # for document
+    g.add((record_uri, RDF.type, SCHEMA.ScholarlyArticle))
+
+    # Authors processing
+    authors = data.get("author", [])
+    author_ids = data.get("author_id", []) 
+    valid_author_ids = [aid for aid in author_ids if aid and aid.lower() != "none"]
+    
+    # If author_ids exist, use them; otherwise, split author names
+    # if author_ids and any(author_ids):
+    if valid_author_ids:
+        for i, aid in enumerate(author_ids):
+            if not aid or aid.lower() == "none":
+            # if not aid:
                 continue
-            record_uri = URIRef(ZBMATH + doc_id)
-            
-            # Title
-            title = data.get("document_title", [None])[0]
-            if title and title != "None":
-                g.add((record_uri, DCTERMS.title, Literal(title)))
-                g.add((record_uri, SCHEMA.name, Literal(title)))
-                g.add((record_uri, RDFS.label, Literal(title))) #new9/9
-
-            # for document
-            g.add((record_uri, RDF.type, SCHEMA.ScholarlyArticle))
-
-            # Authors processing
-            authors = data.get("author", [])
-            author_ids = data.get("author_id", []) 
-            valid_author_ids = [aid for aid in author_ids if aid and aid.lower() != "none"]
-            
-            # If author_ids exist, use them; otherwise, split author names
-            # if author_ids and any(author_ids):
-            if valid_author_ids:
-                for i, aid in enumerate(author_ids):
-                    if not aid or aid.lower() == "none":
-                    # if not aid:
-                        continue
-                    # name = split_names(authors[i])[0] if i < len(authors) else aid
-                    if i < len(authors):
-                        raw_names = split_names(authors[i])
-                        name = raw_names[0] if raw_names else aid
-                    else:
-                        name = aid
-                    author_uri = URIRef(f"https://zbmath.org/authors/{aid}")
-                    g.add((record_uri, DCTERMS.creator, author_uri))
-                    g.add((record_uri, SCHEMA.author, author_uri)) #new
-                    g.add((author_uri, RDF.type, SCHEMA.Person))
-                    g.add((author_uri, SCHEMA.name, Literal(name)))
-                    g.add((author_uri, RDFS.label, Literal(name)))  #  Add label
-
+            # name = split_names(authors[i])[0] if i < len(authors) else aid
+            if i < len(authors):
+                raw_names = terms.names(authors[i])
+                name = raw_names[0] if raw_names else aid
             else:
-                # fallback: split names from author strings
-                for raw in authors:
-                    for name in split_names(raw):
-                        id_name = make_id(name)
-                        author_uri = URIRef(f"https://zbmath.org/author/{id_name}")
-                        g.add((record_uri, DCTERMS.creator, author_uri))
-                        g.add((record_uri, SCHEMA.author, author_uri)) #new
-                        g.add((author_uri, RDF.type, SCHEMA.Person))
-                        g.add((author_uri, SCHEMA.name, Literal(name)))
-                        g.add((author_uri, RDFS.label, Literal(name)))  #  Add label
-
-
-            doc_type_code = data.get("document_type", [None])[0]
-            if doc_type_code and doc_type_code != "None":
-                doc_type_info = DOC_TYPE_URI_MAP.get(doc_type_code.strip().lower())
-                if doc_type_info:
-                    doc_type_uri = doc_type_info["uri"]
-                    g.add((record_uri, DCTERMS.type, doc_type_uri))
-                else:
-                    g.add((record_uri, DCTERMS.type, Literal(doc_type_code)))
-
-            # Classifications
-            classifications = data.get("classification", [])
-            if classifications:
-                for msc_code in classifications:
-                    if not msc_code:
-                        continue
-                    msc_clean = msc_code.strip().replace(" ", "")
-                    
-                    msc_uri = MSC[msc_clean]
-                    g.add((record_uri, DCTERMS.subject, msc_uri))
-                    g.add((msc_uri, RDF.type, SKOS.Concept))
-                    g.add((msc_uri, RDF.type, MSC_CONCEPT))
-                    g.add((msc_uri, SKOS.notation, Literal(msc_clean)))
-                    
-                    # Use short title as prefLabel if available, otherwise fallback to code
-                    msc_info = msc_lookup.get(msc_clean)
-                    label = msc_info.get("short_title") if msc_info and msc_info.get("short_title") else msc_clean
-                    g.add((msc_uri, SKOS.prefLabel, Literal(label)))
-                    g.add((msc_uri, SKOS.inScheme, MSC_SCHEME_URI))
-                    g.add((msc_uri, RDFS.label, Literal(label)))
-                    
-                    # Add zbMATH URL if available
-                    if msc_info:
-                        zb_url = msc_info.get("zbmath_url")
-                        if zb_url:
-                            # g.add((msc_uri, URIRef("http://www.w3.org/2000/01/rdf-schema#seeAlso"), URIRef(zb_url)))
-                            g.add((msc_uri, RDFS.seeAlso, URIRef(safe_uri(zb_url))))
-
-            # Keywords
-            keywords = data.get("keyword", [])
-            if keywords:
-                for kw in keywords:
-                    if not kw:
-                        continue
-                    kw_id = make_id(kw)
-                    kw_uri = URIRef(f"https://zbmath.org/keyword/{kw_id}")
-                    g.add((record_uri, SCHEMA.keywords, kw_uri))
-                    g.add((kw_uri, RDF.type, SKOS.Concept))
-                    g.add((kw_uri, RDF.type, KEYWORD_CONCEPT))  # 
-                    g.add((kw_uri, SKOS.prefLabel, Literal(kw)))
-                    g.add((kw_uri, RDFS.label, Literal(kw)))  # 
-                    g.add((kw_uri, SKOS.inScheme, KW_SCHEME_URI))
-                    g.add((kw_uri, RDFS.label, Literal(kw)))
-
-            # Language
-            lang = data.get("language", [None])[0]
-            if lang and lang != "None":
-                g.add((record_uri, DCTERMS.language, Literal(lang)))
-
-            # Publication year
-            pub_year = data.get("publication_year", [None])[0]
-            if pub_year and pub_year != "None":
-                try:
-                    g.add((record_uri, DCTERMS.issued, Literal(int(pub_year), datatype=XSD.gYear)))
-                    g.add((record_uri, SCHEMA.datePublished, Literal(int(pub_year), datatype=XSD.gYear)))
-                except ValueError:
-                    g.add((record_uri, DCTERMS.issued, Literal(pub_year)))
-                    g.add((record_uri, SCHEMA.datePublished, Literal(pub_year)))
-
-            # Pagination
-            pagination = data.get("pagination", [None])[0]
-            if pagination and pagination != "None":
-                g.add((record_uri, SCHEMA.pagination, Literal(pagination)))
-
-            # Zbl ID
-            zbl_id = data.get("zbl_id", [None])[0]
-            if zbl_id and zbl_id != "None":
-                zbl_bn = BNode()
-                g.add((record_uri, SCHEMA.identifier, zbl_bn))
-                g.add((zbl_bn, RDF.type, SCHEMA.PropertyValue))
-                g.add((zbl_bn, SCHEMA.propertyID, Literal("zbl_id")))
-                g.add((zbl_bn, SCHEMA.value, Literal(zbl_id)))
+                name = aid
+            author_uri = terms.uri(f"https://zbmath.org/authors/{aid}")
+            g.add((record_uri, DCTERMS.creator, author_uri))
+            g.add((record_uri, SCHEMA.author, author_uri)) #new
+            if registry.first(author_uri):
+                d.add((author_uri, RDF.type, SCHEMA.Person))
+            if registry.first(author_uri, name):
+                d.add((author_uri, SCHEMA.name, Literal(name)))
+                d.add((author_uri, RDFS.label, Literal(name)))  #  Add label
+
+    else:
+        # fallback: split names from author strings
+        for raw in authors:
+            for name in terms.names(raw):
+                author_uri = terms.entity(AUTHOR_NAME_BASE, name)
+                g.add((record_uri, DCTERMS.creator, author_uri))
+                g.add((record_uri, SCHEMA.author, author_uri)) #new
+                if registry.first(author_uri):
+                    d.add((author_uri, RDF.type, SCHEMA.Person))
+                if registry.first(author_uri, name):
+                    d.add((author_uri, SCHEMA.name, Literal(name)))
+                    d.add((author_uri, RDFS.label, Literal(name)))  #  Add label
+
+
+    doc_type_code = data.get("document_type", [None])[0]
+    if doc_type_code and doc_type_code != "None":
+        doc_type_info = DOC_TYPE_URI_MAP.get(doc_type_code.strip().lower())
+        if doc_type_info:
+            doc_type_uri = doc_type_info["uri"]
+            g.add((record_uri, DCTERMS.type, doc_type_uri))
+        else:
+            g.add((record_uri, DCTERMS.type, terms.literal(doc_type_code)))
+
+    # Classifications
+    classifications = data.get("classification", [])
+    if classifications:
+        for msc_code in classifications:
+            if not msc_code:
+                continue
+            msc_clean = msc_code.strip().replace(" ", "")
             
-            # doi
-            doi = data.get("doi", [None])[0]
-            if doi and doi != "None":
-                doi_bn = BNode()
-                g.add((record_uri, SCHEMA.identifier, doi_bn))
-                g.add((doi_bn, RDF.type, SCHEMA.PropertyValue))
-                g.add((doi_bn, SCHEMA.propertyID, Literal("doi")))
-                g.add((doi_bn, SCHEMA.value, Literal(doi)))
-
-            # # Review
-            # Review block (refactored as schema:Review entity)
-            review_text = data.get("review_text", [None])[0]
-            review_sign = data.get("review_sign", [None])[0]
-            reviewer_id = data.get("reviewer_id", [None])[0]
-            review_type = data.get("review_type", [None])[0]
-            review_lang = data.get("review_language", [None])[0]
-
-            if any([review_text, reviewer_id, review_sign]) and review_text != "None":
-                review_node = BNode()
-                g.add((record_uri, SCHEMA.review, review_node))
-                g.add((review_node, RDF.type, SCHEMA.Review))
-
-                # Review body
-                if review_text and review_text != "None":
-                    g.add((review_node, SCHEMA.reviewBody, Literal(review_text)))
-
-                # Review language
-                if review_lang and review_lang != "None":
-                    g.add((review_node, SCHEMA.inLanguage, Literal(review_lang)))
-
-                # Review type
-                if review_type and review_type != "None":
-                    g.add((review_node, SCHEMA.reviewAspect, Literal(review_type)))
-
-                # Reviewer
-                if reviewer_id and reviewer_id != "None":
-                    # reviewer_uri = URIRef(f"https://zbmath.org/reviewers/{make_id(reviewer_id)}")
-                    reviewer_uri = URIRef(f"https://zbmath.org/authors/{reviewer_id}")
-                    g.add((review_node, SCHEMA.reviewer, reviewer_uri))  # instead of SCHEMA.author
-                    g.add((reviewer_uri, RDF.type, SCHEMA.Person))
-                    
-                    # Use review_sign as name if available
-                    if review_sign and review_sign != "None":
-                        g.add((reviewer_uri, SCHEMA.name, Literal(review_sign)))
-                        g.add((reviewer_uri, RDFS.label, Literal(name)))  #  Add label
-                    else:
-                        g.add((reviewer_uri, SCHEMA.name, Literal(reviewer_id)))
-                        g.add((reviewer_uri, RDFS.label, Literal(reviewer_id)))  #  Add label
-
-            # Software
-            software_names = data.get("software_name", [])
-            sw_ids = data.get("swmath_id", [])
+            msc_uri = MSC[msc_clean]
+            g.add((record_uri, DCTERMS.subject, msc_uri))
+            if not registry.first(msc_uri):
+                continue  # descriptive triples depend on the code only
+            d.add((msc_uri, RDF.type, SKOS.Concept))
+            d.add((msc_uri, RDF.type, MSC_CONCEPT))
+            d.add((msc_uri, SKOS.notation, Literal(msc_clean)))
             
-            for name, sw_id in zip(software_names, sw_ids):
-                if sw_id and sw_id != "None":
-                    software_uri = URIRef(f"https://zbmath.org/software/{sw_id}")
-                    g.add((software_uri, RDF.type, SCHEMA.SoftwareApplication))
-                    if name and name != "None":
-                        g.add((software_uri, SCHEMA.name, Literal(name)))
-                        g.add((software_uri, RDFS.label, Literal(name)))  # 
-                    g.add((software_uri, SCHEMA.identifier, Literal(sw_id)))
+            # Use short title as prefLabel if available, otherwise fallback to code
+            msc_info = msc_lookup.get(msc_clean)
+            label = msc_info.get("short_title") if msc_info and msc_info.get("short_title") else msc_clean
+            d.add((msc_uri, SKOS.prefLabel, Literal(label)))
+            d.add((msc_uri, SKOS.inScheme, MSC_SCHEME_URI))
+            d.add((msc_uri, RDFS.label, Literal(label)))
             
-                    # Link software to the article
-                    g.add((record_uri, SCHEMA.software, software_uri))
-                    g.add((software_uri, SCHEMA.isPartOf, record_uri)) #reversible
-
-
-            # Serial / Publisher
-            serial_title = data.get("serial_title", [None])[0]
-            if serial_title and serial_title != "None":
-                journal_id = make_id(serial_title)
-                journal_uri = URIRef(f"https://zbmath.org/journal/{journal_id}")
-                g.add((record_uri, DCTERMS.isPartOf, journal_uri))
-                g.add((journal_uri, RDF.type, SCHEMA.Periodical))
-                g.add((journal_uri, SCHEMA.name, Literal(serial_title)))
-                g.add((journal_uri, RDFS.label, Literal(serial_title)))  # 
-
-                # Optional: if ISSN is known, add it here
-                # g.add((journal_uri, SCHEMA.issn, Literal("xxxx-xxxx")))
-
-            serial_publisher = data.get("serial_publisher", [None])[0]
-            if serial_publisher and serial_publisher != "None":
-                for name in split_names(serial_publisher):
-                    id_name = make_id(name)
-                    pub_uri = URIRef(f"https://zbmath.org/publisher/{id_name}")
-                    g.add((record_uri, DCTERMS.publisher, pub_uri))
-                    g.add((pub_uri, RDF.type, SCHEMA.Organization))
-                    g.add((pub_uri, SCHEMA.name, Literal(name)))
-                    g.add((pub_uri, RDFS.label, Literal(name)))  # 
+            # Add zbMATH URL if available
+            if msc_info:
+                zb_url = msc_info.get("zbmath_url")
+                if zb_url:
+                    # g.add((msc_uri, URIRef("http://www.w3.org/2000/01/rdf-schema#seeAlso"), URIRef(zb_url)))
+                    d.add((msc_uri, RDFS.seeAlso, URIRef(safe_uri(zb_url))))
+
+    # Keywords
+    keywords = data.get("keyword", [])
+    if keywords:
+        for kw in keywords:
+            if not kw:
+                continue
+            kw_uri = terms.entity(KEYWORD_BASE, kw)
+            g.add((record_uri, SCHEMA.keywords, kw_uri))
+            if registry.first(kw_uri):
+                d.add((kw_uri, RDF.type, SKOS.Concept))
+                d.add((kw_uri, RDF.type, KEYWORD_CONCEPT))  # 
+                d.add((kw_uri, SKOS.inScheme, KW_SCHEME_URI))
+            if registry.first(kw_uri, kw):
+                d.add((kw_uri, SKOS.prefLabel, Literal(kw)))
+                d.add((kw_uri, RDFS.label, Literal(kw)))  # 
+
+    # Language
+    lang = data.get("language", [None])[0]
+    if lang and lang != "None":
+        g.add((record_uri, DCTERMS.language, terms.literal(lang)))
+
+    # Publication year
+    pub_year = data.get("publication_year", [None])[0]
+    if pub_year and pub_year != "None":
+        try:
+            year = terms.typed(int(pub_year), XSD.gYear)
+            g.add((record_uri, DCTERMS.issued, year))
+            g.add((record_uri, SCHEMA.datePublished, year))
+            g.add((record_uri, YEAR, terms.typed(int(pub_year), XSD.integer)))
+            g.add((record_uri, DECADE, terms.typed(int(pub_year) // 10 * 10, XSD.integer)))
+        except ValueError:
+            g.add((record_uri, DCTERMS.issued, Literal(pub_year)))
+            g.add((record_uri, SCHEMA.datePublished, Literal(pub_year)))
+
+    # Pagination
+    pagination = data.get("pagination", [None])[0]
+    if pagination and pagination != "None":
+        g.add((record_uri, SCHEMA.pagination, Literal(pagination)))
+
+    # Zbl ID
+    zbl_id = data.get("zbl_id", [None])[0]
+    if zbl_id and zbl_id != "None":
+        zbl_bn = BNode(f"zbl{doc_id}")
+        g.add((record_uri, SCHEMA.identifier, zbl_bn))
+        g.add((zbl_bn, RDF.type, SCHEMA.PropertyValue))
+        g.add((zbl_bn, SCHEMA.propertyID, terms.literal("zbl_id")))
+        g.add((zbl_bn, SCHEMA.value, Literal(zbl_id)))
+    
+    # doi
+    doi = data.get("doi", [None])[0]
+    if doi and doi != "None":
+        doi_bn = BNode(f"doi{doc_id}")
+        g.add((record_uri, SCHEMA.identifier, doi_bn))
+        g.add((doi_bn, RDF.type, SCHEMA.PropertyValue))
+        g.add((doi_bn, SCHEMA.propertyID, terms.literal("doi")))
+        g.add((doi_bn, SCHEMA.value, Literal(doi)))
+
+    # # Review
+    # Review block (refactored as schema:Review entity)
+    review_text = data.get("review_text", [None])[0]
+    review_sign = data.get("review_sign", [None])[0]
+    reviewer_id = data.get("reviewer_id", [None])[0]
+    review_type = data.get("review_type", [None])[0]
+    review_lang = data.get("review_language", [None])[0]
+
+    if any([review_text, reviewer_id, review_sign]) and review_text != "None":
+        review_node = BNode(f"review{doc_id}")
+        g.add((record_uri, SCHEMA.review, review_node))
+        g.add((review_node, RDF.type, SCHEMA.Review))
+
+        # Review body
+        if review_text and review_text != "None":
+            g.add((review_node, SCHEMA.reviewBody, Literal(review_text)))
+
+        # Review language
+        if review_lang and review_lang != "None":
+            g.add((review_node, SCHEMA.inLanguage, terms.literal(review_lang)))
+
+        # Review type
+        if review_type and review_type != "None":
+            g.add((review_node, SCHEMA.reviewAspect, terms.literal(review_type)))
+
+        # Reviewer
+        if reviewer_id and reviewer_id != "None":
+            # reviewer_uri = URIRef(f"https://zbmath.org/reviewers/{make_id(reviewer_id)}")
+            reviewer_uri = terms.uri(f"https://zbmath.org/authors/{reviewer_id}")
+            g.add((review_node, SCHEMA.reviewer, reviewer_uri))  # instead of SCHEMA.author
+            if registry.first(reviewer_uri):
+                d.add((reviewer_uri, RDF.type, SCHEMA.Person))
+            
+            # Use review_sign as name if available
+            reviewer_name = review_sign if review_sign and review_sign != "None" else reviewer_id
+            if registry.first(reviewer_uri, reviewer_name):
+                d.add((reviewer_uri, SCHEMA.name, Literal(reviewer_name)))
+                d.add((reviewer_uri, RDFS.label, Literal(reviewer_name)))  #  Add label
+
+    # Software
+    software_names = data.get("software_name", [])
+    sw_ids = data.get("swmath_id", [])
+    
+    for name, sw_id in zip(software_names, sw_ids):
+        if sw_id and sw_id != "None":
+            software_uri = terms.uri(f"https://zbmath.org/software/{sw_id}")
+            if registry.first(software_uri):
+                d.add((software_uri, RDF.type, SCHEMA.SoftwareApplication))
+                d.add((software_uri, SCHEMA.identifier, Literal(sw_id)))
+            if name and name != "None" and registry.first(software_uri, name):
+                d.add((software_uri, SCHEMA.name, Literal(name)))
+                d.add((software_uri, RDFS.label, Literal(name)))  # 
+    
+            # Link software to the article
+            g.add((record_uri, SCHEMA.software, software_uri))
+            g.add((software_uri, SCHEMA.isPartOf, record_uri)) #reversible
+
+
+    # Serial / Publisher
+    serial_title = data.get("serial_title", [None])[0]
+    if serial_title and serial_title != "None":
+        journal_uri = terms.entity(JOURNAL_BASE, serial_title)
+        g.add((record_uri, DCTERMS.isPartOf, journal_uri))
+        if registry.first(journal_uri):
+            d.add((journal_uri, RDF.type, SCHEMA.Periodical))
+        if registry.first(journal_uri, serial_title):
+            d.add((journal_uri, SCHEMA.name, Literal(serial_title)))
+            d.add((journal_uri, RDFS.label, Literal(serial_title)))  # 
+
+        # Optional: if ISSN is known, add it here
+        # g.add((journal_uri, SCHEMA.issn, Literal("xxxx-xxxx")))
+
+    serial_publisher = data.get("serial_publisher", [None])[0]
+    if serial_publisher and serial_publisher != "None":
+        for name in terms.names(serial_publisher):
+            pub_uri = terms.entity(PUBLISHER_BASE, name)
+            g.add((record_uri, DCTERMS.publisher, pub_uri))
+            if registry.first(pub_uri):
+                d.add((pub_uri, RDF.type, SCHEMA.Organization))
+            if registry.first(pub_uri, name):
+                d.add((pub_uri, SCHEMA.name, Literal(name)))
+                d.add((pub_uri, RDFS.label, Literal(name)))  # 
+    
+    # Links (flat list now)
+    link_data = data.get("link", [])
+    if link_data:
+        if isinstance(link_data, str):
+            links = [link_data]
+        else:
+            links = list(link_data)
+        for l in links:
+            if not l:
+                continue
+            g.add((record_uri, SCHEMA.url, terms.link(l)))
             
-            # Links (flat list now)
-            link_data = data.get("link", [])
-            if link_data:
-                if isinstance(link_data, str):
-                    links = [link_data]
-                else:
-                    links = list(link_data)
-                for l in links:
-                    if not l:
-                        continue
-                    g.add((record_uri, SCHEMA.url, to_safe_rdf_value(l)))
-                    
-
-            # --- Citation Network ---
-            for cited_id in data.get("ref_id", []):
-                if cited_id and cited_id != "None":
-                    cited_uri = URIRef(ZBMATH + cited_id)
-                    g.add((record_uri, CITO.cites, cited_uri))
-                    # g.add((cited_uri, RDF.type, SCHEMA.ScholarlyArticle))
-
-        except Exception as e:
-            print(f"⚠️ Error processing record: {e}{line}")
-            continue
-
-# ==== SAVE FINAL CLEAN RDF ====
 
-# print(f"Serializing (nt)..")
-# g.serialize(destination=OUTPUT_FILE_2, format="nt")
-# print(f"✅ RDF (nt) saved to {OUTPUT_FILE_2}")
+    # --- Citation Network ---
+    for cited_id in data.get("ref_id", []):
+        if cited_id and cited_id != "None":
+            cited_uri = terms.uri(ZBMATH + cited_id)
+            g.add((record_uri, CITO.cites, cited_uri))
+            # g.add((cited_uri, RDF.type, SCHEMA.ScholarlyArticle))
+
+
+def convert_lines(g, lines, registry, d=None):
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, MINT_CHUNK))
+        if not chunk:
+            break
+        records = []
+        for line in chunk:
+            try:
+                records.append((line, decode_record(line)))
+            except Exception as e:
+                print(f"⚠️ Error processing record: {e}{line}")
+        try:
+            mint_chunk([data for _, data in records])
+        except (TypeError, AttributeError, KeyError, IndexError) as e:
+            # unexpected value types: entities are minted one by one in add_record
+            print(f"⚠️ Batch minting skipped for a chunk: {e!r}")
+        for line, data in records:
+            try:
+                add_record(g, data, registry, d)
+            except Exception as e:
+                print(f"⚠️ Error processing record: {e}{line}")
+                continue
 
-print(f"Serializing (ttl)..")
-g.serialize(destination=OUTPUT_FILE, format="turtle")
-print(f"✅ RDF (ttl) saved to {OUTPUT_FILE}")
+def write_sorted(lines, path):
+    lines.sort()
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines)
+
+_worker_registry = None  # one registry per pool process, reused across its shards
+
+def convert_shard(task):
+    """Worker: convert one byte range of a JSONL file into sorted N-Triples/N-Quads chunks
+    (record triples, plus entity triples when a dictionary chunk is requested)"""
+    global _worker_registry
+    if _worker_registry is None:
+        _worker_registry = EntityRegistry()
+    path, start, end, fmt, shard_file, dict_file = task
+    lines = LineBuffer()
+    entity_lines = LineBuffer() if dict_file else lines
+    convert_lines(new_graph(fmt, lines), iter_shard_lines(path, start, end),
+                  _worker_registry, new_graph(fmt, entity_lines))
+    write_sorted(lines, shard_file)
+    if dict_file:
+        write_sorted(entity_lines, dict_file)
+    return shard_file, dict_file
+
+def convert_parallel(input_path, output_file, fmt, workers, shard_size, dictionary_file=None, compress=None, stats=False):
+    """Convert JSONL shards with a process pool and merge them into one sorted, deduplicated dump.
+    The result does not depend on the number of workers or the shard size.
+    stats: report the merged (deduplicated) output, see rdf_stats.py"""
+    shards = plan_shards(list_jsonl(input_path), shard_size)
+    print(f"Start processing: {input_path} ({len(shards)} shards, {workers} workers)..")
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output_file))) as tmp_dir:
+        header = LineBuffer()
+        add_schema(new_graph(fmt, header))
+        header_file = os.path.join(tmp_dir, "header.nt")
+        write_sorted(header, header_file)
+
+        tasks = [(path, start, end, fmt, os.path.join(tmp_dir, f"shard-{i:06d}.nt"),
+                  os.path.join(tmp_dir, f"dict-{i:06d}.nt") if dictionary_file else None)
+                 for i, (path, start, end) in enumerate(shards)]
+        with Pool(workers) as pool:
+            chunks = list(tqdm(pool.imap(convert_shard, tasks), total=len(tasks), desc="Building cleaned RDF (shards)"))
+        shard_files = [shard for shard, _ in chunks]
+
+        print(f"Merging {len(shard_files)} shards..")
+        if dictionary_file:
+            with open_output(dictionary_file, compress, stats_factory(fmt, stats)) as out:
+                entities = merge_sorted([header_file] + [dic for _, dic in chunks], out)
+            print(f"✅ Entity dictionary saved to {saved_as(dictionary_file, out)}: {entities} distinct triples")
+        else:
+            shard_files.insert(0, header_file)
+        with open_output(output_file, compress, stats_factory(fmt, stats)) as out:
+            written = merge_sorted(shard_files, out)
+    print(f"✅ RDF ({fmt}) saved to {saved_as(output_file, out)}: {written} distinct triples")
+    if stats:
+        print(f"✅ Statistics saved to {output_file}{REPORT_SUFFIX} (see stats.py --reports)")
+
+
+def scan_records(path):
+    """Yield (document_id, time, content hash, path, offset) for the records of a JSONL file"""
+    for offset, line in iter_offset_lines(path):
+        try:
+            data = decode_record(line)
+        except DecodeError:
+            continue
+        if not isinstance(data, (dict, Record)):
+            continue  # valid JSON, but not a record
+        doc_ids = data.get("document_id")
+        doc_id = doc_ids[0] if isinstance(doc_ids, list) and doc_ids else None
+        if doc_id:
+            yield doc_id, (data.get("time") or [None])[0] or "", content_hash(line), path, offset
+
+def convert_incremental(input_path, output_prefix, fmt, manifest_path, with_deletes=True):
+    """Compare the input with the manifest of the previous build and write only the delta:
+    <prefix>.delete.ru (SPARQL Update for changed and deleted records, apply first) and
+    <prefix>.insert.<fmt> (triples of added and changed records)."""
+    manifest = Manifest(manifest_path)
+    print(f"Start processing: {input_path} (manifest: {manifest_path}, {len(manifest)} records)..")
+    for path in list_jsonl(input_path):
+        manifest.stage(tqdm(scan_records(path), desc=f"Scanning {os.path.basename(path)}"))
+    added, changed, deleted = manifest.diff(with_deletes)
+    print(f"Delta: {len(added)} added, {len(changed)} changed, {len(deleted)} deleted")
+
+    graph = ZBMATH_GRAPH if fmt == "nq" else None
+    delete_file = f"{output_prefix}.delete.ru"
+    write_delete_update(delete_file, [ZBMATH + doc_id for doc_id, _, _ in changed] +
+                                     [ZBMATH + doc_id for doc_id in deleted], graph)
+
+    insert_file = f"{output_prefix}.insert.{fmt}"
+    with open(insert_file, "w", encoding="utf-8", buffering=1 << 20) as out:
+        g = new_graph(fmt, out)
+        add_schema(g)
+        registry = EntityRegistry()
+        files = {}
+        try:
+            for doc_id, path, offset in tqdm(sorted(added + changed, key=lambda r: (r[1], r[2])), desc="Building delta RDF"):
+                if path not in files:
+                    files[path] = open(path, "rb")
+                convert_lines(g, [read_line_at(files[path], offset)], registry)
+        finally:
+            for f in files.values():
+                f.close()
+
+    manifest.commit(with_deletes)
+    manifest.close()
+    print(f"✅ Delta saved: {delete_file} (apply first), {insert_file}: {g.written} triples")
+
+
+def convert_serial(INPUT_FILE, OUTPUT_FILE, fmt, dictionary_file=None, compress=None, stats=False):
+    """Convert one JSONL file in this process (ttl: one in-memory graph, nt/nq: streamed)"""
+    streams = []
+    def open_graph(path):
+        if fmt == "ttl":
+            return new_graph("ttl")
+        streams.append(open_output(path, compress, stats_factory(fmt, stats)))
+        return new_graph(fmt, streams[-1])
+
+    g = open_graph(OUTPUT_FILE)
+    d = open_graph(dictionary_file) if dictionary_file else g
+    registry = EntityRegistry()
+    add_schema(d)
+
+    with open(INPUT_FILE, "r", encoding="utf-8") as f:
+        print (f"Start processing: {INPUT_FILE}..")
+        convert_lines(g, tqdm(f, desc="Building cleaned RDF"), registry, d)
+
+    # ==== SAVE FINAL CLEAN RDF ====
+
+    # print(f"Serializing (nt)..")
+    # g.serialize(destination=OUTPUT_FILE_2, format="nt")
+    # print(f"✅ RDF (nt) saved to {OUTPUT_FILE_2}")
+
+    print(f"{len(registry)} distinct entity descriptions, {registry.hits} repeated ones skipped")
+    if streams:
+        for stream in streams:
+            stream.close()
+        print(f"✅ RDF ({fmt}) saved to {saved_as(OUTPUT_FILE, streams[0])}: "
+              f"{g.written} triples written, {g.skipped} duplicates skipped")
+        if dictionary_file:
+            print(f"✅ Entity dictionary saved to {saved_as(dictionary_file, streams[1])}: {d.written} triples")
+    else:
+        print(f"Serializing (ttl)..")
+        g.serialize(destination=OUTPUT_FILE, format="turtle")
+        print(f"✅ RDF (ttl) saved to {OUTPUT_FILE}")
+        if dictionary_file:
+            d.serialize(destination=dictionary_file, format="turtle")
+            print(f"✅ Entity dictionary saved to {dictionary_file}")
+        if stats:
+            for graph, path in ((g, OUTPUT_FILE), (d, dictionary_file)):
+                if path:
+                    report = GraphStats()
+                    report.add_lines(f"{term_nt(s)} {term_nt(p)} {term_nt(o)} .\n" for s, p, o in graph)
+                    write_report(report, path + REPORT_SUFFIX)
+    if stats:
+        print(f"✅ Statistics saved to {OUTPUT_FILE}{REPORT_SUFFIX} (see stats.py --reports)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert JSONL to RDF Turtle/N-Triples")
+    parser.add_argument("input", help="Path to input JSONL file (or a directory of JSONL files with --workers)")
+    parser.add_argument("output", help="Output files")
+    parser.add_argument("--format", choices=["ttl", "nt", "nq", "hdt"], default="ttl",
+                        help="ttl: build one in-memory graph (default); nt/nq: stream N-Triples/N-Quads record by record; "
+                             "hdt: binary dump directory (dictionary + indexed triples) queryable with rdf_hdt.HDT")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="convert byte-range shards with N processes and merge them into one sorted dump (nt/nq only)")
+    parser.add_argument("--shard-size", type=float, default=64, help="shard size in MB for --workers (default: 64)")
+    parser.add_argument("--dictionary", help="write the descriptive triples of shared entities "
+                                             "(MSC, keywords, journals, publishers, persons, software) to this separate file")
+    parser.add_argument("--manifest", help="incremental build: compare the input with this manifest (SQLite, created "
+                                           "if missing) and write only <output>.delete.ru and <output>.insert.<format>")
+    parser.add_argument("--keep-missing", action="store_true",
+                        help="with --manifest: the input is not a full snapshot, do not delete records missing from it")
+    parser.add_argument("--compress", choices=["gzip", "zstd"],
+                        help="nt/nq: write independently decompressible chunk files <output stem>-00000.nt.gz|.zst, "
+                             "compressed in parallel threads")
+    parser.add_argument("--chunk-size", type=float, default=256, help="uncompressed MB per chunk with --compress (default: 256)")
+    parser.add_argument("--compress-threads", type=int, default=0, help="compression threads (default: all cores)")
+    parser.add_argument("--sort-subjects", action="store_true",
+                        help="with --compress: sort every chunk by subject (--workers output is globally sorted anyway)")
+    parser.add_argument("--stats", action="store_true",
+                        help="write a mergeable statistics report <file>.stats.json next to every output file and "
+                             "chunk (triples, entities, types, authors, reviewers, publication years)")
+    parser.add_argument("--search", help="build the full-text search index (titles, reviews, keywords; see "
+                                         "search_index.py) of the input into this directory, alongside the conversion")
+    args = parser.parse_args()
+    if args.stats and args.manifest:
+        parser.error("--stats describes full builds, not --manifest deltas")
+    if args.search and args.manifest:
+        parser.error("--search indexes full builds, not --manifest deltas")
+
+    INPUT_FILE = args.input
+    OUTPUT_FILE = args.output
+    compress = None
+    if args.compress:
+        if args.format not in ("nt", "nq") or args.manifest:
+            parser.error("--compress requires --format nt or nq (and no --manifest)")
+        compress = dict(compression=args.compress, chunk_size=int(args.chunk_size * (1 << 20)),
+                        threads=args.compress_threads or None, sort=args.sort_subjects)
+
+    if args.manifest:
+        if args.format not in ("nt", "nq"):
+            parser.error("--manifest requires --format nt or nq")
+        convert_incremental(INPUT_FILE, OUTPUT_FILE, args.format, args.manifest, not args.keep_missing)
+        return
+
+    if args.format == "hdt" and args.dictionary:
+        parser.error("--dictionary is not supported with --format hdt")
+    if args.workers and args.format == "ttl":
+        parser.error("--workers requires --format nt or nq")
+
+    search = None
+    if args.search:  # reads the same input in its own process while the conversion runs
+        search = Process(target=write_search, args=(INPUT_FILE, args.search))
+        search.start()
+
+    if args.format == "hdt":
+        # stream N-Triples next to the dump first, then encode them
+        nt_file = OUTPUT_FILE.rstrip("/") + ".nt.tmp"
+        if args.workers:
+            convert_parallel(INPUT_FILE, nt_file, "nt", args.workers, int(args.shard_size * (1 << 20)), stats=args.stats)
+        else:
+            convert_serial(INPUT_FILE, nt_file, "nt", stats=args.stats)
+        write_hdt(nt_file, OUTPUT_FILE)
+        os.remove(nt_file)
+        if args.stats:
+            os.replace(nt_file + REPORT_SUFFIX, os.path.join(OUTPUT_FILE, "stats.json"))
+    elif args.workers:
+        convert_parallel(INPUT_FILE, OUTPUT_FILE, args.format, args.workers,
+                         int(args.shard_size * (1 << 20)), args.dictionary, compress, args.stats)
+    else:
+        convert_serial(INPUT_FILE, OUTPUT_FILE, args.format, args.dictionary, compress, args.stats)
+
+    if search:
+        search.join()
+        if search.exitcode:
+            raise SystemExit(f"❌ Building the search index {args.search} failed")
+
+
+if __name__ == "__main__":
+    main()
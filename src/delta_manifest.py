@@ -0,0 +1,84 @@
+#persistent manifest (document_id -> record time + content hash) for incremental KG builds
+import hashlib
+import sqlite3
+from rdflib import URIRef
+from rdf_stream import term_nt
+
+DELETE_BATCH = 1000  # record IRIs per VALUES block of the delete update
+
+
+def content_hash(line):
+    """Hash of one raw JSONL line (bytes)"""
+    return hashlib.blake2b(line.rstrip(b"\r\n"), digest_size=16).hexdigest()
+
+
+class Manifest:
+    """SQLite manifest of the records that went into the last build.
+
+    stage() collects the records of the current input (keeping the latest `time` when a
+    document_id occurs more than once), diff() compares them with the manifest and
+    commit() makes the current input the new manifest state."""
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS records (
+                               document_id TEXT PRIMARY KEY, time TEXT, hash TEXT) WITHOUT ROWID""")
+        self.db.execute("""CREATE TEMP TABLE staged (
+                               document_id TEXT PRIMARY KEY, time TEXT, hash TEXT, path TEXT, offset INTEGER)""")
+
+    def stage(self, rows):
+        """rows: iterable of (document_id, time, hash, path, offset)"""
+        self.db.executemany("""INSERT INTO staged VALUES (?, ?, ?, ?, ?)
+                               ON CONFLICT(document_id) DO UPDATE SET
+                                   time = excluded.time, hash = excluded.hash,
+                                   path = excluded.path, offset = excluded.offset
+                               WHERE excluded.time >= staged.time""", rows)
+
+    def diff(self, with_deletes=True):
+        """Return (added, changed, deleted): added/changed as (document_id, path, offset) sorted
+        by file position, deleted as document ids (only if with_deletes, i.e. the input is a full snapshot)"""
+        added = self.db.execute("""SELECT c.document_id, c.path, c.offset FROM staged c
+                                   LEFT JOIN records r ON r.document_id = c.document_id
+                                   WHERE r.document_id IS NULL ORDER BY c.path, c.offset""").fetchall()
+        changed = self.db.execute("""SELECT c.document_id, c.path, c.offset FROM staged c
+                                     JOIN records r ON r.document_id = c.document_id
+                                     WHERE r.hash != c.hash ORDER BY c.path, c.offset""").fetchall()
+        deleted = []
+        if with_deletes:
+            deleted = [row[0] for row in self.db.execute(
+                """SELECT r.document_id FROM records r
+                   LEFT JOIN staged c ON c.document_id = r.document_id
+                   WHERE c.document_id IS NULL ORDER BY r.document_id""")]
+        return added, changed, deleted
+
+    def commit(self, with_deletes=True):
+        """Atomically replace the manifest state with the staged input"""
+        with self.db:
+            if with_deletes:
+                self.db.execute("DELETE FROM records WHERE document_id NOT IN (SELECT document_id FROM staged)")
+            self.db.execute("""INSERT OR REPLACE INTO records
+                               SELECT document_id, time, hash FROM staged""")
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        self.db.close()
+
+
+def write_delete_update(path, record_uris, graph=None):
+    """Write a SPARQL Update removing everything a record contributed:
+    its blank nodes (identifiers, review), software back-links and its own triples.
+    Shared entity descriptions are kept. IRIs are escaped as in the N-Triples output (rdf_stream.py),
+    so they match the triples that were written."""
+    with_clause = f"WITH {term_nt(URIRef(graph))}\n" if graph else ""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(0, len(record_uris), DELETE_BATCH):
+            values = " ".join(term_nt(URIRef(uri)) for uri in record_uris[i:i + DELETE_BATCH])
+            f.write(f"{with_clause}DELETE {{ ?b ?p ?o }}\n"
+                    f"WHERE {{ VALUES ?rec {{ {values} }} ?rec <https://schema.org/identifier>|<https://schema.org/review> ?b . "
+                    f"FILTER(isBlank(?b)) ?b ?p ?o }} ;\n\n")
+            f.write(f"{with_clause}DELETE {{ ?sw <https://schema.org/isPartOf> ?rec }}\n"
+                    f"WHERE {{ VALUES ?rec {{ {values} }} ?sw <https://schema.org/isPartOf> ?rec }} ;\n\n")
+            f.write(f"{with_clause}DELETE {{ ?rec ?p ?o }}\n"
+                    f"WHERE {{ VALUES ?rec {{ {values} }} ?rec ?p ?o }} ;\n\n")
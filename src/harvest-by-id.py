@@ -4,6 +4,14 @@ import json
 from time import sleep
 from tqdm import tqdm
 import os
+import time
+import random
+import asyncio
+import argparse
+import io
+import xml.etree.ElementTree as ET
+import aiohttp
+from jsonl_io import RECORD_FIELDS, loads, dumps, DecodeError
 
 ID_LIST_FILE = "documents_in_oa_serials.csv"  # Input file with IDs
 OUTPUT_FILE = "records-oa-jsonl"        # Output JSONL file
@@ -12,13 +20,151 @@ MAX_RECORDS = 100                             # Limit to first N IDs (None for a
 SLEEP_TIME = 1                                # Seconds between requests
 HEADERS = {"User-Agent": "zbMATH-OAI-Harvester/1.0"}
 BASE_URL_TEMPLATE = "https://oai.zbmath.org/v1/?verb=GetRecord&identifier=oai:zbmath.org:{id}&metadataPrefix=oai_zb_preview"
+OAI_BASE_URL = "https://oai.zbmath.org/v1/"   # ListRecords mode
+METADATA_PREFIX = "oai_zb_preview"
+LIST_OUTPUT_FILE = "records-list.jsonl"       # ListRecords mode: flat JSONL as consumed by create-rdf.py
+CONCURRENCY = 8                               # async mode: parallel requests
+RATE_LIMIT = 5                                # async mode: requests per second (token bucket)
+MAX_RETRIES = 5                               # async mode: retries on 429/5xx/network errors
+BACKOFF_BASE = 1                              # async mode: first retry delay in seconds (doubles each time)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+CHECKPOINT_SUFFIX = ".ids"                    # sidecar with one harvested ID per line (resume index)
 
 
-def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
-                              output_file=OUTPUT_FILE,
-                              error_ids_file=ERROR_IDS_FILE,
-                              max_records=MAX_RECORDS,
-                              sleep_time=SLEEP_TIME):
+def checkpoint_path(output_file):
+    return output_file + CHECKPOINT_SUFFIX
+
+def record_id(record):
+    """zbMATH ID of a harvested record: raw OAI record or flat record"""
+    identifier = record.get("header", {}).get("identifier", "")
+    if identifier.startswith("oai:zbmath.org:"):
+        return identifier.split(":")[-1]
+    return (record.get("document_id") or [None])[0]
+
+def rebuild_checkpoint(output_file):
+    """Repair: rebuild the ID checkpoint by parsing every record of the output JSONL"""
+    processed_ids = set()
+    ids_file = checkpoint_path(output_file)
+    tmp_file = ids_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f_ids:
+        if os.path.exists(output_file):
+            with open(output_file, "r", encoding="utf-8") as f_out:
+                for line in tqdm(f_out, desc=f"Rebuilding {ids_file}", unit="record"):
+                    try:
+                        zb_id = record_id(loads(line))
+                        if zb_id and zb_id not in processed_ids:
+                            processed_ids.add(zb_id)
+                            f_ids.write(zb_id + "\n")
+                    except DecodeError:
+                        continue
+    os.replace(tmp_file, ids_file)  # atomic: never leave a half-written checkpoint behind
+    return processed_ids
+
+def cut_partial_line(path, block=1 << 16):
+    """Truncate an unterminated last line (an interrupted append) so the next append starts a new line.
+    Returns the last complete line (bytes), or None."""
+    with open(path, "rb+") as f:
+        size = start = f.seek(0, os.SEEK_END)
+        tail = b""
+        while start > 0:
+            step = min(block, start)
+            start -= step
+            f.seek(start)
+            tail = f.read(step) + tail
+            if tail[:tail.rfind(b"\n") + 1].count(b"\n") >= 2:  # the last complete line is in the tail
+                break
+        end = start + tail.rfind(b"\n") + 1
+        if end < size:
+            print(f"⚠️ Dropping the unterminated last line of {path} ({size - end} bytes)")
+            f.truncate(end)
+        complete = tail[:end - start]
+        return complete[:-1].rsplit(b"\n", 1)[-1] if complete else None
+
+def load_processed_ids(output_file):
+    """Read the ID checkpoint (rebuilding it from the JSONL if it is missing).
+    Records are written before their ID is checkpointed, one at a time: after a crash between the two
+    writes, only the last record of the output can be missing from the checkpoint, and it is added."""
+    ids_file = checkpoint_path(output_file)
+    last_line = cut_partial_line(output_file) if os.path.exists(output_file) else None
+    if not os.path.exists(ids_file):
+        if not os.path.exists(output_file):
+            return set()
+        print(f"⚠️ No checkpoint {ids_file}, rebuilding it from {output_file}..")
+        return rebuild_checkpoint(output_file)
+    cut_partial_line(ids_file)
+    with open(ids_file, "r", encoding="utf-8") as f_ids:
+        processed_ids = {line.strip() for line in f_ids if line.strip()}
+    try:
+        record = loads(last_line) if last_line else None
+    except DecodeError:
+        record = None
+    zb_id = record_id(record) if isinstance(record, dict) else None
+    if zb_id and zb_id not in processed_ids:
+        print(f"⚠️ Record {zb_id} was saved but not checkpointed, adding it to {ids_file}")
+        with open(ids_file, "a", encoding="utf-8") as f_ids:
+            f_ids.write(zb_id + "\n")
+        processed_ids.add(zb_id)
+    return processed_ids
+
+
+def iter_oai_response(source, fields=frozenset(RECORD_FIELDS)):
+    """Stream-parse an OAI-PMH response (GetRecord or a ListRecords page) with iterparse.
+    Yields ("record", identifier, flat record), ("deleted", identifier, None),
+    ("token", resumption token or None, None) and ("error", code, message).
+
+    Flat records have the create-rdf.py JSONL shape {element: [values]} restricted to `fields`
+    (None keeps every element, containers get None), so no nested dict is ever built."""
+    depth = 0
+    metadata_depth = None
+    flat = None
+    identifier = None
+    open_fields = []  # (element, values list, index) of the field elements being parsed
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        name = elem.tag.rsplit("}", 1)[-1]
+        if event == "start":
+            depth += 1
+            if metadata_depth is None:
+                if name == "metadata":
+                    metadata_depth = depth
+                    flat = {}
+            elif depth > metadata_depth + 1 and (fields is None or name in fields):
+                values = flat.setdefault(name, [])
+                values.append(None)  # reserve the slot now to keep document order
+                open_fields.append((elem, values, len(values) - 1))
+            continue
+
+        depth -= 1
+        if metadata_depth is not None:
+            if open_fields and open_fields[-1][0] is elem:
+                _, values, i = open_fields.pop()
+                values[i] = (elem.text or "").strip() or None
+            if name == "metadata" and depth + 1 == metadata_depth:
+                metadata_depth = None
+            continue
+        if name == "header":
+            identifier = elem.findtext("{*}identifier")
+            if elem.get("status") == "deleted":
+                yield "deleted", identifier, None
+        elif name == "record":
+            if flat is not None:
+                yield "record", identifier, flat
+            flat = None
+            elem.clear()  # free the parsed record
+        elif name == "resumptionToken":
+            yield "token", (elem.text or "").strip() or None, None
+        elif name == "error":
+            yield "error", elem.get("code"), elem.text
+
+def parse_get_record(content, flat=False):
+    """Record of a GetRecord response: the nested xmltodict record, or the flat JSONL record"""
+    if flat:
+        return next((record for kind, _, record in iter_oai_response(io.BytesIO(content)) if kind == "record"), None)
+    data = xmltodict.parse(content)
+    return data.get("OAI-PMH", {}).get("GetRecord", {}).get("record", {})
+
+
+def load_remaining_ids(id_file, output_file, error_ids_file, max_records):
+    """Resume support: return (remaining_ids, processed_ids, error_ids)"""
     # Read all IDs from input file
     with open(id_file, "r", encoding="utf-8") as f:
         ids = [line.strip() for line in f if line.strip()]
@@ -28,17 +174,7 @@ def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
         ids = ids[100:]
 
     # Load processed IDs
-    processed_ids = set()
-    if os.path.exists(output_file):
-        with open(output_file, "r", encoding="utf-8") as f_out:
-            for line in f_out:
-                try:
-                    record = json.loads(line)
-                    identifier = record.get("header", {}).get("identifier", "")
-                    if identifier.startswith("oai:zbmath.org:"):
-                        processed_ids.add(identifier.split(":")[-1])
-                except json.JSONDecodeError:
-                    continue
+    processed_ids = load_processed_ids(output_file)
 
     # Load previously failed IDs
     error_ids = set()
@@ -48,6 +184,16 @@ def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
 
     # Exclude already processed or failed IDs
     remaining_ids = [i for i in ids if i not in processed_ids and i not in error_ids]
+    return remaining_ids, processed_ids, error_ids
+
+
+def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
+                              output_file=OUTPUT_FILE,
+                              error_ids_file=ERROR_IDS_FILE,
+                              max_records=MAX_RECORDS,
+                              sleep_time=SLEEP_TIME,
+                              flat=False):
+    remaining_ids, processed_ids, error_ids = load_remaining_ids(id_file, output_file, error_ids_file, max_records)
 
     if not remaining_ids:
         print("✅ All IDs already processed or failed. Nothing to do.")
@@ -57,6 +203,7 @@ def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
 
     total_count = len(processed_ids)
     with open(output_file, "a", encoding="utf-8") as f_out, \
+         open(checkpoint_path(output_file), "a", encoding="utf-8") as f_ids, \
          open(error_ids_file, "a", encoding="utf-8") as f_err:
 
         pbar = tqdm(remaining_ids, desc="Fetching records", unit="record")
@@ -70,8 +217,7 @@ def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
                     f_err.flush()
                     continue
 
-                data = xmltodict.parse(response.content)
-                record = data.get("OAI-PMH", {}).get("GetRecord", {}).get("record", {})
+                record = parse_get_record(response.content, flat)
 
                 if not record:
                     print(f"⚠️ No record for ID {zb_id}")
@@ -79,9 +225,11 @@ def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
                     f_err.flush()
                     continue
 
-                json_line = json.dumps(record, ensure_ascii=False)
+                json_line = dumps(record)
                 f_out.write(json_line + "\n")
                 f_out.flush()
+                f_ids.write(zb_id + "\n")  # checkpoint only after the record is on disk
+                f_ids.flush()
 
                 total_count += 1
                 sleep(sleep_time)
@@ -98,5 +246,248 @@ def harvest_zbmath_by_id_list(id_file=ID_LIST_FILE,
     print(f"\n✅ Done. {total_count} total records saved to {output_file}, {len(error_ids)} total errors in {error_ids_file}")
 
 
+class TokenBucket:
+    """Async token bucket: at most `rate` acquisitions per second, bursts up to `capacity`"""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def fetch_record(session, bucket, url, max_retries=MAX_RETRIES, backoff=BACKOFF_BASE, flat=False):
+    """GET one OAI-PMH record with exponential backoff on 429/5xx and network errors.
+    Returns (record dict or None, error message or None)."""
+    error = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            await asyncio.sleep(delay)
+        await bucket.acquire()
+        delay = backoff * 2 ** attempt + random.uniform(0, backoff)
+        try:
+            async with session.get(url) as response:
+                if response.status in RETRY_STATUS:
+                    error = f"HTTP {response.status}"
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+                    continue
+                if response.status != 200:
+                    return None, f"HTTP {response.status}"
+                content = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            error = repr(e)
+            continue
+        record = parse_get_record(content, flat)
+        return (record, None) if record else (None, "No record")
+    return None, f"{error} after {max_retries} retries"
+
+
+async def harvest_async(remaining_ids, output_file, error_ids_file, url_template,
+                        concurrency, rate, max_retries, backoff, flat=False):
+    bucket = TokenBucket(rate)
+    connector = aiohttp.TCPConnector(limit=concurrency)  # pooled keep-alive connections
+    timeout = aiohttp.ClientTimeout(sock_connect=3, sock_read=10)
+    ids = iter(remaining_ids)
+    counts = {"ok": 0, "failed": 0}
+
+    with open(output_file, "a", encoding="utf-8") as f_out, \
+         open(checkpoint_path(output_file), "a", encoding="utf-8") as f_ids, \
+         open(error_ids_file, "a", encoding="utf-8") as f_err, \
+         tqdm(total=len(remaining_ids), desc="Fetching records", unit="record") as pbar:
+
+        async def worker(session):
+            for zb_id in ids:  # shared iterator: each ID is taken by exactly one worker
+                try:
+                    record, error = await fetch_record(session, bucket, url_template.format(id=zb_id), max_retries, backoff, flat)
+                except Exception as e:
+                    record, error = None, repr(e)
+                if record:
+                    f_out.write(dumps(record) + "\n")
+                    f_out.flush()
+                    f_ids.write(zb_id + "\n")  # checkpoint only after the record is on disk
+                    f_ids.flush()
+                    counts["ok"] += 1
+                else:
+                    print(f"⚠️ {error} for ID {zb_id}")
+                    f_err.write(zb_id + "\n")
+                    f_err.flush()
+                    counts["failed"] += 1
+                pbar.update(1)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    return counts
+
+
+def harvest_zbmath_by_id_list_async(id_file=ID_LIST_FILE,
+                                    output_file=OUTPUT_FILE,
+                                    error_ids_file=ERROR_IDS_FILE,
+                                    max_records=MAX_RECORDS,
+                                    url_template=BASE_URL_TEMPLATE,
+                                    concurrency=CONCURRENCY,
+                                    rate=RATE_LIMIT,
+                                    max_retries=MAX_RETRIES,
+                                    backoff=BACKOFF_BASE,
+                                    flat=False):
+    """Same resume semantics as harvest_zbmath_by_id_list, but fetches `concurrency` IDs at a time
+    over one keep-alive session, rate-limited to `rate` requests/second"""
+    remaining_ids, processed_ids, error_ids = load_remaining_ids(id_file, output_file, error_ids_file, max_records)
+
+    if not remaining_ids:
+        print("✅ All IDs already processed or failed. Nothing to do.")
+        return
+
+    print(f"🔄 Resuming harvest. {len(processed_ids)} fetched, {len(error_ids)} failed, {len(remaining_ids)} remaining.")
+    try:
+        counts = asyncio.run(harvest_async(remaining_ids, output_file, error_ids_file, url_template,
+                                           concurrency, rate, max_retries, backoff, flat))
+    except KeyboardInterrupt:
+        print("\n⏹ Interrupted by user. Progress saved.")
+        return
+
+    print(f"\n✅ Done. {len(processed_ids) + counts['ok']} total records saved to {output_file}, "
+          f"{len(error_ids) + counts['failed']} total errors in {error_ids_file}")
+
+
+def list_records_page(session, base_url, params, max_retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+    """Open one ListRecords request (streamed) with exponential backoff on 429/5xx"""
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.get(base_url, params=params, headers=HEADERS, timeout=(3, 60), stream=True)
+        except requests.RequestException as e:
+            error = repr(e)
+        else:
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                response.raw.decode_content = True  # let iterparse read the (decompressed) body directly
+                return response
+            error = f"HTTP {response.status_code}"
+            response.close()
+        if attempt == max_retries:
+            raise RuntimeError(f"ListRecords failed: {error} after {max_retries} retries")
+        sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+
+def harvest_list_records(output_file=LIST_OUTPUT_FILE, set_spec=None, from_date=None, until_date=None,
+                         base_url=OAI_BASE_URL, fields=frozenset(RECORD_FIELDS),
+                         max_retries=MAX_RETRIES, backoff=BACKOFF_BASE):
+    """Bulk harvest with ListRecords, paging through resumptionTokens.
+    Pages are stream-parsed and appended to the output as flat JSONL records (see iter_oai_response).
+    The query and the output size are checkpointed to <output>.token before the first request and,
+    with the next token, after every page, so a crashed run resumes at the same page without
+    duplicating records."""
+    query = {"metadataPrefix": METADATA_PREFIX, "set": set_spec, "from": from_date, "until": until_date}
+    query = {k: v for k, v in query.items() if v}
+    state_file = output_file + ".token"
+
+    def save_state():
+        with open(state_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(state_file + ".tmp", state_file)
+
+    resume = False
+    if os.path.exists(state_file):
+        with open(state_file, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        unfinished = not saved.get("done", not saved["token"])
+        if unfinished and saved["query"] != query:
+            raise SystemExit(f"❌ {state_file} belongs to an unfinished harvest ({saved['query']}); "
+                             f"rerun it to completion, or remove it to start over (records are appended)")
+        if not unfinished and saved["query"] == query:
+            print("✅ Harvest already complete. Nothing to do.")
+            return
+        resume = unfinished
+    if resume:
+        state = saved
+        print(f"🔄 Resuming ListRecords harvest at record {state['records']} (token {state['token']})")
+    else:  # fresh (or incremental) harvest: append after the records already in the output
+        offset = os.path.getsize(output_file) if os.path.exists(output_file) else 0
+        state = {"query": query, "token": None, "done": False, "offset": offset, "records": 0, "deleted": 0}
+        save_state()  # a crash in the first page then resumes (and truncates) at this offset
+        if offset:
+            print(f"🔄 Appending to {output_file} ({offset} bytes)")
+
+    session = requests.Session()
+    with open(output_file, "a", encoding="utf-8") as f_out, \
+         tqdm(initial=state["records"], desc="Harvesting (ListRecords)", unit="record") as pbar:
+        if resume:
+            f_out.truncate(state["offset"])  # drop records written after the last checkpoint
+        f_out.seek(state["offset"])
+        try:
+            while True:
+                params = {"verb": "ListRecords"}
+                params.update({"resumptionToken": state["token"]} if state["token"] else query)
+                token = None
+                with list_records_page(session, base_url, params, max_retries, backoff) as response:
+                    for kind, value, record in iter_oai_response(response.raw, fields):
+                        if kind == "record":
+                            f_out.write(dumps(record) + "\n")
+                            state["records"] += 1
+                            pbar.update(1)
+                        elif kind == "deleted":
+                            state["deleted"] += 1
+                        elif kind == "token":
+                            token = value
+                        elif kind == "error" and value != "noRecordsMatch":
+                            raise RuntimeError(f"OAI-PMH error {value}: {record}")
+                f_out.flush()
+
+                state["token"] = token
+                state["done"] = not token
+                state["offset"] = f_out.tell()
+                save_state()
+                if not token:
+                    break
+        except KeyboardInterrupt:
+            print("\n⏹ Interrupted by user. Progress saved.")
+            return
+
+    print(f"\n✅ Done. {state['records']} records saved to {output_file} ({state['deleted']} deleted records skipped)")
+
+
 if __name__ == "__main__":
-    harvest_zbmath_by_id_list()
+    parser = argparse.ArgumentParser(description="Harvest zbMATH Open records by ID via OAI-PMH GetRecord")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="concurrent, rate-limited harvesting (asyncio + aiohttp)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE_LIMIT, help="max requests per second")
+    parser.add_argument("--url-template", default=BASE_URL_TEMPLATE,
+                        help="GetRecord URL with an {id} placeholder (e.g. a local mock OAI server)")
+    parser.add_argument("--repair-checkpoint", action="store_true",
+                        help=f"rebuild {OUTPUT_FILE}{CHECKPOINT_SUFFIX} from {OUTPUT_FILE} and exit")
+    parser.add_argument("--list-records", action="store_true",
+                        help=f"bulk harvest with ListRecords/resumptionTokens into {LIST_OUTPUT_FILE} (flat JSONL)")
+    parser.add_argument("--set", dest="set_spec", help="ListRecords: OAI set")
+    parser.add_argument("--from", dest="from_date", help="ListRecords: from date (e.g. 2025-08-01)")
+    parser.add_argument("--until", dest="until_date", help="ListRecords: until date")
+    parser.add_argument("--base-url", default=OAI_BASE_URL, help="ListRecords: OAI-PMH base URL (e.g. a local stand-in server)")
+    parser.add_argument("--output", default=LIST_OUTPUT_FILE, help="ListRecords: output JSONL")
+    parser.add_argument("--all-fields", action="store_true",
+                        help="ListRecords: keep every metadata element, not only those used by create-rdf.py")
+    parser.add_argument("--flat", action="store_true",
+                        help="GetRecord: write flat create-rdf.py records (streaming parser) instead of the raw OAI record")
+    args = parser.parse_args()
+
+    if args.list_records:
+        harvest_list_records(args.output, args.set_spec, args.from_date, args.until_date, args.base_url,
+                             None if args.all_fields else frozenset(RECORD_FIELDS))
+    elif args.repair_checkpoint:
+        ids = rebuild_checkpoint(OUTPUT_FILE)
+        print(f"✅ Checkpoint {checkpoint_path(OUTPUT_FILE)} rebuilt: {len(ids)} IDs")
+    elif args.use_async:
+        harvest_zbmath_by_id_list_async(url_template=args.url_template,
+                                        concurrency=args.concurrency, rate=args.rate, flat=args.flat)
+    else:
+        harvest_zbmath_by_id_list(flat=args.flat)
@@ -1,5 +1,10 @@
-import json
+from jsonl_io import loads, dumps, DecodeError, RECORD_FIELDS, list_jsonl, plan_shards, iter_shard_lines
 import sys
+import os
+import time
+import hashlib
+import argparse
+from multiprocessing import Pool
 
 file1 = "subset-200.jsonl"
 fileclean = "out-8_cleaned.jsonl"
@@ -9,8 +14,8 @@ def check_for_error(file_path):
     with open(file_path) as f:
         for i, line in enumerate(f, 1):
             try:
-                obj = json.loads(line)
-            except json.JSONDecodeError as e:
+                obj = loads(line)
+            except DecodeError as e:
                 print(f"JSON error on line {i}: {e}")
                 print(line)
                 break
@@ -19,7 +24,7 @@ def check_for_error(file_path):
         print (f"# P.S. Delete the original file and rename the cleaned file to original name after fixing!")
 
 # check_for_error(file1)
-check_for_error(fileclean)
+# check_for_error(fileclean)
 
 def check_and_resave(input_file):
     fname = input_file.split("/")[-1].split(".")[0]
@@ -35,9 +40,9 @@ def check_and_resave(input_file):
 
         for line_number, line in enumerate(infile, 1):
             try:
-                json.loads(line)  # Try parsing to check validity
+                loads(line)  # Try parsing to check validity
                 outfile.write(line)  # If valid, write to output
-            except json.JSONDecodeError as e:
+            except DecodeError as e:
                 print(f"[ERROR] Line {line_number}: {e}")
                 errfile.write(f"Line {line_number}: {e}\n{line}\n")
 
@@ -60,18 +65,18 @@ def add_corrected_lines(file_path):
                 continue  # Skip empty lines
             try:
                 # Validate the line is valid JSON
-                json.loads(line)
+                loads(line)
                 # Append to cleaned file
                 outfile.write(line + '\n')
                 print(f"[APPENDED] Line {line_number}")
-            except json.JSONDecodeError as e:
+            except DecodeError as e:
                 print(f"[SKIPPED] Line {line_number}: Invalid JSON → {e}")
 
 # add_corrected_lines(file8)
 
 def load_jsonl(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
-        return [json.loads(line) for line in f]
+        return [loads(line) for line in f]
 
 def find_duplicates(file1, file2):
     print(f"## find_duplicates: {file1} {file2}...")
@@ -79,11 +84,11 @@ def find_duplicates(file1, file2):
     data2 = load_jsonl(file2)
 
     # Convert each JSON object to a string representation for hashing/comparison
-    set1 = set(json.dumps(obj, sort_keys=True) for obj in data1)
-    set2 = set(json.dumps(obj, sort_keys=True) for obj in data2)
+    set1 = set(dumps(obj, sort_keys=True) for obj in data1)
+    set2 = set(dumps(obj, sort_keys=True) for obj in data2)
 
     duplicates = set1 & set2  # Intersection of both sets
-    return [json.loads(line) for line in duplicates]
+    return [loads(line) for line in duplicates]
 
 
 # duplicates = find_duplicates(file5, filex)
@@ -100,9 +105,9 @@ def fix_last_line(file_path):
     with open(file_path, 'r', encoding='utf-8') as f:
         for i, line in enumerate(f, 1):
             try:
-                obj = json.loads(line)
-                fixed_lines.append(json.dumps(obj))
-            except json.JSONDecodeError as e:
+                obj = loads(line)
+                fixed_lines.append(dumps(obj))
+            except DecodeError as e:
                 print(f"❌ JSON error on line {i}: {e}")
                 marker = "licenses.' "
                 idx = line.find(marker)
@@ -110,10 +115,10 @@ def fix_last_line(file_path):
                     # Replace from marker to end of line
                     fixed_line = line[:idx] + "licenses.' \"]}\n"
                     try:
-                        obj = json.loads(fixed_line)
+                        obj = loads(fixed_line)
                         print(f"✅ Fixed line {i} by replacing from '{marker}' to end")
-                        fixed_lines.append(json.dumps(obj))
-                    except json.JSONDecodeError as e2:
+                        fixed_lines.append(dumps(obj))
+                    except DecodeError as e2:
                         print(f"⚠️ Failed to fix line {i} after replacement: {e2}")
                         # If unfixable, you can choose to skip or append original broken line
                         # fixed_lines.append(line.strip())
@@ -130,3 +135,163 @@ def fix_last_line(file_path):
     print(f"✅ Finished. Original file overwritten: {file_path}")
 
 # fix_last_line(file5)
+
+
+# ==== SINGLE-PASS STREAMING VALIDATION ====
+# python input-validation-check.py out/ --output-dir cleaned --workers 8
+
+LICENSE_MARKER = "licenses.' "
+ERROR_SUFFIX = "_error_lines.txt"
+SHARD_SIZE = 64 << 20  # bytes of a file parsed per task
+
+def repair_truncated_licenses(line):
+    """Records cut off inside the rights text: close the string/list/object after the marker"""
+    idx = line.find(LICENSE_MARKER)
+    if idx == -1:
+        return None
+    return line[:idx] + "licenses.' \"]}\n"
+
+REPAIR_RULES = [repair_truncated_licenses]  # tried in order on lines that are not valid JSON
+
+def check_schema(obj):
+    """Return a schema error message, or None for a valid zbMATH record"""
+    if not isinstance(obj, dict):
+        return "record is not a JSON object"
+    doc_id = obj.get("document_id")
+    if not (isinstance(doc_id, list) and doc_id and isinstance(doc_id[0], str) and doc_id[0]):
+        return "missing document_id"
+    for field in RECORD_FIELDS:
+        values = obj.get(field)
+        if values is None or (field == "link" and isinstance(values, str)):
+            continue
+        if not isinstance(values, list) or not all(v is None or isinstance(v, str) for v in values):
+            return f"field {field} is not a list of strings"
+    return None
+
+def doc_key(doc_id):
+    """64-bit key of a document_id, stable across processes (for the duplicate index)"""
+    return int.from_bytes(hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+def validate_line(line):
+    """(record, line, repaired, error) of one line: the parsed record and its (repaired) text, or an error"""
+    repaired = False
+    try:
+        obj = loads(line)
+    except DecodeError as e:
+        obj, error = None, e
+        for rule in REPAIR_RULES:
+            fixed = rule(line)
+            if fixed is None:
+                continue
+            try:
+                obj, line, repaired = loads(fixed), fixed, True
+                break
+            except DecodeError:
+                continue
+        if obj is None:
+            return None, line, False, error
+    error = check_schema(obj)
+    return (None, line, False, error) if error else (obj, line, repaired, None)
+
+def validate_shard(task):
+    """Worker: parse and check the lines of a byte range of a JSONL file. Returns the number of lines and
+    bytes, the valid (and repaired) lines with their document_id keys and the broken lines (local line
+    numbers); the parent decides on duplicates and writes them in file order."""
+    path, start, end = task
+    lines = bytes_read = 0
+    valid, errors = [], []
+    for raw in iter_shard_lines(path, start, end):
+        lines += 1
+        bytes_read += len(raw)
+        try:
+            line = raw.decode("utf-8")
+        except UnicodeDecodeError as e:  # reported, never rewritten into a valid record
+            obj, line, repaired, error = None, raw.decode("utf-8", "backslashreplace"), False, f"encoding error: {e}"
+        else:
+            if not line.strip():
+                continue
+            obj, line, repaired, error = validate_line(line)
+        if not line.endswith("\n"):
+            line += "\n"
+        if error:
+            errors.append((lines, error, line))
+        else:
+            valid.append((doc_key(obj["document_id"][0]), line, repaired))
+    return path, lines, bytes_read, valid, errors
+
+def validate_all(input_path, output_dir, workers=None, shard_size=SHARD_SIZE):
+    """Validate, repair and deduplicate a JSONL file or a directory (e.g. out/) with one pass per file:
+    byte ranges of the files are parsed in parallel, and their lines are written in file/line order,
+    dropping duplicates (same document_id) across all files before they are written, keeping the
+    first occurrence. The duplicate index holds the 64-bit keys of the kept records."""
+    files = list_jsonl(input_path)
+    for f in files:  # the cleaned file has the name of its input: it would be truncated while being read
+        if os.path.realpath(os.path.join(output_dir, os.path.basename(f))) == os.path.realpath(f):
+            raise SystemExit(f"❌ --output-dir {output_dir} holds the input {f}; choose another directory")
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.time()
+    results = {f: {"file": f, "bytes": 0, "lines": 0, "valid": 0, "repaired": 0, "errors": 0, "duplicates": 0}
+               for f in files}
+    seen = set()
+    outfile = errfile = None
+    current = None
+    try:
+        with Pool(workers) as pool:
+            # ordered results: every file is written front to back, the files in list order
+            for path, lines, bytes_read, valid, errors in pool.imap(validate_shard, plan_shards(files, shard_size)):
+                stats = results[path]
+                if path != current:
+                    for f in (outfile, errfile):
+                        if f:
+                            f.close()
+                    fname = os.path.basename(path).rsplit(".", 1)[0]
+                    outfile = open(os.path.join(output_dir, fname + ".jsonl"), "w", encoding="utf-8")
+                    # not .jsonl: never read back as input
+                    errfile = open(os.path.join(output_dir, fname + ERROR_SUFFIX), "w", encoding="utf-8")
+                    current = path
+                for line_number, error, line in errors:
+                    errfile.write(f"Line {stats['lines'] + line_number}: {error}\n{line}\n")
+                for key, line, repaired in valid:
+                    if key in seen:
+                        stats["duplicates"] += 1
+                        continue
+                    seen.add(key)
+                    outfile.write(line)
+                    stats["repaired"] += repaired
+                stats["lines"] += lines
+                stats["bytes"] += bytes_read
+                stats["valid"] += len(valid)
+                stats["errors"] += len(errors)
+    finally:
+        for f in (outfile, errfile):
+            if f:
+                f.close()
+    for path in files:  # empty inputs have no byte ranges
+        fname = os.path.basename(path).rsplit(".", 1)[0]
+        for name in (fname + ".jsonl", fname + ERROR_SUFFIX):
+            if not os.path.exists(os.path.join(output_dir, name)):
+                open(os.path.join(output_dir, name), "w").close()
+    elapsed = time.time() - start
+
+    total = {k: sum(stats[k] for stats in results.values())
+             for k in ("bytes", "lines", "valid", "repaired", "errors", "duplicates")}
+    for stats in results.values():
+        print(f"{stats['file']}: {stats['lines']} lines, {stats['valid'] - stats['duplicates']} kept, "
+              f"{stats['repaired']} repaired, {stats['errors']} errors, {stats['duplicates']} duplicates")
+    print(f"✅ {len(files)} files, {total['lines']} lines in {elapsed:.1f}s "
+          f"({total['lines'] / max(elapsed, 1e-9):,.0f} lines/s, {total['bytes'] / max(elapsed, 1e-9) / 2**20:,.1f} MB/s): "
+          f"{total['valid'] - total['duplicates']} kept, {total['repaired']} repaired, "
+          f"{total['errors']} errors, {total['duplicates']} duplicates -> {output_dir}/")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate, repair and deduplicate zbMATH JSONL in one streaming pass")
+    parser.add_argument("input", help="JSONL file or directory of JSONL files (e.g. out/)")
+    parser.add_argument("--output-dir", default="cleaned",
+                        help=f"cleaned files (same names) and <name>{ERROR_SUFFIX} go here (not the input directory)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel parsing processes (default: all cores)")
+    parser.add_argument("--shard-size", type=float, default=SHARD_SIZE / 2**20,
+                        help=f"MB of a file parsed per task (default: {SHARD_SIZE >> 20})")
+    args = parser.parse_args()
+    validate_all(args.input, args.output_dir, args.workers, int(args.shard_size * (1 << 20)))
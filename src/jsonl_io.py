@@ -0,0 +1,141 @@
+#shared JSONL I/O helpers: fast JSON codec, typed zbMATH records, file listing and byte-range sharding
+import os
+import json
+from typing import Optional, Union
+
+# ==== JSON CODEC ====
+# orjson or msgspec when installed, stdlib json otherwise; ZBMATH_JSON=json|orjson|msgspec forces one
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+CODEC = os.environ.get("ZBMATH_JSON") or ("orjson" if orjson else "msgspec" if msgspec else "json")
+
+if CODEC == "orjson":
+    DecodeError = orjson.JSONDecodeError
+    loads = orjson.loads
+
+    def dumps(obj, sort_keys=False):
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0).decode("utf-8")
+elif CODEC == "msgspec":
+    DecodeError = msgspec.DecodeError
+    loads = msgspec.json.decode
+    _encoder = msgspec.json.Encoder()
+    _sorted_encoder = msgspec.json.Encoder(order="sorted")
+
+    def dumps(obj, sort_keys=False):
+        return (_sorted_encoder if sort_keys else _encoder).encode(obj).decode("utf-8")
+elif CODEC == "json":
+    DecodeError = json.JSONDecodeError
+    loads = json.loads
+
+    def dumps(obj, sort_keys=False):
+        return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys)
+else:
+    raise ValueError(f"Unknown ZBMATH_JSON codec: {CODEC}")
+
+# ==== zbMATH RECORDS ====
+# fields of the flat harvested JSONL ({element: [values]}) that create-rdf.py reads
+RECORD_FIELDS = (
+    "document_id", "document_title", "document_type", "author", "author_id", "classification", "keyword",
+    "language", "publication_year", "pagination", "zbl_id", "doi", "link", "ref_id", "time",
+    "review_text", "review_sign", "review_type", "review_language", "reviewer_id",
+    "serial_title", "serial_publisher", "software_name", "swmath_id",
+)
+
+if msgspec and CODEC != "json":
+    Values = Union[list[Optional[str]], str, None]
+
+    class Record(msgspec.Struct):
+        """Typed zbMATH JSONL record: only RECORD_FIELDS are decoded, everything else is skipped.
+        get() mirrors dict.get() so converters work on records and plain dicts alike."""
+        document_id: Values = None
+        document_title: Values = None
+        document_type: Values = None
+        author: Values = None
+        author_id: Values = None
+        classification: Values = None
+        keyword: Values = None
+        language: Values = None
+        publication_year: Values = None
+        pagination: Values = None
+        zbl_id: Values = None
+        doi: Values = None
+        link: Values = None
+        ref_id: Values = None
+        time: Values = None
+        review_text: Values = None
+        review_sign: Values = None
+        review_type: Values = None
+        review_language: Values = None
+        reviewer_id: Values = None
+        serial_title: Values = None
+        serial_publisher: Values = None
+        software_name: Values = None
+        swmath_id: Values = None
+
+        def get(self, key, default=None):
+            value = getattr(self, key, None)
+            return default if value is None else value
+
+    _record_decoder = msgspec.json.Decoder(Record)
+
+    def decode_record(line):
+        """Decode one JSONL line into a Record (falls back to a dict on unexpected value types).
+        Malformed lines raise the codec's DecodeError, like loads()."""
+        try:
+            return _record_decoder.decode(line)
+        except msgspec.DecodeError:  # ValidationError included
+            return loads(line)
+else:
+    Record = dict
+    decode_record = loads
+
+
+def list_jsonl(path):
+    """Return the JSONL files of an input path (a single file or a directory like out/)"""
+    if os.path.isdir(path):
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".jsonl"))
+    return [path]
+
+def plan_shards(paths, shard_size):
+    """Split files into (path, start, end) byte ranges of about shard_size bytes"""
+    shards = []
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, size, shard_size):
+            shards.append((path, start, min(start + shard_size, size)))
+    return shards
+
+def iter_shard_lines(path, start, end):
+    """Yield the raw lines (bytes) that *start* inside [start, end).
+    A line straddling a boundary belongs to the shard in which it starts."""
+    with open(path, "rb") as f:
+        if start:
+            f.seek(start - 1)
+            f.readline()  # skip the tail of the previous shard's last line
+        pos = f.tell()
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+            yield line
+
+def iter_offset_lines(path):
+    """Yield (byte offset, raw line) for every line of a file"""
+    with open(path, "rb") as f:
+        offset = 0
+        for line in f:
+            yield offset, line
+            offset += len(line)
+
+def read_line_at(f, offset):
+    """Read the line starting at a byte offset of an open binary file"""
+    f.seek(offset)
+    return f.readline()
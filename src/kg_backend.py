@@ -0,0 +1,261 @@
+#pluggable SPARQL backend: HTTP endpoint (Virtuoso, Fuseki, ...) or a local store loaded from the generated dumps
+# python kg_backend.py load kg-store data/subset-200.ttl          (persistent Oxigraph store, bulk load)
+# ZBMATH_SPARQL=kg-store python retrieval-tasks/revival-retrieval.py
+# ZBMATH_SPARQL=data/subset-200.ttl python stats.py             (in-memory store from a dump)
+import io
+import os
+import time
+import gzip
+import argparse
+from sparql_client import get_client
+from query_cache import get_cache
+try:
+    import pyoxigraph
+except ImportError:
+    pyoxigraph = None
+
+DEFAULT_ENDPOINT = "http://localhost:8890/sparql"  # Virtuoso
+ZBMATH_GRAPH = "https://zbmath.org"  # dumps are loaded into this named graph, as on the endpoint
+DUMP_FORMATS = {".ttl": "turtle", ".nt": "nt", ".nq": "nquads"}
+
+
+def dump_format(path):
+    """(rdf format, compression) of a dump file: all.ttl, all-00000.nt.gz, all-00000.nt.zst, ..."""
+    stem, ext = os.path.splitext(path)
+    compression = None
+    if ext in (".gz", ".zst"):
+        compression = ext
+        stem, ext = os.path.splitext(stem)
+    if ext not in DUMP_FORMATS:
+        raise ValueError(f"Unknown dump format: {path}")
+    return DUMP_FORMATS[ext], compression
+
+def open_dump(path):
+    """Binary stream of a (possibly gzip/zstd compressed) dump file"""
+    _, compression = dump_format(path)
+    if compression == ".gz":
+        return gzip.open(path, "rb")
+    if compression == ".zst":
+        import zstandard
+        # buffered, so the stream can be read line by line like the other dumps
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+    return open(path, "rb")
+
+def is_dump(target):
+    try:
+        dump_format(target)
+        return os.path.isfile(target)
+    except ValueError:
+        return False
+
+
+# ==== BACKENDS ====
+# query() returns the SPARQL 1.1 JSON results document ({"head": ..., "results": {"bindings": [...]}}
+# or {"head": {}, "boolean": ...}), rows() iterates over the bindings without materializing them,
+# select() returns them as a list. Results are cached on disk per dataset version (query_cache.py);
+# use_cache=False bypasses the cache for one call, ZBMATH_CACHE=off for the whole run.
+
+class HttpBackend:
+    """Remote SPARQL endpoint, through the shared pooled client of sparql_client.py"""
+
+    def __init__(self, endpoint, **options):
+        self.endpoint = endpoint
+        self.client = get_client(endpoint, **options)
+
+    def query(self, query, use_cache=True):
+        return self.client.query(query, use_cache=use_cache)
+
+    def rows(self, query, fmt="json", use_cache=True):
+        return self.client.rows(query, fmt, use_cache=use_cache)
+
+    def select(self, query, use_cache=True):
+        return list(self.rows(query, use_cache=use_cache))
+
+
+class LocalBackend:
+    """Result caching shared by the local backends, which implement _query() and _select().
+    Stores without a version (a persistent store without its .version file) are not cached."""
+    cache = None
+    source = ""
+    version = None
+
+    def _key(self, use_cache, kind, query):
+        if self.cache is None or not use_cache or not self.version:
+            return None
+        return self.cache.key(query, self.version, f"{self.source}|{kind}")
+
+    def query(self, query, use_cache=True):
+        key = self._key(use_cache, "query", query)
+        if key:
+            return self.cache.document(key, self.version, lambda: self._query(query))
+        return self._query(query)
+
+    def rows(self, query, fmt="json", use_cache=True):
+        key = self._key(use_cache, "rows", query)
+        if key:
+            return self.cache.rows(key, self.version, lambda: self._select(query))
+        return self._select(query)
+
+    def select(self, query, use_cache=True):
+        return list(self.rows(query, use_cache=use_cache))
+
+def dump_version(paths):
+    """Version of an in-memory store: the loaded files with their sizes and modification times"""
+    parts = []
+    for path in paths:
+        stat = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{stat.st_size}:{int(stat.st_mtime)}")
+    return ";".join(parts)
+
+
+def _oxigraph_binding(term):
+    if isinstance(term, pyoxigraph.NamedNode):
+        return {"type": "uri", "value": term.value}
+    if isinstance(term, pyoxigraph.BlankNode):
+        return {"type": "bnode", "value": term.value}
+    binding = {"type": "literal", "value": term.value}
+    if term.language:
+        binding["xml:lang"] = term.language
+    elif term.datatype.value != "http://www.w3.org/2001/XMLSchema#string":
+        binding["datatype"] = term.datatype.value
+    return binding
+
+class OxigraphBackend(LocalBackend):
+    """Embedded Oxigraph store: persistent when path is a store directory, in memory otherwise.
+    Queries without FROM see the union of all graphs (like Virtuoso), FROM <https://zbmath.org> the KG graph.
+    load() records the version of a persistent store in <store>.version, next to the directory."""
+
+    def __init__(self, path=None, cache=True):
+        self.path = path
+        self.store = pyoxigraph.Store(path) if path else pyoxigraph.Store()
+        self.cache = get_cache() if cache is True else (cache or None)
+        if path:
+            self.source = os.path.abspath(path)
+            if os.path.isfile(self.version_file()):
+                with open(self.version_file(), "r", encoding="utf-8") as f:
+                    self.version = f.read().strip() or self.version
+
+    def version_file(self):
+        return os.path.abspath(self.path).rstrip(os.sep) + ".version"
+
+    def load(self, paths, graph=ZBMATH_GRAPH):
+        """Bulk-load dump files (ttl/nt/nq, optionally .gz/.zst) into the store"""
+        formats = {"turtle": pyoxigraph.RdfFormat.TURTLE, "nt": pyoxigraph.RdfFormat.N_TRIPLES,
+                   "nquads": pyoxigraph.RdfFormat.N_QUADS}
+        for path in paths:
+            fmt, _ = dump_format(path)
+            to_graph = None if fmt == "nquads" else pyoxigraph.NamedNode(graph)
+            with open_dump(path) as f:
+                self.store.bulk_load(f, format=formats[fmt], to_graph=to_graph)
+        self.store.flush()
+        if self.path:
+            self.version = f"{time.time():.6f}"  # new content: earlier cached results no longer apply
+            with open(self.version_file(), "w", encoding="utf-8") as f:
+                f.write(self.version + "\n")
+        else:
+            self.source = self.version = dump_version(paths)
+        return len(self.store)
+
+    def _solutions(self, query):
+        results = self.store.query(query, use_default_graph_as_union=True)
+        if not isinstance(results, (pyoxigraph.QuerySolutions, pyoxigraph.QueryBoolean)):
+            raise ValueError("Only SELECT and ASK queries are supported by the local store")
+        return results
+
+    def _rows(self, results):
+        variables = [v.value for v in results.variables]
+        for solution in results:
+            row = {}
+            for var in variables:
+                term = solution[var]
+                if term is not None:
+                    row[var] = _oxigraph_binding(term)
+            yield row
+
+    def _query(self, query):
+        results = self._solutions(query)
+        if isinstance(results, pyoxigraph.QueryBoolean):
+            return {"head": {}, "boolean": bool(results)}
+        return {"head": {"vars": [v.value for v in results.variables]},
+                "results": {"bindings": list(self._rows(results))}}
+
+    def _select(self, query):
+        return self._rows(self._solutions(query))
+
+
+class RdflibBackend(LocalBackend):
+    """In-memory rdflib Dataset loaded from dumps (fallback when pyoxigraph is not installed)"""
+
+    def __init__(self, cache=True):
+        from rdflib import Dataset
+        self.dataset = Dataset(default_union=True)
+        self.cache = get_cache() if cache is True else (cache or None)
+
+    def load(self, paths, graph=ZBMATH_GRAPH):
+        from rdflib import URIRef
+        for path in paths:
+            fmt, _ = dump_format(path)
+            with open_dump(path) as f:
+                if fmt == "nquads":
+                    self.dataset.parse(f, format=fmt)
+                else:
+                    self.dataset.graph(URIRef(graph)).parse(f, format=fmt)
+        self.source = self.version = dump_version(paths)
+        return len(self.dataset)
+
+    def _query(self, query):
+        results = self.dataset.query(query)
+        if results.type == "ASK":
+            return {"head": {}, "boolean": bool(results.askAnswer)}
+        if results.type != "SELECT":
+            raise ValueError("Only SELECT and ASK queries are supported by the local store")
+        from jsonl_io import loads
+        return loads(results.serialize(format="json"))
+
+    def _select(self, query):
+        return iter(self._query(query)["results"]["bindings"])
+
+
+def open_backend(target=None, use_env=True, cache=True, **options):
+    """Backend for target; the ZBMATH_SPARQL environment variable overrides it (unless use_env=False).
+
+    http(s)://... -> HTTP endpoint; a dump file (ttl/nt/nq, .gz/.zst) -> in-memory store loaded from it;
+    anything else -> persistent Oxigraph store directory (see `python kg_backend.py load`).
+    cache=False disables the result cache; options (timeout, retries, version, ...) configure the HTTP client."""
+    target = (use_env and os.environ.get("ZBMATH_SPARQL")) or target or DEFAULT_ENDPOINT
+    if target.startswith(("http://", "https://")):
+        return HttpBackend(target, cache=cache, **options)
+    if is_dump(target):
+        backend = OxigraphBackend(cache=cache) if pyoxigraph else RdflibBackend(cache=cache)
+        backend.load([target])
+        return backend
+    if pyoxigraph is None:
+        raise ImportError("A persistent local store requires pyoxigraph (or pass a dump file / an endpoint URL)")
+    if not os.path.isdir(target):
+        raise FileNotFoundError(f"No SPARQL endpoint, dump or store at {target}")
+    return OxigraphBackend(target, cache=cache)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load dumps into a local store, or query a backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="bulk-load dump files into a persistent Oxigraph store")
+    load.add_argument("store", help="store directory (created if missing)")
+    load.add_argument("dumps", nargs="+", help="ttl/nt/nq files, optionally .gz/.zst (e.g. create-rdf.py --compress chunks)")
+    query = commands.add_parser("query", help="run a SELECT/ASK query and print the JSON results")
+    query.add_argument("target", help="endpoint URL, store directory or dump file")
+    query.add_argument("query", help="SPARQL query text, or @file.sparql")
+    query.add_argument("--no-cache", action="store_true", help="bypass the result cache")
+    args = parser.parse_args()
+
+    if args.command == "load":
+        if pyoxigraph is None:
+            parser.error("load requires pyoxigraph")
+        print(f"✅ {args.store}: {OxigraphBackend(args.store).load(args.dumps)} quads")
+    else:
+        from jsonl_io import dumps
+        text = args.query
+        if text.startswith("@"):
+            with open(text[1:], "r", encoding="utf-8") as f:
+                text = f.read()
+        print(dumps(open_backend(args.target, use_env=False, cache=not args.no_cache).query(text)))
@@ -0,0 +1,348 @@
+#shared input layer of the local KG indexes: per-document fields from the JSONL or the N-Triples dumps, document id <-> int mapping
+import os
+import re
+import json
+import time
+from array import array
+import numpy as np
+from tqdm import tqdm
+from jsonl_io import list_jsonl, decode_record, DecodeError
+from rdf_terms import make_id
+from kg_backend import dump_format, open_dump
+from rdf_stats import split_ntriple
+
+ZBMATH_BASE = "https://zbmath.org/"
+RECORD_PREFIX = b"<https://zbmath.org/"
+KEYWORD_BASE = "https://zbmath.org/keyword/"  # as in create-rdf.py
+MSC_BASE = "http://msc2010.org/resources/MSC/2010/"
+DOCTYPE_BASE = "https://zbmath.org/doctype/"
+DOCTYPE_CODES = {"journal-article": "j", "collection-article": "a", "book-series": "b", "preprints": "p"}  # create-rdf.py DOC_TYPE_URI_MAP
+
+
+# ==== DOCUMENT IDS ====
+def doc_number(value):
+    """zbMATH document id as an int, from 592551, "592551", "https://zbmath.org/592551" or its N-Triples form;
+    None for anything else"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    value = value.strip().strip("<>")
+    if value.startswith(ZBMATH_BASE):
+        value = value[len(ZBMATH_BASE):]
+    return int(value) if value.isdigit() else None
+
+class DocIds:
+    """Sorted array of document numbers: the int id of a document is its position"""
+
+    def __init__(self, numbers):
+        self.numbers = numbers
+
+    @classmethod
+    def build(cls, numbers):
+        return cls(np.unique(np.asarray(numbers, dtype=np.int64)))
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path, mmap_mode="r"))
+
+    def save(self, path):
+        np.save(path, np.asarray(self.numbers))
+
+    def ids(self, docs):
+        """Int ids of document numbers/URIs (array), -1 where unknown"""
+        if not isinstance(docs, np.ndarray):
+            docs = [doc_number(d) for d in docs]
+            docs = [-1 if d is None else d for d in docs]
+        docs = np.asarray(docs, dtype=np.int64)
+        if not len(self.numbers):
+            return np.full(len(docs), -1, dtype=np.int64)
+        pos = np.searchsorted(self.numbers, docs)
+        pos = np.minimum(pos, len(self.numbers) - 1)
+        return np.where(self.numbers[pos] == docs, pos, -1)
+
+    def id(self, doc):
+        return int(self.ids([doc])[0])
+
+    def docs(self, ids):
+        return np.asarray(self.numbers[np.asarray(ids, dtype=np.int64)])
+
+    def __len__(self):
+        return len(self.numbers)
+
+
+# ==== CSR HELPERS ====
+def build_csr(rows, cols, n_rows, dtype=np.int32):
+    """(indptr, indices) of the distinct (row, col) pairs, columns sorted within each row"""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    order = np.lexsort((cols, rows))
+    rows, cols = rows[order], cols[order]
+    if len(rows):
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])
+        rows, cols = rows[keep], cols[keep]
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+    return indptr, cols.astype(dtype)
+
+def gather_rows(indptr, indices, rows):
+    """Concatenated column lists of many rows (vectorized slicing)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = np.asarray(indptr[rows])
+    lengths = np.asarray(indptr[rows + 1]) - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=indices.dtype)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.asarray(indices[np.arange(total) + offsets])
+
+def contains_pairs(indptr, indices, rows, cols):
+    """For every (row, col) pair, whether col is in the sorted column list of row (vectorized bisection)"""
+    rows = np.asarray(rows, dtype=np.int64)
+    cols = np.asarray(cols, dtype=np.int64)
+    lo = np.array(indptr[rows], dtype=np.int64)
+    hi = np.array(indptr[rows + 1], dtype=np.int64)
+    end = hi.copy()
+    active = np.flatnonzero(lo < hi)
+    while len(active):
+        mid = (lo[active] + hi[active]) // 2
+        below = indices[mid] < cols[active]
+        lo[active[below]] = mid[below] + 1
+        hi[active[~below]] = mid[~below]
+        active = active[lo[active] < hi[active]]
+    found = lo < end
+    found[found] = indices[lo[found]] == cols[found]
+    return found
+
+def encode_deltas(indptr, indices):
+    """Delta + varint (LEB128) encoding of the sorted rows of a CSR matrix, vectorized.
+    Returns (byte offset of every row, n_rows + 1 of them; the encoded bytes)."""
+    indices = np.asarray(indices, dtype=np.int64)
+    indptr = np.asarray(indptr, dtype=np.int64)
+    deltas = indices.copy()
+    if len(deltas):
+        deltas[1:] -= indices[:-1]
+        starts = indptr[:-1][np.diff(indptr) > 0]
+        deltas[starts] = indices[starts]  # each row starts from 0
+    _, bits = np.frexp(deltas.astype(np.float64))  # bit length (ids < 2^53)
+    lengths = np.maximum(1, (bits.astype(np.int64) + 6) // 7)
+    ends = np.cumsum(lengths)
+    value = np.repeat(np.arange(len(deltas)), lengths)
+    shift = 7 * (np.arange(int(ends[-1]) if len(ends) else 0) - np.repeat(ends - lengths, lengths))
+    data = (deltas[value] >> shift) & 0x7F
+    data[shift < 7 * (lengths[value] - 1)] |= 0x80  # continuation bit on all but the last byte
+    offsets = np.concatenate([[0], ends])[indptr]
+    return offsets.astype(np.uint64), data.astype(np.uint8)
+
+def decode_deltas(data):
+    """The sorted ints of one row encoded by encode_deltas (its bytes), vectorized"""
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(0, dtype=np.int64)
+    last = data < 0x80
+    starts = np.flatnonzero(np.concatenate([[True], last[:-1]]))
+    group = np.concatenate([[0], np.cumsum(last[:-1])])
+    shift = 7 * (np.arange(len(data)) - starts[group])
+    return np.cumsum(np.add.reduceat((data & 0x7F).astype(np.int64) << shift, starts))
+
+def decode_rows(offsets, data):
+    """(indptr, indices) of consecutive rows encoded by encode_deltas: their byte offsets (rebased to the
+    first one, n_rows + 1 of them) and bytes, vectorized"""
+    offsets = np.asarray(offsets, dtype=np.int64) - int(offsets[0])
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.zeros(len(offsets), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    last = data < 0x80
+    indptr = np.concatenate([[0], np.cumsum(last)])[offsets]  # values ending before every row
+    deltas = decode_deltas(data)
+    deltas[1:] -= deltas[:-1].copy()
+    lengths = np.diff(indptr)
+    starts = indptr[:-1][lengths > 0]
+    values = np.cumsum(deltas)
+    base = np.zeros(len(lengths), dtype=np.int64)
+    base[lengths > 0] = values[starts] - deltas[starts]  # the running sum of the rows before
+    return indptr, values - np.repeat(base, lengths)
+
+
+# ==== INPUT FIELDS ====
+# (field, document number, value) triples from either source; the JSONL and the dump give the same values
+SKIP = object()  # dump parsers return it for objects without a value of the field
+
+def _valid(values):
+    return [value for value in values if value is not None]
+
+def _year(value):
+    value = value.strip()
+    return int(value) if value.isdigit() else None
+
+def _keywords(data):
+    keywords = (KEYWORD_BASE + make_id(kw) for kw in data.get("keyword") or [] if kw)
+    return [kw for kw in keywords if kw != KEYWORD_BASE]
+
+def _doctype(data):
+    code = (data.get("document_type") or [None])[0]
+    if not code or code == "None":
+        return []
+    return [code.strip().lower() if code.strip().lower() in DOCTYPE_CODES.values() else code]
+
+def _text(data, key):
+    value = (data.get(key) or [None])[0]
+    return [value] if value and value != "None" else []
+
+JSONL_FIELDS = {  # field -> record -> values
+    "document": lambda data: [None],
+    "cites": lambda data: _valid(doc_number(ref) for ref in data.get("ref_id") or [] if ref),
+    "keyword": _keywords,  # keyword URIs
+    "msc": lambda data: [code.strip().replace(" ", "") for code in data.get("classification") or [] if code],
+    "year": lambda data: _valid(_year(year) for year in (data.get("publication_year") or [None])[:1]
+                                if year and year != "None"),
+    "doctype": _doctype,  # document type code (j, a, b, p)
+    "title": lambda data: _text(data, "document_title"),
+    "review": lambda data: _text(data, "review_text"),  # review body
+}
+
+CITO_CITES = b"<http://purl.org/spar/cito/cites>"
+RDF_TYPE = b"<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+SCHOLARLY_ARTICLE = b"<https://schema.org/ScholarlyArticle>"
+SCHEMA_KEYWORDS = b"<https://schema.org/keywords>"
+DCT_SUBJECT = b"<http://purl.org/dc/terms/subject>"
+DCT_ISSUED = b"<http://purl.org/dc/terms/issued>"
+DCT_TYPE = b"<http://purl.org/dc/terms/type>"
+DCT_TITLE = b"<http://purl.org/dc/terms/title>"
+SCHEMA_REVIEW_BODY = b"<https://schema.org/reviewBody>"
+REVIEW_PREFIX = b"_:review"  # create-rdf.py review nodes, _:review<document id>
+DOCTYPE_PREFIX = b"<" + DOCTYPE_BASE.encode("ascii")
+MSC_PREFIX = b"<" + MSC_BASE.encode("ascii")
+
+def _cited(o):
+    doc = doc_number(o)
+    return SKIP if doc is None else doc
+
+def _msc(o):
+    return o[len(MSC_PREFIX):-1].decode("utf-8") if o.startswith(MSC_PREFIX) else SKIP
+
+def _issued(o):
+    year = _year(o.split(b'"')[1].decode("ascii", "replace")) if o.startswith(b'"') else None
+    return SKIP if year is None else year
+
+def _dct_type(o):
+    if o.startswith(DOCTYPE_PREFIX):
+        return DOCTYPE_CODES.get(o[len(DOCTYPE_PREFIX):-1].decode("utf-8"), SKIP)
+    return o.split(b'"')[1].decode("utf-8") if o.startswith(b'"') else SKIP
+
+_UNESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+_ESCAPE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))")
+
+def _unescape(match):
+    code = match.group(1) or match.group(2)
+    return chr(int(code, 16)) if code else _UNESCAPES.get(match.group(3), match.group(0))
+
+def _literal(o):
+    """Lexical form of an N-Triples literal (language tag and datatype dropped)"""
+    if not o.startswith(b'"'):
+        return SKIP
+    value = o[1:o.rindex(b'"')].decode("utf-8")
+    return _ESCAPE.sub(_unescape, value) if "\\" in value else value
+
+DUMP_FIELDS = {  # predicate -> (field, object -> value or SKIP)
+    CITO_CITES: ("cites", _cited),
+    RDF_TYPE: ("document", lambda o: None if o == SCHOLARLY_ARTICLE else SKIP),
+    SCHEMA_KEYWORDS: ("keyword", lambda o: o[1:-1].decode("utf-8")),
+    DCT_SUBJECT: ("msc", _msc),
+    DCT_ISSUED: ("year", _issued),
+    DCT_TYPE: ("doctype", _dct_type),
+    DCT_TITLE: ("title", _literal),
+    SCHEMA_REVIEW_BODY: ("review", _literal),  # subject: the review node of the document
+}
+
+def input_files(inputs):
+    """JSONL files (files or directories like out/) and dump files of the inputs"""
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    files = []
+    for path in inputs:
+        files.extend(list_jsonl(path) if os.path.isdir(path) else [path])
+    return files
+
+def _jsonl_fields(path, fields):
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                data = decode_record(line)
+            except DecodeError:
+                continue
+            doc = doc_number((data.get("document_id") or [""])[0] or "")
+            if doc is None:
+                continue
+            for field in fields:
+                for value in JSONL_FIELDS[field](data):
+                    yield field, doc, value
+
+def _subject_doc(s):
+    if s.startswith(RECORD_PREFIX):
+        return doc_number(s)
+    if s.startswith(REVIEW_PREFIX) and s[len(REVIEW_PREFIX):].isdigit():
+        return int(s[len(REVIEW_PREFIX):])
+    return None
+
+def _dump_fields(path, fields):
+    quads = dump_format(path)[0] == "nquads"
+    wanted = {p: spec for p, spec in DUMP_FIELDS.items() if spec[0] in fields}
+    with open_dump(path) as f:
+        for line in f:
+            triple = split_ntriple(line, quads)
+            if triple is None:
+                continue
+            s, p, o = triple
+            spec = wanted.get(p)
+            if spec is None:
+                continue
+            doc = _subject_doc(s)
+            value = spec[1](o)
+            if doc is not None and value is not SKIP:
+                yield spec[0], doc, value
+
+def iter_fields(inputs, fields):
+    """Yield (field, document number, value) for the requested fields of every record in the inputs:
+    JSONL files/directories (create-rdf.py input) or N-Triples/N-Quads dumps (.gz/.zst too)"""
+    for path in input_files(inputs):
+        if path.endswith(".jsonl"):
+            yield from _jsonl_fields(path, fields)
+        else:
+            if dump_format(path)[0] == "turtle":
+                raise ValueError(f"Indexes are built from JSONL or N-Triples/N-Quads dumps: {path}")
+            yield from _dump_fields(path, fields)
+
+NUMERIC_FIELDS = {"document", "cites", "year"}  # collected into int64 arrays ("document" has no values)
+
+def collect(inputs, fields, desc="Reading records"):
+    """{field: (document numbers, values)} of the requested fields: int64 arrays, lists for text values"""
+    docs = {field: array("q") for field in fields}
+    values = {field: array("q") if field in NUMERIC_FIELDS else [] for field in fields}
+    for field, doc, value in tqdm(iter_fields(inputs, fields), desc=desc, unit=" values"):
+        docs[field].append(doc)
+        if value is not None:
+            values[field].append(value)
+    return {field: (np.frombuffer(docs[field], dtype=np.int64),
+                    np.frombuffer(values[field], dtype=np.int64) if field in NUMERIC_FIELDS else values[field])
+            for field in fields}
+
+
+# ==== INDEX DIRECTORIES ====
+def write_header(path, fmt, inputs, **counts):
+    header = {"format": fmt, **counts, "source": [os.path.basename(p) for p in input_files(inputs)],
+              "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(os.path.join(path, "header.json"), "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2)
+    return header
+
+def read_header(path, fmt):
+    with open(os.path.join(path, "header.json"), "r", encoding="utf-8") as f:
+        header = json.load(f)
+    if header.get("format") != fmt:
+        raise ValueError(f"{path} is not a {fmt} index (format: {header.get('format')})")
+    return header
+
+def index_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
@@ -0,0 +1,239 @@
+#publication counts by MSC prefix x year x document type, materialized in one pass, with revival detection on top
+# python msc_cube.py build out/ cube                       (JSONL input, or N-Triples dumps)
+# python msc_cube.py query cube 03 60 --step 10             (the counts of revival-retrieval.py)
+# python msc_cube.py revivals cube --top 20                 (all top-level MSC classes)
+import os
+import time
+import argparse
+import numpy as np
+from kg_index import DocIds, build_csr, gather_rows, collect, write_header, read_header, index_size
+
+CUBE_VERSION = "zbmath-msc-cube/2"
+LEVELS = (2, 3, 5)  # MSC prefix widths: top-level class (03), second level (03B), full code (03B30)
+NO_DOCTYPE = "none"
+
+
+# ==== BUILD ====
+def _level_codes(codes, width):
+    return codes if width == LEVELS[-1] else codes.astype(f"U{width}")  # astype truncates
+
+def write_cube(inputs, output_dir):
+    """Count the distinct publications per MSC prefix, year and document type, for every prefix level.
+    A publication counts once per prefix, however many of its codes share it (COUNT(DISTINCT ?pub)).
+    The publications of every full code are kept too, for prefixes between the levels (0, 03B3)."""
+    start = time.time()
+    data = collect(inputs, ["year", "msc", "doctype"], desc="Reading classifications")
+    year_docs, year_values = data["year"]
+    doc_ids = DocIds.build(year_docs)  # publications with a year, as the dct:issued join of the queries
+    years = np.zeros(len(doc_ids), dtype=np.int64)
+    years[doc_ids.ids(year_docs)] = year_values
+    first_year = int(years.min()) if len(years) else 0
+    n_years = int(years.max()) - first_year + 1 if len(years) else 0
+
+    type_docs, type_values = data["doctype"]
+    doctypes = sorted(set(type_values)) + [NO_DOCTYPE]
+    doc_types = np.full(len(doc_ids), len(doctypes) - 1, dtype=np.int64)
+    typed = doc_ids.ids(type_docs)
+    lookup = {doctype: i for i, doctype in enumerate(doctypes)}
+    doc_types[typed[typed >= 0]] = [lookup[value] for value, i in zip(type_values, typed) if i >= 0]
+
+    os.makedirs(output_dir, exist_ok=True)
+    papers = np.zeros((n_years, len(doctypes)), dtype=np.int32)
+    np.add.at(papers, (years - first_year, doc_types), 1)
+    np.save(os.path.join(output_dir, "papers.npy"), papers)
+
+    msc_docs, msc_values = data["msc"]
+    rows = doc_ids.ids(msc_docs)
+    known = rows >= 0
+    rows, codes = rows[known], np.asarray(msc_values, dtype=str)[known]
+    levels = {}
+    for width in LEVELS:
+        labels, cols = np.unique(_level_codes(codes, width), return_inverse=True)
+        pairs = np.unique(rows * max(len(labels), 1) + cols)  # distinct (publication, prefix)
+        pub, col = np.divmod(pairs, max(len(labels), 1))
+        cube = np.zeros((len(labels), n_years, len(doctypes)), dtype=np.int32)
+        np.add.at(cube, (col, years[pub] - first_year, doc_types[pub]), 1)
+        np.save(os.path.join(output_dir, f"msc{width}.npy"), cube)
+        levels[str(width)] = labels.tolist()
+    indptr, pubs = build_csr(col, pub, len(labels))  # full code -> publications
+    np.save(os.path.join(output_dir, "code_indptr.npy"), indptr)
+    np.save(os.path.join(output_dir, "code_pubs.npy"), pubs)
+    np.save(os.path.join(output_dir, "pub_years.npy"), (years - first_year).astype(np.int16))
+    np.save(os.path.join(output_dir, "pub_doctypes.npy"), doc_types.astype(np.int8))
+
+    header = write_header(output_dir, CUBE_VERSION, inputs, publications=len(doc_ids), first_year=first_year,
+                          years=n_years, doctypes=doctypes, levels=levels)
+    print(f"✅ MSC cube saved to {output_dir}: {len(doc_ids)} publications, {first_year}-{first_year + n_years - 1}, "
+          + ", ".join(f"{len(levels[str(w)])} prefixes of {w}" for w in LEVELS)
+          + f", {index_size(output_dir) / 2**20:.1f} MB in {time.time() - start:.1f}s")
+    return header
+
+
+# ==== QUERY ====
+class MscCube:
+    """Publication counts of the cube, memory-mapped. Prefixes of any length: a prefix of a stored level
+    (03, 03B, 03B30) reads its row, other prefixes ("0": 00-09, "03B3": 03B30-03B35) count the distinct
+    publications of all the full codes they cover."""
+
+    def __init__(self, path):
+        self.header = read_header(path, CUBE_VERSION)
+        self.first_year = self.header["first_year"]
+        self.doctypes = self.header["doctypes"]
+        self.codes = {int(width): codes for width, codes in self.header["levels"].items()}
+        self.cubes = {width: np.load(os.path.join(path, f"msc{width}.npy"), mmap_mode="r") for width in self.codes}
+        self.papers = np.load(os.path.join(path, "papers.npy"), mmap_mode="r")
+        self.code_indptr, self.code_pubs, self.pub_years, self.pub_doctypes = (
+            np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in ("code_indptr", "code_pubs", "pub_years", "pub_doctypes"))
+        self.rows = {width: {code: j for j, code in enumerate(codes)} for width, codes in self.codes.items()}
+
+    @property
+    def years(self):
+        return np.arange(self.first_year, self.first_year + self.header["years"])
+
+    def prefixes(self, level=2):
+        return list(self.codes[level])
+
+    def _doctypes(self, doctypes):
+        if doctypes is None:
+            return slice(None)
+        return [self.doctypes.index(doctype) for doctype in doctypes if doctype in self.doctypes]
+
+    def _bins(self, counts, step, start, end):
+        """Sum the yearly counts (last axis) into bins of step years aligned on multiples of step
+        (step=10: decades), for the years start..end; returns (bin starts, counts)"""
+        years = self.years
+        start = years[0] if start is None else start
+        end = years[-1] if end is None else end
+        bins = np.arange(start // step * step, end // step * step + 1, step)
+        keep = (years >= start) & (years <= end)
+        binned = np.zeros(counts.shape[:-1] + (len(bins),), dtype=np.int64)
+        if keep.any():
+            np.add.at(binned.T, (years[keep] // step * step - bins[0]) // step, np.moveaxis(counts[..., keep], -1, 0))
+        return bins, binned
+
+    def _distinct(self, prefix, columns):
+        """Yearly counts of the distinct publications with a full code starting with prefix"""
+        codes = [j for j, code in enumerate(self.codes[LEVELS[-1]]) if code.startswith(prefix)]
+        pubs = np.unique(gather_rows(self.code_indptr, self.code_pubs, codes))
+        if columns != slice(None):
+            pubs = pubs[np.isin(self.pub_doctypes[pubs], columns)]
+        return np.bincount(self.pub_years[pubs], minlength=len(self.years))
+
+    def counts(self, prefixes, step=1, start=None, end=None, doctypes=None):
+        """Distinct publications per prefix (rows) and bin of step years (columns); returns (bins, counts)"""
+        columns = self._doctypes(doctypes)
+        table = np.zeros((len(prefixes), len(self.years)), dtype=np.int64)
+        for i, prefix in enumerate(prefixes):
+            row = self.rows.get(len(prefix), {}).get(prefix)
+            if row is not None:
+                table[i] = np.asarray(self.cubes[len(prefix)][row][:, columns]).sum(axis=1)
+            else:
+                table[i] = self._distinct(prefix, columns)
+        return self._bins(table, step, start, end)
+
+    def series(self, prefix, step=1, start=None, end=None, doctypes=None):
+        bins, counts = self.counts([prefix], step, start, end, doctypes)
+        return bins, counts[0]
+
+    def totals(self, step=1, start=None, end=None, doctypes=None):
+        """All publications per bin, as decade-aggregate.sparql for step=10"""
+        bins, counts = self._bins(np.asarray(self.papers[:, self._doctypes(doctypes)]).sum(axis=1)[None], step, start, end)
+        return bins, counts[0]
+
+
+# ==== REVIVAL DETECTION ====
+def revival_scores(counts, totals, min_total=100, min_count=10, smoothing=1.0):
+    """Rise, decline and re-emergence of every row of counts (prefixes x bins), on its share of all
+    publications so that the growth of the corpus does not count as a rise. For each bin t taken as
+    the trough: decline = peak share before t / share at t, rise = peak share after t / share at t.
+    The revival score of a row is the best min(decline, rise) over its troughs (1 = no revival).
+    Bins with fewer than min_total publications are ignored, peaks need min_count publications of the
+    prefix. Returns (scores, trough bin indices)."""
+    counts = np.asarray(counts, dtype=np.float64)
+    totals = np.asarray(totals, dtype=np.float64)
+    share = (counts + smoothing) / (totals + smoothing)
+    share[:, totals < min_total] = np.nan
+    filled = np.where(np.isnan(share) | (counts < min_count), -np.inf, share)  # peak candidates
+    before = np.maximum.accumulate(filled, axis=1)
+    before = np.concatenate([np.full((len(share), 1), -np.inf), before[:, :-1]], axis=1)
+    after = np.maximum.accumulate(filled[:, ::-1], axis=1)[:, ::-1]
+    after = np.concatenate([after[:, 1:], np.full((len(share), 1), -np.inf)], axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        score = np.minimum(before, after) / share
+    score[~np.isfinite(score)] = 0
+    troughs = np.argmax(score, axis=1)
+    return np.maximum(score[np.arange(len(score)), troughs], 1.0), troughs
+
+def revivals(cube, level=2, step=10, start=None, end=None, doctypes=None, min_total=100, min_count=10, min_score=1.5):
+    """Prefixes of a level whose share of publications declined from a peak and rose again,
+    best revivals first: dicts with the peak, trough and revival bins, their counts and the score"""
+    prefixes = cube.prefixes(level)
+    bins, counts = cube.counts(prefixes, step, start, end, doctypes)
+    _, totals = cube.totals(step, start, end, doctypes)
+    scores, troughs = revival_scores(counts, totals, min_total, min_count)
+    share = (counts + 1.0) / (totals + 1.0)
+    share[:, totals < min_total] = np.nan
+    peaks = np.where(counts >= min_count, share, np.nan)
+    found = []
+    for i in np.flatnonzero((scores >= min_score) & (scores > 1)):
+        t = troughs[i]
+        peak = int(np.nanargmax(peaks[i, :t]))
+        revival = t + 1 + int(np.nanargmax(peaks[i, t + 1:]))
+        found.append({
+            "prefix": prefixes[i], "score": round(float(scores[i]), 3),
+            "peak": int(bins[peak]), "trough": int(bins[t]), "revival": int(bins[revival]),
+            "decline": round(float(share[i, peak] / share[i, t]), 3), "rise": round(float(share[i, revival] / share[i, t]), 3),
+            "counts": (int(counts[i, peak]), int(counts[i, t]), int(counts[i, revival])),
+        })
+    return sorted(found, key=lambda item: -item["score"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the MSC prefix x year x document type cube")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="JSONL files/directories or N-Triples dumps -> cube directory")
+    build.add_argument("inputs", nargs="+", help="create-rdf.py input (JSONL) or output (.nt/.nq, .gz/.zst)")
+    build.add_argument("output", help="cube directory")
+    for name, text in (("query", "publications per prefix and bin"), ("revivals", "revival detection over a prefix level")):
+        command = commands.add_parser(name, help=text)
+        command.add_argument("cube", help="cube directory")
+        command.add_argument("--step", type=int, default=10, help="years per bin (default: 10, decades)")
+        command.add_argument("--start", type=int, help="first year")
+        command.add_argument("--end", type=int, help="last year")
+        command.add_argument("--doctypes", nargs="+", help="document type codes (j, a, b, p; default: all)")
+    commands.choices["query"].add_argument("prefixes", nargs="*", help="MSC prefixes (none: all publications)")
+    revival = commands.choices["revivals"]
+    revival.add_argument("--level", type=int, default=2, choices=LEVELS, help="prefix level (default: 2)")
+    revival.add_argument("--min-total", type=int, default=100, help="ignore bins with fewer publications (default: 100)")
+    revival.add_argument("--min-count", type=int, default=10, help="minimum publications of a peak (default: 10)")
+    revival.add_argument("--min-score", type=float, default=1.5, help="minimum revival score (default: 1.5)")
+    revival.add_argument("--top", type=int, default=20, help="revivals to print (default: 20)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        write_cube(args.inputs, args.output)
+    elif args.command == "query":
+        cube = MscCube(args.cube)
+        if not args.prefixes:
+            bins, totals = cube.totals(args.step, args.start, args.end, args.doctypes)
+            print('"decade","count"' if args.step == 10 else '"year","count"')
+            for b, count in zip(bins, totals):
+                if count:
+                    print(f"{b},{count}")
+        else:
+            bins, counts = cube.counts(args.prefixes, args.step, args.start, args.end, args.doctypes)
+            for prefix, row in zip(args.prefixes, counts):
+                for b, count in zip(bins, row):
+                    if count:
+                        print(f"MSC {prefix} — {b}{'s' if args.step > 1 else ''}: {count} papers")
+    else:
+        cube = MscCube(args.cube)
+        found = revivals(cube, args.level, args.step, args.start, args.end, args.doctypes, args.min_total,
+                        args.min_count, args.min_score)
+        for item in found[:args.top]:
+            peak, trough, revival = item["counts"]
+            print(f"MSC {item['prefix']}: score {item['score']} — peak {item['peak']}s ({peak}), "
+                  f"trough {item['trough']}s ({trough}, x{item['decline']} lower share), "
+                  f"revival {item['revival']}s ({revival}, x{item['rise']} higher share)")
+        print(f"✅ {len(found)} revivals among {len(cube.prefixes(args.level))} prefixes")
@@ -0,0 +1,169 @@
+#batch precursor retrieval: ranked earlier, uncited papers sharing keywords and MSC codes with each of many target papers
+# python precursor_engine.py terms targets.txt --citations citations --top 20 --workers 8 --output precursors.tsv
+# python precursor_engine.py terms targets.txt --before 1990 --min-shared 2 1
+import time
+import argparse
+from multiprocessing import Pool
+import numpy as np
+from tqdm import tqdm
+from kg_index import doc_number
+from term_index import TermIndex
+from citation_graph import CitationGraph
+from concept_overlap import overlap_pairs, collect_pairs, BLOCK_ROWS
+
+FIELDS = ("keyword", "msc")
+
+
+# ==== TARGETS ====
+def read_targets(path):
+    """Document numbers of a targets file: one document number or URI per line (first column of a TSV),
+    blank lines, comments and headers skipped"""
+    targets = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            doc = doc_number(line.split("\t")[0]) if line.strip() and not line.startswith("#") else None
+            if doc is not None:
+                targets.append(doc)
+    return np.array(targets, dtype=np.int64)
+
+
+# ==== ENGINE ====
+class PrecursorEngine:
+    """Precursor candidates of many target papers at once, over the whole corpus: earlier papers sharing
+    keywords and MSC codes with a target (sparse products, see concept_overlap.py), not cited by it
+    (citation_graph.py), best first. The incidence matrices are decoded once from the term index, which also
+    gives the years, and shared by all the targets (and, forked, by all the worker processes)."""
+
+    def __init__(self, terms, citations=None):
+        self.paths = (terms, citations)
+        self.terms = TermIndex(terms)
+        self.citations = CitationGraph(citations) if citations else None
+        self.years = np.asarray(self.terms.doc_years, dtype=np.int64)
+        self.matrices, self.term_ids = zip(*(self.terms.incidence(field) for field in FIELDS))
+        # candidates in year order, undated papers left out: a block of papers too late for all targets is skipped
+        order = np.argsort(self.years, kind="stable")
+        self.order = order[self.years[order] >= 0]
+        self.candidates = [m[self.order] for m in self.matrices]
+        self.candidate_years = self.years[self.order]
+
+    def precursors(self, targets, top=20, before=None, min_shared=(1, 1), min_jaccard=0.0, min_gap=1,
+                   block_rows=BLOCK_ROWS):
+        """The top precursor candidates of every target (document numbers or URIs) issued at least min_gap
+        years earlier (and before `before`), sharing at least min_shared keywords and MSC codes.
+        Ranked by shared keywords, then keyword and MSC Jaccard. Returns (target positions, candidates,
+        shared, jaccard) arrays, sorted by target and rank; shared/jaccard of shape (pairs, 2)."""
+        ids = self.terms.doc_ids.ids(targets if isinstance(targets, np.ndarray) else list(targets))
+        positions = np.flatnonzero((ids >= 0) & (self.years[np.maximum(ids, 0)] >= 0))  # known and dated targets
+        ids = ids[positions]
+        n_left = len(self.order)
+        if before is not None:
+            n_left = int(np.searchsorted(self.candidate_years, before))
+        left = self.candidates if n_left == len(self.order) else [m[:n_left] for m in self.candidates]
+        right = [m[ids] for m in self.matrices]
+        rows, cols, shared, jaccard = collect_pairs(overlap_pairs(
+            left, right, min_shared, min_jaccard, self.candidate_years[:n_left], self.years[ids], min_gap,
+            self.order[:n_left], ids, block_rows), fields=len(FIELDS))
+        candidates, targets = self.order[rows], ids[cols]
+
+        if self.citations is not None:  # drop the candidates the target cites
+            docs = self.terms.doc_ids
+            keep = ~self.citations.cites_pairs(docs.docs(targets), docs.docs(candidates))
+            cols, candidates, shared, jaccard = cols[keep], candidates[keep], shared[keep], jaccard[keep]
+
+        order = np.lexsort((candidates, -jaccard[:, 1], -jaccard[:, 0], -shared[:, 0], cols))
+        cols, candidates, shared, jaccard = cols[order], candidates[order], shared[order], jaccard[order]
+        first = np.searchsorted(cols, cols)  # rank of every candidate among those of its target
+        keep = np.arange(len(cols)) - first < top
+        return (positions[cols[keep]], self.terms.doc_ids.docs(candidates[keep]), shared[keep], jaccard[keep])
+
+    def shared_labels(self, field, a, b):
+        """Sorted keywords or MSC codes shared by documents a and b"""
+        k = FIELDS.index(field)
+        matrix, a, b = self.matrices[k], self.terms.doc_ids.id(a), self.terms.doc_ids.id(b)
+        columns = np.intersect1d(matrix.indices[matrix.indptr[a]:matrix.indptr[a + 1]],
+                                 matrix.indices[matrix.indptr[b]:matrix.indptr[b + 1]])
+        return sorted(self.terms.dictionary.term(int(self.term_ids[k][c])).split(":", 1)[1] for c in columns)
+
+    def year(self, doc):
+        doc_id = self.terms.doc_ids.id(doc)
+        return int(self.years[doc_id]) if doc_id >= 0 else -1
+
+
+# ==== BATCHES ====
+_engine = None  # the engine of a worker process: inherited when forked, loaded by _init_worker otherwise
+
+def _init_worker(paths):
+    global _engine
+    if _engine is None:
+        _engine = PrecursorEngine(*paths)
+
+def _rows(task):
+    """TSV rows of the precursors of one chunk of targets"""
+    targets, options = task
+    positions, candidates, shared, jaccard = _engine.precursors(targets, **options)
+    rows = []
+    rank = 0
+    for k, (position, candidate) in enumerate(zip(positions, candidates)):
+        rank = rank + 1 if k and positions[k - 1] == position else 1
+        target = int(targets[position])
+        rows.append("\t".join(
+            [str(target), str(_engine.year(target)), str(rank), str(candidate), str(_engine.year(candidate))]
+            + [str(v) for v in shared[k]] + [f"{v:.4f}" for v in jaccard[k]]
+            + [",".join(_engine.shared_labels(field, target, candidate)) for field in FIELDS]))
+    return len(targets), rows
+
+def run_batch(engine, targets, output, workers=0, chunk_size=256, **options):
+    """Write the precursors of all targets to a TSV file, chunk_size targets per task, in parallel with
+    workers processes. Returns the number of rows written."""
+    global _engine
+    _engine = engine
+    tasks = [(targets[i:i + chunk_size], options) for i in range(0, len(targets), chunk_size)]
+    written = 0
+    pool = Pool(workers, initializer=_init_worker, initargs=(engine.paths,)) if workers else None
+    try:
+        results = pool.imap(_rows, tasks) if pool else map(_rows, tasks)
+        with open(output, "w", encoding="utf-8") as f, tqdm(total=len(targets), desc="Targets", unit=" targets") as bar:
+            f.write("\t".join(["target", "target_year", "rank", "precursor", "precursor_year"]
+                              + [f"shared_{field}" for field in FIELDS] + [f"jaccard_{field}" for field in FIELDS]
+                              + [f"{field}s" for field in FIELDS]) + "\n")
+            for done, rows in results:  # in target order
+                for row in rows:
+                    f.write(row + "\n")
+                written += len(rows)
+                bar.update(done)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precursor candidates of many target papers (batch retrieval)")
+    parser.add_argument("terms", help="term_index.py index (keywords, MSC codes, years)")
+    parser.add_argument("targets", help="file of target papers: one document number or URI per line")
+    parser.add_argument("--citations", help="citation_graph.py index: drop the candidates a target cites")
+    parser.add_argument("--top", type=int, default=20, help="precursors per target (default: 20)")
+    parser.add_argument("--before", type=int, help="precursors issued before this year")
+    parser.add_argument("--min-gap", type=int, default=1, help="minimum years between precursor and target (default: 1)")
+    parser.add_argument("--min-shared", nargs=2, type=int, default=[1, 1], metavar=("KEYWORDS", "MSC"),
+                        help="minimum shared keywords and MSC codes (default: 1 1)")
+    parser.add_argument("--min-jaccard", nargs=2, type=float, default=[0.0, 0.0], metavar=("KEYWORDS", "MSC"),
+                        help="minimum keyword and MSC Jaccard scores (default: 0 0)")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: none, in this process)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="targets per task (default: 256)")
+    parser.add_argument("--block-rows", type=int, default=BLOCK_ROWS, help=f"papers per sparse product (default: {BLOCK_ROWS})")
+    parser.add_argument("--output", default="precursors.tsv", help="output TSV file")
+    args = parser.parse_args()
+
+    start = time.time()
+    engine = PrecursorEngine(args.terms, args.citations)
+    targets = read_targets(args.targets)
+    print(f"Indexes loaded in {time.time() - start:.1f}s: {len(engine.order)} dated papers, {len(targets)} targets")
+    start = time.time()
+    rows = run_batch(engine, targets, args.output, args.workers, args.chunk_size, top=args.top, before=args.before,
+                     min_shared=args.min_shared, min_jaccard=args.min_jaccard, min_gap=args.min_gap,
+                     block_rows=args.block_rows)
+    elapsed = time.time() - start
+    print(f"✅ {rows} precursors of {len(targets)} targets saved to {args.output} in {elapsed:.1f}s "
+          f"({len(targets) / max(elapsed, 1e-9):.1f} targets/s)")
@@ -0,0 +1,180 @@
+#persistent SPARQL result cache: normalized query text + dataset version -> compressed result, size-bounded LRU
+# python query_cache.py stats | clear
+import os
+import re
+import time
+import zlib
+import sqlite3
+import hashlib
+import argparse
+import threading
+from jsonl_io import loads, dumps
+
+# --- CONFIGURATION ---
+CACHE_PATH = os.environ.get("ZBMATH_CACHE_PATH") or os.path.join(os.path.expanduser("~"), ".cache", "zbmath-kg", "queries.db")
+CACHE_SIZE = int(float(os.environ.get("ZBMATH_CACHE_SIZE", 1024)) * (1 << 20))  # MB
+ENTRY_SHARE = 4  # results larger than CACHE_SIZE / ENTRY_SHARE are streamed but not cached
+
+# string literals and IRIs are kept verbatim; comments and whitespace runs outside them are not significant
+_QUERY_TOKENS = re.compile(
+    r'("""(?:[^"\\]|\\.|"(?!""))*"""'
+    r"|'''(?:[^'\\]|\\.|'(?!''))*'''"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|<[^<>"{}|^`\\\s]*>|#[^\n]*|\s+|[^\s"\'<#]+|.)')
+
+
+def normalize_query(query):
+    """Drop comments and collapse whitespace outside literals/IRIs, so reformatting a query keeps its cache entry"""
+    parts = []
+    for token in _QUERY_TOKENS.findall(query):
+        if token.startswith("#"):
+            continue
+        if token.isspace():
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+            continue
+        parts.append(token)
+    return "".join(parts).strip()
+
+def cache_enabled():
+    return os.environ.get("ZBMATH_CACHE", "on").lower() not in ("off", "0", "no", "false")
+
+
+class QueryCache:
+    """SQLite-backed result cache. Entries are keyed on the normalized query, the dataset version and the
+    kind of result; the least recently used entries are evicted once the total exceeds max_bytes."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=CACHE_SIZE):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()  # shared by the threads of the Flask front end
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS results (
+                               key TEXT PRIMARY KEY, version TEXT, size INTEGER, used REAL, data BLOB)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS results_used ON results(used)")
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query, version, kind):
+        text = "\0".join((normalize_query(query), version or "", kind))
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute("SELECT data FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self.db:
+                self.db.execute("UPDATE results SET used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return zlib.decompress(row[0])
+
+    def put(self, key, version, data):
+        blob = zlib.compress(data, 6)
+        if len(blob) > self.max_bytes:
+            return
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                            (key, version, len(blob), time.time(), blob))
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if total > self.max_bytes:
+                evict = []
+                for old_key, size in self.db.execute("SELECT key, size FROM results ORDER BY used"):
+                    if total <= self.max_bytes:
+                        break
+                    evict.append((old_key,))
+                    total -= size
+                self.db.executemany("DELETE FROM results WHERE key = ?", evict)
+
+    def limit(self):
+        return self.max_bytes // ENTRY_SHARE
+
+    # --- helpers for the backends ---
+    def document(self, key, version, produce):
+        """Cached JSON document (query() results)"""
+        data = self.get(key)
+        if data is not None:
+            return loads(data)
+        result = produce()
+        self.put(key, version, dumps(result).encode("utf-8"))
+        return result
+
+    def rows(self, key, version, produce):
+        """Cached row iterator: a miss streams the rows from produce() and stores them once the
+        iteration completes (partial iterations and oversized results are not stored)"""
+        data = self.get(key)
+        if data is not None:
+            for line in data.decode("utf-8").split("\n"):
+                if line:
+                    yield loads(line)
+            return
+        lines = self.collect(key, version, (dumps(row).encode("utf-8") + b"\n" for row in produce()))
+        for line in lines:
+            yield loads(line)
+
+    def chunks(self, key, version, produce):
+        """Cached raw byte chunks (results passed through unparsed)"""
+        data = self.get(key)
+        if data is not None:
+            yield data
+            return
+        yield from self.collect(key, version, produce())
+
+    def collect(self, key, version, parts):
+        """Pass the byte strings through and store their concatenation once they are exhausted"""
+        kept, size, limit = [], 0, self.limit()
+        for part in parts:
+            if kept is not None:
+                kept.append(part)
+                size += len(part)
+                if size > limit:
+                    kept = None
+            yield part
+        if kept is not None:
+            self.put(key, version, b"".join(kept))
+
+    def stats(self):
+        with self.lock:
+            count, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        return count, size
+
+    def clear(self, version=None):
+        with self.lock, self.db:
+            if version is None:
+                self.db.execute("DELETE FROM results")
+            else:
+                self.db.execute("DELETE FROM results WHERE version = ?", (version,))
+        self.db.execute("VACUUM")
+
+    def close(self):
+        self.db.close()
+
+
+_caches = {}
+
+def get_cache(path=CACHE_PATH, max_bytes=CACHE_SIZE):
+    """Shared cache per file, None when caching is switched off (ZBMATH_CACHE=off)"""
+    if not cache_enabled():
+        return None
+    cache = _caches.get(path)
+    if cache is None:
+        cache = _caches[path] = QueryCache(path, max_bytes)
+    return cache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the SPARQL result cache")
+    parser.add_argument("command", choices=["stats", "clear"])
+    parser.add_argument("--path", default=CACHE_PATH, help=f"cache file (default: {CACHE_PATH})")
+    parser.add_argument("--version", help="with clear: only drop the entries of this dataset version")
+    args = parser.parse_args()
+
+    cache = QueryCache(args.path)
+    if args.command == "clear":
+        cache.clear(args.version)
+    count, size = cache.stats()
+    print(f"✅ {args.path}: {count} cached results, {size / 2**20:.1f} MB (limit {cache.max_bytes / 2**20:.0f} MB)")
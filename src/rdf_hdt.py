@@ -0,0 +1,374 @@
+#HDT-style binary RDF dump (front-coded dictionary + id triples in three orders) with a memory-mapped query API
+# python rdf_hdt.py build all.nt all.hdt
+# python rdf_hdt.py query all.hdt -p "<https://schema.org/keywords>" --limit 10
+import os
+import hashlib
+import mmap
+import json
+import time
+import bisect
+import argparse
+import tempfile
+import numpy as np
+from tqdm import tqdm
+from rdflib import URIRef, BNode, Literal
+from rdf_stream import term_nt, merge_sorted
+
+HDT_VERSION = "zbmath-hdt/1"
+BLOCK_SIZE = 16        # terms per front-coded dictionary block
+CHUNK_TRIPLES = 1 << 20  # triples per in-memory chunk while building
+ORDERS = {"spo": (0, 1, 2), "pos": (1, 2, 0), "osp": (2, 0, 1)}
+
+
+# ==== N-TRIPLES INPUT ====
+def split_triple(line):
+    """Split an N-Triples line into its three terms (N-Triples syntax), None for blank/comment lines.
+    IRIs and blank nodes contain no spaces, so only the object needs the rest of the line."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    s, p, o = line.split(" ", 2)
+    if not o.endswith("."):
+        raise ValueError(f"Not an N-Triples line: {line}")
+    return s, p, o[:-1].rstrip()
+
+def iter_triples(paths):
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                triple = split_triple(line)
+                if triple:
+                    yield triple
+
+def iter_chunks(paths, size=CHUNK_TRIPLES):
+    chunk = []
+    for triple in iter_triples(paths):
+        chunk.append(triple)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ==== FRONT-CODED DICTIONARY ====
+def _varint(n):
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+def _read_varint(buf, pos):
+    n = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+def write_dictionary(sorted_terms, path):
+    """Front-code sorted terms in blocks of BLOCK_SIZE: every entry is (shared prefix length,
+    suffix length, suffix), the first entry of a block is stored in full. Returns the block offsets."""
+    offsets = []
+    pos = 0
+    previous = b""
+    with open(path, "wb") as f:
+        for i, term in enumerate(sorted_terms):
+            data = term.encode("utf-8")
+            shared = 0
+            if i % BLOCK_SIZE == 0:
+                offsets.append(pos)
+            else:
+                shared = _common_prefix(previous, data)
+            entry = _varint(shared) + _varint(len(data) - shared) + data[shared:]
+            f.write(entry)
+            pos += len(entry)
+            previous = data
+    return np.array(offsets, dtype=np.uint64)
+
+
+class Dictionary:
+    """Memory-mapped front-coded dictionary: term id <-> N-Triples term.
+    Ids follow the order of the merged term lines, i.e. of the terms with "\n" appended."""
+
+    def __init__(self, data_path, index_path, size):
+        self.data = b""
+        if size:
+            with open(data_path, "rb") as f:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.blocks = np.load(index_path, mmap_mode="r")
+        self.size = size
+
+    def _block(self, block):
+        """Decode the terms (bytes) of one block"""
+        buf = self.data
+        pos = int(self.blocks[block])
+        count = min(BLOCK_SIZE, self.size - block * BLOCK_SIZE)
+        terms = []
+        previous = b""
+        for _ in range(count):
+            shared, pos = _read_varint(buf, pos)
+            length, pos = _read_varint(buf, pos)
+            previous = previous[:shared] + buf[pos:pos + length]
+            pos += length
+            terms.append(previous)
+        return terms
+
+    def _first(self, block):
+        buf = self.data
+        pos = int(self.blocks[block])
+        _, pos = _read_varint(buf, pos)
+        length, pos = _read_varint(buf, pos)
+        return buf[pos:pos + length]
+
+    def term(self, term_id):
+        return self._block(term_id // BLOCK_SIZE)[term_id % BLOCK_SIZE].decode("utf-8")
+
+    def id(self, term):
+        """Id of an N-Triples term, None if it is not in the dump"""
+        data = term.encode("utf-8") + b"\n"
+        lo, hi = 0, len(self.blocks)
+        while lo < hi:  # last block whose first term is <= data
+            mid = (lo + hi) // 2
+            if self._first(mid) + b"\n" <= data:
+                lo = mid + 1
+            else:
+                hi = mid
+        block = lo - 1
+        if block < 0:
+            return None
+        terms = [t + b"\n" for t in self._block(block)]
+        i = bisect.bisect_left(terms, data)
+        if i < len(terms) and terms[i] == data:
+            return block * BLOCK_SIZE + i
+        return None
+
+    def __len__(self):
+        return self.size
+
+
+# ==== BUILD ====
+def _sorted_terms(paths, tmp_dir):
+    """Write the distinct terms of the input as sorted runs and merge them into one sorted file"""
+    runs = []
+    for chunk in tqdm(iter_chunks(paths), desc="Collecting terms"):
+        terms = set()
+        for triple in chunk:
+            terms.update(triple)
+        run_file = os.path.join(tmp_dir, f"terms-{len(runs):05d}.txt")
+        with open(run_file, "w", encoding="utf-8") as f:
+            f.writelines(term + "\n" for term in sorted(terms))
+        runs.append(run_file)
+    terms_file = os.path.join(tmp_dir, "terms.txt")
+    with open(terms_file, "w", encoding="utf-8") as out:
+        count = merge_sorted(runs, out)
+    for run_file in runs:
+        os.remove(run_file)
+    return terms_file, count
+
+def _iter_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            yield line[:-1]
+
+def term_hash(term):
+    """Stable 64-bit hash of a term (the builtin hash() changes with every process)"""
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+def write_hdt(paths, output_dir):
+    """Build an HDT-style dump from N-Triples files in a few streaming passes.
+
+    Memory is bounded by one chunk of triples, 12 bytes per distinct term (a stable hash index used to
+    encode the triples, with an exact dict for the terms whose hashes collide) and the final sort of the
+    id triples (12 bytes per triple per order)."""
+    if isinstance(paths, str):
+        paths = [paths]
+    start = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output_dir) as tmp_dir:
+        terms_file, n_terms = _sorted_terms(paths, tmp_dir)
+        if n_terms >= 1 << 32:
+            raise ValueError(f"Too many terms for 32-bit ids: {n_terms}")
+
+        # dictionary, plus a hash -> id index to encode the triples without a term dict in memory
+        blocks = write_dictionary(_iter_lines(terms_file), os.path.join(output_dir, "dictionary.bin"))
+        np.save(os.path.join(output_dir, "dictionary.idx.npy"), blocks)
+        hashes = np.fromiter((term_hash(term) for term in _iter_lines(terms_file)), dtype=np.int64, count=n_terms)
+        by_hash = np.argsort(hashes, kind="stable").astype(np.uint32)
+        hashes = hashes[by_hash]
+        # terms sharing a hash are encoded through a small exact dict instead
+        shared = np.unique(hashes[1:][hashes[1:] == hashes[:-1]])
+        collisions = {}
+        if len(shared):
+            shared_set = set(shared.tolist())
+            for term_id, term in enumerate(_iter_lines(terms_file)):
+                if term_hash(term) in shared_set:
+                    collisions[term] = term_id
+        os.remove(terms_file)
+
+        ids_file = os.path.join(tmp_dir, "triples.u32")
+        with open(ids_file, "wb") as out:
+            for chunk in tqdm(iter_chunks(paths), desc="Encoding triples"):
+                keys = np.fromiter((term_hash(term) for triple in chunk for term in triple),
+                                   dtype=np.int64, count=3 * len(chunk))
+                ids = by_hash[np.searchsorted(hashes, keys)]
+                if collisions:
+                    terms = [term for triple in chunk for term in triple]
+                    for i in np.flatnonzero(np.isin(keys, shared)):
+                        ids[i] = collisions[terms[i]]
+                ids.tofile(out)
+        del hashes, by_hash
+
+        triples = np.fromfile(ids_file, dtype=np.uint32).reshape(-1, 3)
+        order = np.lexsort((triples[:, 2], triples[:, 1], triples[:, 0]))
+        triples = triples[order]
+        if len(triples):
+            keep = np.ones(len(triples), dtype=bool)
+            keep[1:] = np.any(triples[1:] != triples[:-1], axis=1)
+            triples = triples[keep]
+        del order
+        for name, (a, b, c) in ORDERS.items():
+            if name != "spo":
+                triples = triples[np.lexsort((triples[:, c], triples[:, b], triples[:, a]))]
+            counts = np.bincount(triples[:, a], minlength=n_terms)
+            ptr = np.zeros(n_terms + 1, dtype=np.uint64)
+            np.cumsum(counts, out=ptr[1:])
+            np.save(os.path.join(output_dir, f"{name}.ptr.npy"), ptr)
+            np.save(os.path.join(output_dir, f"{name}.b.npy"), np.ascontiguousarray(triples[:, b]))
+            np.save(os.path.join(output_dir, f"{name}.c.npy"), np.ascontiguousarray(triples[:, c]))
+
+    header = {"format": HDT_VERSION, "triples": int(len(triples)), "terms": n_terms,
+              "block_size": BLOCK_SIZE, "source": [os.path.basename(p) for p in paths],
+              "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(os.path.join(output_dir, "header.json"), "w", encoding="utf-8") as f:
+        json.dump(header, f, indent=2)
+    size = sum(os.path.getsize(os.path.join(output_dir, name)) for name in os.listdir(output_dir))
+    source_size = sum(os.path.getsize(p) for p in paths)
+    print(f"✅ HDT dump saved to {output_dir}: {header['triples']} triples, {n_terms} terms, "
+          f"{size / 2**20:.1f} MB ({size / max(source_size, 1):.0%} of the N-Triples) in {time.time() - start:.1f}s")
+    return header
+
+
+# ==== QUERY ====
+class HDT:
+    """Triple-pattern lookups over an HDT-style dump; all arrays are memory-mapped.
+
+    Terms are given and returned in N-Triples syntax ("<https://zbmath.org/...>", '"label"'),
+    rdflib terms are accepted as input too (rdflib.util.from_n3 converts results back)."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "header.json"), "r", encoding="utf-8") as f:
+            self.header = json.load(f)
+        if self.header.get("format") != HDT_VERSION:
+            raise ValueError(f"Unsupported dump format: {self.header.get('format')}")
+        self.dictionary = Dictionary(os.path.join(path, "dictionary.bin"),
+                                     os.path.join(path, "dictionary.idx.npy"), self.header["terms"])
+        self.orders = {name: tuple(np.load(os.path.join(path, f"{name}.{part}.npy"), mmap_mode="r")
+                                   for part in ("ptr", "b", "c"))
+                       for name in ORDERS}
+
+    def __len__(self):
+        return self.header["triples"]
+
+    def _id(self, term):
+        if term is None:
+            return None
+        if isinstance(term, (URIRef, BNode, Literal)):
+            term = term_nt(term)
+        term_id = self.dictionary.id(term)
+        return -1 if term_id is None else term_id
+
+    def _match(self, s, p, o):
+        """Return (order, first-column id or None, start, end) of the rows matching the bound ids"""
+        if s is not None:
+            name, bound = "spo", (s, p, o)
+        elif p is not None:
+            name, bound = "pos", (p, o, None)
+        elif o is not None:
+            name, bound = "osp", (o, None, None)
+        else:
+            return "spo", None, 0, len(self)
+        a, b, c = bound
+        if name == "spo" and b is None and c is not None:
+            name, (a, b, c) = "osp", (o, s, None)
+        ptr, col_b, col_c = self.orders[name]
+        start, end = int(ptr[a]), int(ptr[a + 1])
+        if b is not None:
+            block = col_b[start:end]
+            start, end = start + int(np.searchsorted(block, b, "left")), start + int(np.searchsorted(block, b, "right"))
+            if c is not None:
+                block = col_c[start:end]
+                start, end = start + int(np.searchsorted(block, c, "left")), start + int(np.searchsorted(block, c, "right"))
+        return name, a, start, end
+
+    def count(self, s=None, p=None, o=None):
+        """Number of triples matching the pattern (None = wildcard), without reading them"""
+        ids = [self._id(t) for t in (s, p, o)]
+        if -1 in ids:
+            return 0
+        _, _, start, end = self._match(*ids)
+        return end - start
+
+    def triple_ids(self, s=None, p=None, o=None, batch=1 << 16):
+        """Yield (s, p, o) id triples matching the pattern"""
+        ids = [self._id(t) for t in (s, p, o)]
+        if -1 in ids:
+            return
+        name, first, start, end = self._match(*ids)
+        ptr, col_b, col_c = self.orders[name]
+        a_pos, b_pos, c_pos = ORDERS[name]
+        for lo in range(start, end, batch):
+            hi = min(lo + batch, end)
+            if first is None:  # full scan: recover the first column from the pointers
+                firsts = np.searchsorted(ptr, np.arange(lo, hi), "right") - 1
+            else:
+                firsts = np.full(hi - lo, first)
+            for row in zip(firsts.tolist(), col_b[lo:hi].tolist(), col_c[lo:hi].tolist()):
+                triple = [0, 0, 0]
+                triple[a_pos], triple[b_pos], triple[c_pos] = row
+                yield tuple(triple)
+
+    def triples(self, s=None, p=None, o=None):
+        """Yield (s, p, o) N-Triples terms matching the pattern"""
+        term = self.dictionary.term
+        for ids in self.triple_ids(s, p, o):
+            yield tuple(term(i) for i in ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query an HDT-style binary dump of the KG")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="N-Triples files -> dump directory")
+    build.add_argument("inputs", nargs="+", help="N-Triples files (e.g. create-rdf.py --format nt output)")
+    build.add_argument("output", help="dump directory")
+    query = commands.add_parser("query", help="triple-pattern lookup")
+    query.add_argument("dump", help="dump directory")
+    query.add_argument("-s", help="subject in N-Triples syntax, e.g. <https://zbmath.org/...>")
+    query.add_argument("-p", help="predicate in N-Triples syntax")
+    query.add_argument("-o", help="object in N-Triples syntax")
+    query.add_argument("--limit", type=int, default=20, help="max triples to print (default: 20)")
+    query.add_argument("--count", action="store_true", help="only print the number of matches")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        write_hdt(args.inputs, args.output)
+    else:
+        hdt = HDT(args.dump)
+        if args.count:
+            print(hdt.count(args.s, args.p, args.o))
+        else:
+            for i, triple in enumerate(hdt.triples(args.s, args.p, args.o)):
+                if i >= args.limit:
+                    break
+                print(" ".join(triple) + " .")
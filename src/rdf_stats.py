@@ -0,0 +1,264 @@
+#KG statistics from N-Triples in one streaming pass: exact counters + HyperLogLog sketches, mergeable across shards
+import base64
+import hashlib
+from collections import Counter
+import numpy as np
+from jsonl_io import loads, dumps
+
+HLL_PRECISION = 14     # 2^14 registers: ~0.8% standard error, 16 KB per sketch
+HASH_BATCH = 1 << 16   # terms buffered per sketch before hashing
+
+RDF_TYPE = b"<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+DCT_TYPE = b"<http://purl.org/dc/terms/type>"
+SCHEMA_AUTHOR = b"<https://schema.org/author>"
+SCHEMA_REVIEWER = b"<https://schema.org/reviewer>"
+DCT_ISSUED = b"<http://purl.org/dc/terms/issued>"
+
+REPORT_SUFFIX = ".stats.json"  # report written next to an output file or chunk
+
+
+# ==== HYPERLOGLOG ====
+def hash64(terms):
+    """Stable 64-bit hashes (uint64 array) of byte strings; the same in every process, so sketches merge"""
+    blake2b = hashlib.blake2b
+    return np.frombuffer(b"".join([blake2b(t, digest_size=8).digest() for t in terms]), dtype="<u8")
+
+class HyperLogLog:
+    """Distinct-count sketch (Flajolet et al. 2007, with linear counting for small cardinalities)"""
+
+    def __init__(self, precision=HLL_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    def add_hashes(self, hashes):
+        if not len(hashes):
+            return
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        # rank = position of the first 1 bit after the index bits; the guard bit bounds it by 64 - p + 1
+        rest = (hashes << np.uint64(p)) | np.uint64(1 << (p - 1))
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = np.clip(65 - bit_length, 0, 64 - p + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, terms):
+        self.add_hashes(hash64(terms))
+
+    def update(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def to_json(self):
+        return {"p": self.precision, "registers": base64.b64encode(self.registers.tobytes()).decode("ascii")}
+
+    @classmethod
+    def from_json(cls, data):
+        registers = np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy()
+        return cls(data["p"], registers)
+
+
+# ==== GRAPH STATISTICS ====
+def split_ntriple(line, quads=False):
+    """(s, p, o) byte strings of an N-Triples (or N-Quads) line, None for blank/comment lines"""
+    line = line.strip()
+    if not line or line.startswith(b"#"):
+        return None
+    s, p, o = line.split(b" ", 2)
+    o = o[:-1].rstrip()
+    if quads:
+        o = o.rsplit(b" ", 1)[0]  # graph names are IRIs, without spaces
+    return s, p, o
+
+class GraphStats:
+    """The stats.py metrics over a stream of triples. Counts of triples, predicates, rdf:type objects and
+    publication years are exact; distinct entities (subjects and objects, as in stats.py), typed entities,
+    entities per type, authors and reviewers are HyperLogLog estimates. Reports of separate shards merge
+    with update(), exactly when the shards hold disjoint triples."""
+
+    SKETCHES = ("entities", "typed", "authors", "reviewers")
+
+    def __init__(self, precision=HLL_PRECISION, samples=5, quads=False):
+        self.precision = precision
+        self.quads = quads
+        self.triples = 0
+        self.predicates = Counter()
+        self.types = Counter()
+        self.years = Counter()  # dcterms:issued literal -> publications, as in year-count.tsv
+        self.sketches = {name: HyperLogLog(precision) for name in self.SKETCHES}
+        self.type_sketches = {}
+        self.samples = []
+        self.max_samples = samples
+        self._pending = {name: [] for name in self.SKETCHES}
+        self._pending_types = {}
+        self._last_subject = None
+
+    def add(self, s, p, o):
+        """Add one triple of N-Triples terms (bytes)"""
+        self.triples += 1
+        self.predicates[p] += 1
+        pending = self._pending
+        if s != self._last_subject:  # sorted dumps repeat the subject: hash it once per run
+            pending["entities"].append(s)
+            self._last_subject = s
+        pending["entities"].append(o)
+        if p == RDF_TYPE:
+            self.types[o] += 1
+            pending["typed"].append(s)
+            self._pending_types.setdefault(o, []).append(s)
+        elif p == DCT_TYPE:
+            pending["typed"].append(s)
+        elif p == SCHEMA_AUTHOR:
+            pending["authors"].append(o)
+        elif p == SCHEMA_REVIEWER:
+            pending["reviewers"].append(o)
+        elif p == DCT_ISSUED:
+            self.years[o] += 1
+        if len(self.samples) < self.max_samples:
+            self.samples.append((s, p, o))
+        if len(pending["entities"]) >= HASH_BATCH:
+            self.flush()
+
+    def add_lines(self, lines):
+        """Add N-Triples/N-Quads lines (bytes or str)"""
+        quads = self.quads
+        for line in lines:
+            if type(line) is str:
+                line = line.encode("utf-8")
+            triple = split_ntriple(line, quads)
+            if triple:
+                self.add(*triple)
+        self.flush()
+        return self
+
+    def flush(self):
+        for name, terms in self._pending.items():
+            if terms:
+                self.sketches[name].add(terms)
+                terms.clear()
+        for rdf_type, terms in self._pending_types.items():
+            if rdf_type not in self.type_sketches:
+                self.type_sketches[rdf_type] = HyperLogLog(self.precision)
+            self.type_sketches[rdf_type].add(terms)
+        self._pending_types.clear()
+
+    def update(self, other):
+        self.flush()
+        other.flush()
+        self.triples += other.triples
+        self.predicates.update(other.predicates)
+        self.types.update(other.types)
+        self.years.update(other.years)
+        for name in self.SKETCHES:
+            self.sketches[name].update(other.sketches[name])
+        for rdf_type, sketch in other.type_sketches.items():
+            self.type_sketches.setdefault(rdf_type, HyperLogLog(self.precision)).update(sketch)
+        self.samples = (self.samples + other.samples)[:self.max_samples]
+        return self
+
+    def to_json(self):
+        """JSON-serializable report (terms in N-Triples syntax)"""
+        self.flush()
+        return {
+            "triples": self.triples,
+            "predicates": {p.decode("utf-8"): n for p, n in self.predicates.items()},
+            "types": {t.decode("utf-8"): n for t, n in self.types.items()},
+            "years": {y.decode("utf-8"): n for y, n in self.years.items()},
+            "sketches": {name: sketch.to_json() for name, sketch in self.sketches.items()},
+            "type_sketches": {t.decode("utf-8"): sketch.to_json() for t, sketch in self.type_sketches.items()},
+            "samples": [[term.decode("utf-8") for term in triple] for triple in self.samples],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        sketches = {name: HyperLogLog.from_json(sketch) for name, sketch in data["sketches"].items()}
+        stats = cls(next(iter(sketches.values())).precision)
+        stats.triples = data["triples"]
+        stats.predicates = Counter({p.encode("utf-8"): n for p, n in data["predicates"].items()})
+        stats.types = Counter({t.encode("utf-8"): n for t, n in data["types"].items()})
+        stats.years = Counter({y.encode("utf-8"): n for y, n in data.get("years", {}).items()})
+        stats.sketches.update(sketches)
+        stats.type_sketches = {t.encode("utf-8"): HyperLogLog.from_json(sketch)
+                               for t, sketch in data["type_sketches"].items()}
+        stats.samples = [tuple(term.encode("utf-8") for term in triple) for triple in data["samples"]]
+        return stats
+
+    def metrics(self):
+        """The stats.py metrics as a dict (entity and type counts approximate)"""
+        self.flush()
+        entities = self.sketches["entities"].count()
+        people = HyperLogLog(self.precision)
+        people.update(self.sketches["authors"])
+        people.update(self.sketches["reviewers"])
+        return {
+            "entities": entities,
+            "edges": self.triples,
+            "relations": len(self.predicates),
+            "types": sorted(((t.decode("utf-8").strip("<>"), self.type_sketches[t].count()) for t in self.types),
+                            key=lambda item: -item[1]),
+            "typed": self.sketches["typed"].count(),
+            "authors": self.sketches["authors"].count(),
+            "reviewers": self.sketches["reviewers"].count(),
+            "people": people.count(),  # authors and reviewers
+            "years": sorted((y.decode("utf-8"), n) for y, n in self.years.items()),
+        }
+
+
+# ==== REPORTS ====
+def write_report(stats, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(dumps(stats.to_json()) + "\n")
+
+def read_report(path):
+    with open(path, "rb") as f:
+        return GraphStats.from_json(loads(f.read()))
+
+def merge_reports(paths):
+    """Corpus-wide statistics from the reports of disjoint output files/chunks"""
+    stats = GraphStats()
+    for path in paths:
+        stats.update(read_report(path))
+    return stats
+
+
+class StatsTee:
+    """File-like wrapper for create-rdf.py: passes lines through to out and writes the GraphStats
+    of everything written to report_path when closed"""
+
+    def __init__(self, out, report_path, stats=None):
+        self.out = out
+        self.report_path = report_path
+        self.stats = stats or GraphStats()
+        self.lines = []
+
+    def write(self, line):
+        self.out.write(line)
+        self.lines.append(line)
+        if len(self.lines) >= HASH_BATCH:
+            self.stats.add_lines(self.lines)
+            self.lines.clear()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def close(self):
+        self.stats.add_lines(self.lines)
+        self.lines.clear()
+        self.out.close()
+        write_report(self.stats, self.report_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,215 @@
+#streaming N-Triples / N-Quads output for create-rdf.py (no in-memory rdflib Graph)
+import os
+import re
+import gzip
+import heapq
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from rdflib import URIRef, BNode, Literal
+from rdf_terms import TERM_CACHE_SIZE
+from rdf_stats import REPORT_SUFFIX, write_report
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZBMATH_GRAPH = URIRef("https://zbmath.org")
+
+# characters not allowed inside an N-Triples IRIREF
+_IRI_UNSAFE = re.compile(r'[\x00-\x20<>"{}|^`\\]')
+_LITERAL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+
+def _iri(value):
+    return "<" + _IRI_UNSAFE.sub(lambda m: "%%%02X" % ord(m.group(0)), value) + ">"
+
+def term_nt(term):
+    """Serialize an rdflib term in N-Triples syntax"""
+    if isinstance(term, URIRef):
+        return _iri(term)
+    if isinstance(term, BNode):
+        return "_:" + term
+    if isinstance(term, Literal):
+        lexical = '"' + str(term).translate(_LITERAL_ESCAPES) + '"'
+        if term.language:
+            return lexical + "@" + term.language
+        if term.datatype:
+            return lexical + "^^" + _iri(term.datatype)
+        return lexical
+    raise TypeError(f"Unsupported RDF term: {term!r}")
+
+
+class NTriplesWriter:
+    """Drop-in for rdflib.Graph.add() that writes every triple straight to N-Triples,
+    or to N-Quads when a graph name is given.
+
+    Only duplicates within the current record are dropped here; shared entities are
+    emitted once by create-rdf.py through an EntityRegistry. The serialization of IRIs
+    (predicates, entities, cited records) is cached, literals are serialized every time."""
+
+    def __init__(self, out, graph=None, cache_size=TERM_CACHE_SIZE):
+        self.out = out
+        self.iri_nt = lru_cache(maxsize=cache_size)(term_nt) if cache_size else term_nt
+        self.suffix = (" " + term_nt(graph) + " .\n") if graph is not None else " .\n"
+        self.record_lines = set()
+        self.written = 0
+        self.skipped = 0
+
+    def bind(self, prefix, namespace):
+        pass  # prefixes are meaningless in N-Triples
+
+    def begin_record(self, record_uri):
+        self.record_lines.clear()
+
+    def add(self, triple):
+        s, p, o = triple
+        iri_nt = self.iri_nt
+        line = ((iri_nt(s) if type(s) is URIRef else term_nt(s)) + " " + iri_nt(p) + " " +
+                (iri_nt(o) if type(o) is URIRef else term_nt(o)) + self.suffix)
+        if line in self.record_lines:
+            self.skipped += 1
+            return
+        self.record_lines.add(line)
+        self.out.write(line)
+        self.written += 1
+
+    def __len__(self):
+        return self.written
+
+
+class EntityRegistry:
+    """Remembers which shared entities (MSC concepts, keywords, journals, publishers,
+    persons, software) already had their descriptive triples emitted.
+
+    Only a 64-bit hash of (uri, label) is kept per entry, so tens of millions of entities
+    fit in a few GB. first(uri) guards triples that depend on the URI alone (types, schemes),
+    first(uri, label) guards name/label triples, so label variants are never lost."""
+
+    def __init__(self):
+        self.seen = set()
+        self.hits = 0
+
+    def first(self, uri, label=None):
+        key = hash((uri, label))
+        if key in self.seen:
+            self.hits += 1
+            return False
+        self.seen.add(key)
+        return True
+
+    def __len__(self):
+        return len(self.seen)
+
+
+class LineBuffer(list):
+    """In-memory sink for NTriplesWriter (used to sort a shard before writing it)"""
+    write = list.append
+
+
+def merge_sorted(paths, out):
+    """Merge sorted N-Triples/N-Quads files into out, dropping duplicate lines.
+    Returns the number of lines written."""
+    files = [open(p, "r", encoding="utf-8") for p in paths]
+    written = 0
+    previous = None
+    try:
+        for line in heapq.merge(*files):
+            if line != previous:
+                out.write(line)
+                written += 1
+                previous = line
+    finally:
+        for f in files:
+            f.close()
+    return written
+
+
+# ==== COMPRESSED CHUNKED OUTPUT ====
+COMPRESSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+def _compress(lines, compression, level, sort, stats):
+    if sort:
+        lines.sort()  # N-Triples lines start with the subject: sorting groups them by subject
+    report = stats().add_lines(lines) if stats else None
+    data = "".join(lines).encode("utf-8")
+    if compression == "zstd":
+        return zstandard.ZstdCompressor(level=level or 3).compress(data), report
+    return gzip.compress(data, compresslevel=level or 6, mtime=0), report
+
+
+class ChunkedWriter:
+    """File-like sink that writes N-Triples/N-Quads as independently decompressible chunk files
+    <stem>-00000<ext>.gz|.zst (each about chunk_size bytes uncompressed), compressed by a pool
+    of threads (zlib and zstd release the GIL). Optionally every chunk is sorted by subject.
+    The chunks can be loaded in parallel (Virtuoso ld_dir, Jena tdb2.tdbloader).
+
+    stats: GraphStats factory; each chunk then gets a <chunk>.stats.json report, and the merged
+    report of all chunks is written to <path>.stats.json."""
+
+    def __init__(self, path, compression="gzip", chunk_size=256 << 20, threads=None, sort=False, level=None,
+                 stats=None):
+        if compression == "zstd" and zstandard is None:
+            raise ImportError("zstd compression requires the zstandard package")
+        stem, ext = os.path.splitext(path)
+        self.pattern = stem + "-{:05d}" + ext + COMPRESSIONS[compression]
+        self.compression = compression
+        self.level = level
+        self.chunk_size = chunk_size
+        self.sort = sort
+        self.stats = stats
+        self.report_path = path + REPORT_SUFFIX
+        self.total = stats() if stats else None
+        self.threads = threads or os.cpu_count() or 1
+        self.pool = ThreadPoolExecutor(self.threads)
+        self.pending = []
+        self.lines = []
+        self.size = 0
+        self.paths = []
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+
+    def write(self, line):
+        self.lines.append(line)
+        self.size += len(line) if line.isascii() else len(line.encode("utf-8"))  # uncompressed bytes
+        if self.size >= self.chunk_size:
+            self._submit()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def _submit(self):
+        path = self.pattern.format(len(self.paths))
+        self.paths.append(path)
+        self.raw_bytes += self.size
+        self.pending.append((path, self.pool.submit(_compress, self.lines, self.compression, self.level,
+                                                         self.sort, self.stats)))
+        self.lines = []
+        self.size = 0
+        while len(self.pending) > 2 * self.threads:  # bound the chunks held in memory
+            self._flush_one()
+
+    def _flush_one(self):
+        path, future = self.pending.pop(0)
+        data, report = future.result()
+        with open(path, "wb") as f:
+            f.write(data)
+        self.compressed_bytes += len(data)
+        if report is not None:
+            write_report(report, path + REPORT_SUFFIX)
+            self.total.update(report)
+
+    def close(self):
+        if self.lines or not self.paths:
+            self._submit()
+        while self.pending:
+            self._flush_one()
+        self.pool.shutdown()
+        if self.total is not None:
+            write_report(self.total, self.report_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,130 @@
+#term factory for create-rdf.py: precompiled patterns, bounded LRU caches and batch minting of URIs/literals
+import re
+import urllib.parse
+from collections import OrderedDict
+from functools import lru_cache
+from rdflib import URIRef, Literal, Namespace
+
+TERM_CACHE_SIZE = 1 << 18  # entries per cache; keywords, journals and names repeat millions of times
+
+# ==== PRECOMPILED PATTERNS ====
+_ID_UNSAFE = re.compile(r'[^a-zA-Z0-9_]')
+_ID_UNSAFE_BATCH = re.compile(r'[^a-zA-Z0-9_\n]')  # same, but keeps the separator of a joined batch
+_NAME_SEPARATOR = re.compile(r'\s*;\s*')
+_URI_SCHEME = re.compile(r'^([a-zA-Z][a-zA-Z0-9+.-]*):')
+URI_SAFE_CHARS = ":/?&=%#"
+
+
+def make_id(text):
+    """Create URI-safe ID from text"""
+    return _ID_UNSAFE.sub('', text.replace(" ", "_"))
+
+def make_ids(texts):
+    """make_id for a whole batch with a single regex pass over the joined strings"""
+    if any("\n" in text for text in texts):
+        return [make_id(text) for text in texts]
+    return _ID_UNSAFE_BATCH.sub('', "\n".join(texts).replace(" ", "_")).split("\n")
+
+def split_names(raw_string):
+    """Split author/publisher names robustly"""
+    if not raw_string:
+        return []
+    if isinstance(raw_string, list):
+        raw_string = "; ".join([r for r in raw_string if r])
+    return [n.strip() for n in _NAME_SEPARATOR.split(raw_string) if n.strip()]
+
+def safe_uri(uri_str):
+    """Return URIRef with percent-encoding if needed"""
+    return URIRef(urllib.parse.quote(uri_str, safe=URI_SAFE_CHARS))
+
+def to_safe_rdf_value(value):
+    """Try to return a safe URIRef, fall back to Literal if not a valid URI."""
+    if _URI_SCHEME.match(value):
+        try:
+            return URIRef(urllib.parse.quote(value, safe=URI_SAFE_CHARS))
+        except Exception:
+            pass
+    return Literal(value)
+
+
+class TermNamespace(Namespace):
+    """Namespace that mints each term once: later attribute lookups hit the instance dict
+    instead of rdflib's __getattr__ (also used to wrap DefinedNamespaces like DCTERMS)"""
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        term = self.term(name)
+        self.__dict__[name] = term
+        return term
+
+
+class LRUCache(OrderedDict):
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, maxsize):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def lookup(self, key):
+        value = self.get(key)
+        if value is not None:
+            self.move_to_end(key)
+        return value
+
+    def store(self, key, value):
+        self[key] = value
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class TermFactory:
+    """Mints the terms of shared entities and repeated values with bounded LRU caches.
+
+    entity(base, raw) gives URIRef(base + make_id(raw)); mint(base, raws) fills that cache for a
+    whole chunk of records at once. uri(), literal(), typed(), names() and link() cache URIRef/Literal
+    construction, split_names() and to_safe_rdf_value(). cache_size=0 disables caching (the reference path)."""
+
+    def __init__(self, cache_size=TERM_CACHE_SIZE):
+        self.cache_size = cache_size
+        self.entities = {}
+        cached = lru_cache(maxsize=cache_size) if cache_size else (lambda f: f)
+        self.uri = cached(URIRef)
+        self.literal = cached(Literal)
+        self.typed = cached(lambda value, datatype: Literal(value, datatype=datatype))
+        self._names = cached(lambda raw: tuple(split_names(raw)))
+        self.link = cached(to_safe_rdf_value)
+        self.minted = 0
+
+    def names(self, raw):
+        """split_names() as a tuple, cached for strings"""
+        if isinstance(raw, str):
+            return self._names(raw)
+        return split_names(raw)
+
+    def _cache(self, base):
+        cache = self.entities.get(base)
+        if cache is None:
+            cache = self.entities[base] = LRUCache(self.cache_size)
+        return cache
+
+    def entity(self, base, raw):
+        if not self.cache_size:
+            return URIRef(base + make_id(raw))
+        cache = self._cache(base)
+        uri = cache.lookup(raw)
+        if uri is None:
+            uri = URIRef(base + make_id(raw))
+            cache.store(raw, uri)
+            self.minted += 1
+        return uri
+
+    def mint(self, base, raws):
+        """Batch-mint the entity URIs of base for all raw strings of a chunk not cached yet"""
+        if not self.cache_size:
+            return
+        cache = self._cache(base)
+        missing = list({raw for raw in raws if isinstance(raw, str) and raw and raw != "None" and raw not in cache})
+        for raw, id_ in zip(missing, make_ids(missing)):
+            cache.store(raw, URIRef(base + id_))
+        self.minted += len(missing)
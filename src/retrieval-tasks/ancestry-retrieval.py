@@ -1,10 +1,25 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from kg_backend import open_backend
+from citation_graph import CitationGraph
+from term_index import TermIndex, keyword_term, msc_term, sample_uris
 
 # --- CONFIGURATION ---
-endpoint_url = "http://localhost:8890/sparql"  # Virtuoso SPARQL endpoint
-
-sparql = SPARQLWrapper(endpoint_url)
-sparql.setReturnFormat(JSON)
+endpoint_url = "http://localhost:8890/sparql"  # Virtuoso SPARQL endpoint, a local store or a dump (see kg_backend.py)
+citation_index = os.environ.get("ZBMATH_CITATIONS")  # citation_graph.py index: check citations locally
+term_index = os.environ.get("ZBMATH_TERMS")  # term_index.py index: select the early/later papers locally
+# filters of early_query/later_query, for the term index
+keywords = ["https://zbmath.org/keyword/spectral_sequences"]
+early_msc, later_msc = ["55"], ["18G"]
+
+kg = open_backend(endpoint_url)
+citations = CitationGraph(citation_index) if citation_index else None
+terms = TermIndex(term_index) if term_index else None
+# without the index, the store evaluates FILTER NOT EXISTS for every candidate pair
+citation_filter = "" if citations else "FILTER NOT EXISTS { ?later cito:cites ?early }"
+# with the index, all the pairs are fetched and the first 100 uncited ones kept
+join_limit = "" if citations else "LIMIT 100"
 
 # --- STEP 1: Sample early papers with MSC + keyword filter ---
 # Construct the SPARQL query
@@ -39,9 +54,11 @@ ORDER BY RAND()
 LIMIT 100
 """
 
-sparql.setQuery(early_query)
-early_results = sparql.query().convert()
-early_ids = [res["early"]["value"] for res in early_results["results"]["bindings"]]
+if terms:
+    early_ids = sample_uris(terms.match([keyword_term(k) for k in keywords], [msc_term(c) for c in early_msc],
+                                        end=1989), 100)
+else:
+    early_ids = [res["early"]["value"] for res in kg.rows(early_query)]
 print (early_ids)
 # import sys
 # sys.exit()
@@ -77,9 +94,11 @@ GROUP BY ?later ?laterYear
 ORDER BY RAND()
 LIMIT 100
 """
-sparql.setQuery(later_query)
-later_results = sparql.query().convert()
-later_ids = [res["later"]["value"] for res in later_results["results"]["bindings"]]
+if terms:
+    later_ids = sample_uris(terms.match([keyword_term(k) for k in keywords], [msc_term(c) for c in later_msc],
+                                        start=2021), 100)
+else:
+    later_ids = [res["later"]["value"] for res in kg.rows(later_query)]
 print (later_ids)
 # import sys
 # sys.exit()
@@ -115,16 +134,18 @@ WHERE {{
          schema:name ?laterTitle ;
          dct:issued ?laterYear .
 
-  FILTER NOT EXISTS {{ ?later cito:cites ?early }}
+  {citation_filter}
 }}
 GROUP BY ?early ?earlyTitle ?earlyYear ?later ?laterTitle ?laterYear ?earlyMSC ?laterMSC
-LIMIT 100
+{join_limit}
 """
-sparql.setQuery(join_query)
-join_results = sparql.query().convert()
 
 # --- Print the results ---
-for row in join_results["results"]["bindings"]:
+rows = kg.select(join_query)
+if citations:  # drop the pairs where the later paper cites the early one, all pairs at once
+    cited = citations.cites_pairs([row["later"]["value"] for row in rows], [row["early"]["value"] for row in rows])
+    rows = [row for row, cites in zip(rows, cited) if not cites][:100]
+for row in rows:
     print(f"{row['earlyTitle']['value']} ({row['earlyYear']['value']}) [{row['earlyMSC']['value']}] --> "
           f"{row['laterTitle']['value']} ({row['laterYear']['value']}) [{row['laterMSC']['value']}]")
     print("Shared keywords:", row.get("sharedKeywords", {}).get("value", ""))
@@ -1,9 +1,12 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from kg_backend import open_backend
+from concept_overlap import incidence, overlap_pairs, collect_pairs, shared_terms
 
 # --- Configuration ---
-endpoint = "http://localhost:8890/sparql"
-sparql = SPARQLWrapper(endpoint)
-sparql.setReturnFormat(JSON)
+endpoint = "http://localhost:8890/sparql"  # or a local store / dump (see kg_backend.py)
+kg = open_backend(endpoint)
 
 # --- Step 1: Authored Papers ---
 authored_query = """
@@ -32,11 +35,9 @@ WHERE {
 ORDER BY DESC(?rYear)
 LIMIT 1000
 """
-sparql.setQuery(authored_query)
-authored_results = sparql.query().convert()
 
 authored_papers = {}
-for res in authored_results["results"]["bindings"]:
+for res in kg.rows(authored_query):
     pid = res["authored"]["value"]
     title = res["aTitle"]["value"]
     year = int(res["aYear"]["value"])
@@ -83,11 +84,9 @@ ORDER BY RAND()
 LIMIT 1000
 
 """
-sparql.setQuery(reviewed_query)
-reviewed_results = sparql.query().convert()
 
 reviewed_papers = {}
-for res in reviewed_results["results"]["bindings"]:
+for res in kg.rows(reviewed_query):
     pid = res["reviewed"]["value"]
     title = res["rTitle"]["value"]
     year = int(res["rYear"]["value"])
@@ -103,20 +102,28 @@ for res in reviewed_results["results"]["bindings"]:
 # --- Step 3: Link Authored + Reviewed via Shared Keywords ---
 print("Counting linked papers (reviewed → authored with shared keywords):\n")
 
+# all reviewed x authored pairs at once: shared keyword counts from one sparse product,
+# authored paper strictly later than the reviewed one, no paper paired with itself
+vocabulary = {}
+reviewed_ids, authored_ids = list(reviewed_papers), list(authored_papers)
+reviewed = incidence((p["keywords"] for p in reviewed_papers.values()), vocabulary)
+authored = incidence((p["keywords"] for p in authored_papers.values()), vocabulary)
+keywords = list(vocabulary)
+rows, cols, _, _ = collect_pairs(overlap_pairs(
+    reviewed, authored, min_shared=2,
+    left_years=[p["year"] for p in reviewed_papers.values()],
+    right_years=[p["year"] for p in authored_papers.values()], min_gap=1,
+    left_ids=reviewed_ids, right_ids=authored_ids))
+
 linked_count = 0
 
-for r_id, r_data in reviewed_papers.items():
-    for a_id, a_data in authored_papers.items():
-        if r_id == a_id:
-            continue
-        if a_data["year"] <= r_data["year"]:
-            continue
-        shared = r_data["keywords"].intersection(a_data["keywords"])
-        if len(shared) > 1:
-            linked_count += 1
-            # If you want, you can still print details here, or comment it out:
-            print(f"[{r_data['year']}] {r_data['title']} {r_data['msc']}\n  ↳ [{a_data['year']}] {a_data['title']} {a_data['msc']}")
-            print(f"  Shared keywords ({len(shared)}): {', '.join(shared)}")
-            print("-" * 60)
+for i, j in zip(rows, cols):
+    r_data, a_data = reviewed_papers[reviewed_ids[i]], authored_papers[authored_ids[j]]
+    shared = shared_terms(reviewed, authored, i, j, keywords)
+    linked_count += 1
+    # If you want, you can still print details here, or comment it out:
+    print(f"[{r_data['year']}] {r_data['title']} {r_data['msc']}\n  ↳ [{a_data['year']}] {a_data['title']} {a_data['msc']}")
+    print(f"  Shared keywords ({len(shared)}): {', '.join(shared)}")
+    print("-" * 60)
 
 print(f"Total linked paper pairs: {linked_count}")
@@ -1,7 +1,16 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+import os
+import sys
+import numpy as np
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from kg_backend import open_backend
+from citation_graph import CitationGraph
+from concept_overlap import incidence, overlap_pairs, collect_pairs, shared_terms
+from term_index import TermIndex, keyword_term, msc_term, sample_uris
+from search_index import SearchIndex
+from kg_index import ZBMATH_BASE
 
 # --- CONFIGURATION ---
-endpoint_url = "http://localhost:8890/sparql"  # Virtuoso SPARQL endpoint
+endpoint_url = "http://localhost:8890/sparql"  # Virtuoso SPARQL endpoint, a local store or a dump (see kg_backend.py)
 keywords = [
     "https://zbmath.org/keyword/MValgebra",
     "https://zbmath.org/keyword/BCIalgebra",
@@ -9,6 +18,12 @@ keywords = [
 ]
 
 msc_codes = ["03", "06"]
+citation_index = os.environ.get("ZBMATH_CITATIONS")  # citation_graph.py index: check citations locally
+term_index = os.environ.get("ZBMATH_TERMS")  # term_index.py index: select the early/later papers locally
+search_index = os.environ.get("ZBMATH_SEARCH")  # search_index.py index: add the best full-text matches as candidates
+text_query = "MV-algebra BCK-algebra BCI-algebra"  # any of the words, in titles, reviews and keywords
+text_hits = 100  # full-text candidates per period
+max_pairs = 100
 
 keywords_values = "\n    ".join(f"<{k}>" for k in keywords)
 msc_filters = " ||\n    ".join(
@@ -16,8 +31,18 @@ msc_filters = " ||\n    ".join(
     for code in msc_codes
 )
 
-sparql = SPARQLWrapper(endpoint_url)
-sparql.setReturnFormat(JSON)
+kg = open_backend(endpoint_url)
+citations = CitationGraph(citation_index) if citation_index else None
+terms = TermIndex(term_index) if term_index else None
+search = SearchIndex(search_index) if search_index else None
+
+def add_text_hits(ids, start=None, end=None):
+    """ids plus the best full-text matches of text_query published in start..end"""
+    if not search:
+        return ids
+    known = set(ids)
+    hits = search.docs(text_query, text_hits, start=start, end=end, any_term=True)
+    return ids + [uri for uri in (f"{ZBMATH_BASE}{doc}" for doc in hits) if uri not in known]
 
 # --- STEP 1: Sample early papers with MSC + keyword filter ---
 # Construct the SPARQL query
@@ -54,9 +79,12 @@ ORDER BY RAND()
 LIMIT 100
 """
 
-sparql.setQuery(early_query)
-early_results = sparql.query().convert()
-early_ids = [res["early"]["value"] for res in early_results["results"]["bindings"]]
+if terms:  # the filters of early_query on the posting lists
+    early_ids = sample_uris(terms.match([keyword_term(k) for k in keywords], [msc_term(c) for c in msc_codes],
+                                        end=1989), 100)
+else:
+    early_ids = [res["early"]["value"] for res in kg.rows(early_query)]
+early_ids = add_text_hits(early_ids, end=1989)
 # print (early_ids)
 # # import sys
 # # sys.exit()
@@ -94,54 +122,86 @@ GROUP BY ?later ?laterYear
 ORDER BY RAND()
 LIMIT 100
 """
-sparql.setQuery(later_query)
-later_results = sparql.query().convert()
-later_ids = [res["later"]["value"] for res in later_results["results"]["bindings"]]
+if terms:  # the filters of later_query on the posting lists
+    later_ids = sample_uris(terms.match([keyword_term(k) for k in keywords], [msc_term(c) for c in msc_codes],
+                                        start=2021), 100)
+else:
+    later_ids = [res["later"]["value"] for res in kg.rows(later_query)]
+later_ids = add_text_hits(later_ids, start=2021)
 # print (later_ids)
 # # import sys
 # # sys.exit()
 
-# --- STEP 3: Join early/later papers on shared MSC and keywords ---
-early_values = " ".join(f"<{eid}>" for eid in early_ids)
-later_values = " ".join(f"<{lid}>" for lid in later_ids)
+# --- STEP 3: Fetch the MSC codes, keywords, titles and years of the sampled papers ---
+# one row per paper and term instead of a join over every early x later pair
+paper_values = " ".join(f"<{pid}>" for pid in early_ids + later_ids)
 
-join_query = f"""
+papers_query = f"""
 PREFIX schema: <https://schema.org/>
 PREFIX dct: <http://purl.org/dc/terms/>
-PREFIX cito: <http://purl.org/spar/cito/>
-PREFIX msc: <http://msc2010.org/resources/MSC/2010/>
 
-SELECT ?early ?earlyTitle ?earlyYear ?later ?laterTitle ?laterYear
-       (GROUP_CONCAT(DISTINCT ?msc; separator=",") AS ?sharedMSCs)
-       (GROUP_CONCAT(DISTINCT ?kw; separator=",") AS ?sharedKeywords)
+SELECT ?paper ?title ?year ?msc ?kw
 WHERE {{
-  VALUES ?early {{ {early_values} }}
-  VALUES ?later {{ {later_values} }}
+  VALUES ?paper {{ {paper_values} }}
 
-  ?early dct:subject ?msc ;
-         schema:keywords ?kw ;
-         schema:name ?earlyTitle ;
-         dct:issued ?earlyYear .
+  ?paper schema:name ?title ;
+         dct:issued ?year .
 
-  ?later dct:subject ?msc ;
-         schema:keywords ?kw ;
-         schema:name ?laterTitle ;
-         dct:issued ?laterYear .
+  {{ ?paper dct:subject ?msc }} UNION {{ ?paper schema:keywords ?kw }}
+}}
+"""
+
+papers = {}
+for res in kg.rows(papers_query):
+    paper = papers.setdefault(res["paper"]["value"], {
+        "title": res["title"]["value"], "year": int(res["year"]["value"]), "mscs": set(), "keywords": set()})
+    if "msc" in res:
+        paper["mscs"].add(res["msc"]["value"])
+    if "kw" in res:
+        paper["keywords"].add(res["kw"]["value"])
+early_ids = [pid for pid in early_ids if pid in papers]
+later_ids = [pid for pid in later_ids if pid in papers]
+
+# --- STEP 4: Score all early/later pairs on shared MSC codes and keywords ---
+msc_vocabulary, kw_vocabulary = {}, {}
+early_terms = [incidence((papers[pid]["mscs"] for pid in early_ids), msc_vocabulary),
+               incidence((papers[pid]["keywords"] for pid in early_ids), kw_vocabulary)]
+later_terms = [incidence((papers[pid]["mscs"] for pid in later_ids), msc_vocabulary),
+               incidence((papers[pid]["keywords"] for pid in later_ids), kw_vocabulary)]
+rows, cols, shared, jaccard = collect_pairs(overlap_pairs(
+    early_terms, later_terms, min_shared=[1, 1],
+    left_years=[papers[pid]["year"] for pid in early_ids],
+    right_years=[papers[pid]["year"] for pid in later_ids], min_gap=1), fields=2)
+
+# drop the pairs where the later paper cites the early one
+if citations:  # all pairs at once against the local index
+    cited = citations.cites_pairs([later_ids[j] for j in cols], [early_ids[i] for i in rows])
+else:
+    cites_query = f"""
+PREFIX cito: <http://purl.org/spar/cito/>
 
-  FILTER NOT EXISTS {{ ?later cito:cites ?early }}
+SELECT ?later ?early
+WHERE {{
+  VALUES ?early {{ {" ".join(f"<{eid}>" for eid in early_ids)} }}
+  VALUES ?later {{ {" ".join(f"<{lid}>" for lid in later_ids)} }}
+  ?later cito:cites ?early .
 }}
-GROUP BY ?early ?earlyTitle ?earlyYear ?later ?laterTitle ?laterYear
-HAVING(COUNT(DISTINCT ?msc) >= 1 || COUNT(DISTINCT ?kw) >= 1)
-LIMIT 100
 """
-sparql.setQuery(join_query)
-join_results = sparql.query().convert()
-
-# --- STEP 4: Output the results ---
-for row in join_results["results"]["bindings"]:
-    print(f"{row['early']['value']} {row['earlyTitle']['value']} ({row['earlyYear']['value']}) -> "
-          f"{row['later']['value']} {row['laterTitle']['value']} ({row['laterYear']['value']})")
-    print("Shared MSCs:", row.get("sharedMSCs", {}).get("value", ""))
-    print("Shared Keywords:", row.get("sharedKeywords", {}).get("value", ""))
+    citing = {(res["later"]["value"], res["early"]["value"]) for res in kg.rows(cites_query)} if len(rows) else set()
+    cited = [(later_ids[j], early_ids[i]) in citing for i, j in zip(rows, cols)]
+keep = ~np.asarray(cited, dtype=bool)
+rows, cols, shared, jaccard = rows[keep], cols[keep], shared[keep], jaccard[keep]
+
+# best pairs first: most shared keywords, then keyword and MSC Jaccard
+ranking = np.lexsort((-jaccard[:, 0], -jaccard[:, 1], -shared[:, 1]))[:max_pairs]
+msc_labels, kw_labels = list(msc_vocabulary), list(kw_vocabulary)
+
+# --- STEP 5: Output the results ---
+for k in ranking:
+    i, j = rows[k], cols[k]
+    early, later = papers[early_ids[i]], papers[later_ids[j]]
+    print(f"{early_ids[i]} {early['title']} ({early['year']}) -> "
+          f"{later_ids[j]} {later['title']} ({later['year']})")
+    print("Shared MSCs:", ",".join(shared_terms(early_terms[0], later_terms[0], i, j, msc_labels)))
+    print("Shared Keywords:", ",".join(shared_terms(early_terms[1], later_terms[1], i, j, kw_labels)))
     print("---")
-
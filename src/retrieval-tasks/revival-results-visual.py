@@ -1,5 +1,11 @@
+import os
+import sys
 import pandas as pd
 import matplotlib.pyplot as plt
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from msc_cube import MscCube
+
+cube_path = os.environ.get("ZBMATH_CUBE")  # msc_cube.py cube: plot its counts instead of the copied ones
 
 # Data from user
 data = [
@@ -23,6 +29,12 @@ data = [
     # ("60", 2020, 13743)
 ]
 
+if cube_path:
+    # the decades plotted above: 1860-2010, without 1940
+    decades, counts = MscCube(cube_path).counts(["03", "60"], step=10, start=1860, end=2019)
+    data = [(prefix, int(decade), int(count)) for prefix, row in zip(["03", "60"], counts)
+            for decade, count in zip(decades, row) if count and decade != 1940]
+
 df = pd.DataFrame(data, columns=["prefix", "decade", "count"])
 
 # Plot
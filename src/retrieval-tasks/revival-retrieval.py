@@ -1,11 +1,16 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from kg_backend import open_backend
+from msc_cube import MscCube
 
 # --- SPARQL Endpoint ---
-sparql = SPARQLWrapper("http://localhost:8890/sparql")
-sparql.setReturnFormat(JSON)
+kg = open_backend("http://localhost:8890/sparql")  # or a local store / dump (see kg_backend.py)
+cube_path = os.environ.get("ZBMATH_CUBE")  # msc_cube.py cube: the same counts without scanning the KG
+prefixes = ["03", "60"]
 
 # --- SPARQL Query ---
-query = """
+query = f"""
 PREFIX dct: <http://purl.org/dc/terms/>
 PREFIX msc: <http://msc2010.org/resources/MSC/2010/>
 PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
@@ -13,7 +18,7 @@ PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
 
 SELECT ?prefix ?decade (COUNT(DISTINCT ?pub) AS ?count)
 FROM <https://zbmath.org>
-WHERE {
+WHERE {{
   ?pub a <https://schema.org/ScholarlyArticle> ;
        dct:issued ?year ;
        dct:subject ?msc .
@@ -23,21 +28,21 @@ WHERE {
   BIND(STR(?notation) AS ?mscCode)
   BIND(SUBSTR(?mscCode, 1, 2) AS ?prefix)
 
-  FILTER(?prefix IN ("03", "60"))
+  FILTER(?prefix IN ({", ".join(f'"{p}"' for p in prefixes)}))
 
   BIND(FLOOR(xsd:integer(STR(?year))/10)*10 AS ?decade)
-}
+}}
 GROUP BY ?prefix ?decade
 ORDER BY ?prefix ?decade
 """
 
-# --- Run Query ---
-sparql.setQuery(query)
-results = sparql.query().convert()
-
-# --- Display Results ---
-for row in results["results"]["bindings"]:
-    prefix = row["prefix"]["value"]
-    decade = row["decade"]["value"]
-    count = row["count"]["value"]
+# --- Run Query and Display Results (rows are streamed) ---
+if cube_path:
+    cube = MscCube(cube_path)
+    decades, counts = cube.counts(prefixes, step=10)
+    rows = [(prefix, decade, count) for prefix, row in zip(prefixes, counts)
+            for decade, count in zip(decades, row) if count]
+else:
+    rows = ((row["prefix"]["value"], row["decade"]["value"], row["count"]["value"]) for row in kg.rows(query))
+for prefix, decade, count in rows:
     print(f"MSC {prefix} — {decade}s: {count} papers")
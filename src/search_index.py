@@ -0,0 +1,170 @@
+#full-text search index (SQLite FTS5, BM25 ranking) over the titles, review bodies and keywords of the documents
+# python search_index.py build out/ search                 (JSONL input, or N-Triples dumps)
+# python search_index.py query search "spectral sequence" --end 1989 --limit 20
+# python search_index.py query search 'title:"MV-algebra" OR BCK*' --syntax
+import os
+import time
+import sqlite3
+import argparse
+import threading
+import numpy as np
+from tqdm import tqdm
+from kg_index import KEYWORD_BASE, ZBMATH_BASE, iter_fields, write_header, read_header, index_size
+
+SEARCH_VERSION = "zbmath-search/1"
+SEARCH_FIELDS = ("title", "review", "keyword", "year")  # kg_index fields, in column order
+SEARCH_WEIGHTS = (10.0, 1.0, 5.0)  # BM25 weights of the title, review and keywords columns
+SEARCH_TOKENIZER = "unicode61 remove_diacritics 2"
+
+
+# ==== BUILD ====
+def _values(inputs):
+    """(document, column, text) of every title, review body, keyword and year in the inputs"""
+    columns = {field: column for column, field in enumerate(SEARCH_FIELDS)}
+    for field, doc, value in iter_fields(inputs, SEARCH_FIELDS):
+        if field == "keyword":  # keyword ids (MValgebra, spectral_sequences): the same text from JSONL and dumps
+            value = value[len(KEYWORD_BASE):].replace("_", " ")
+        yield doc, columns[field], str(value)
+
+def write_search(inputs, output_dir, batch=100000):
+    """Build the full-text index from JSONL or N-Triples dumps: one FTS5 row per document (rowid: the
+    zbMATH document number) with its title, review body, keywords and publication year"""
+    start = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+    db_path, staging_path = os.path.join(output_dir, "search.db"), os.path.join(output_dir, "staging.db")
+    for path in (db_path, staging_path):
+        if os.path.exists(path):
+            os.remove(path)
+    con = sqlite3.connect(db_path)
+    con.execute("PRAGMA journal_mode=OFF")
+    con.execute("PRAGMA synchronous=OFF")
+    con.execute(f"CREATE VIRTUAL TABLE documents USING fts5(title, review, keywords, year UNINDEXED, "
+                f"tokenize='{SEARCH_TOKENIZER}')")
+    con.execute("INSERT INTO documents(documents, rank) VALUES('rank', ?)",
+                (f"bm25({', '.join(map(str, SEARCH_WEIGHTS))})",))
+
+    # the values of a document are scattered over a dump (review nodes sort apart from the records):
+    # stage them, then group them by document
+    con.execute("ATTACH DATABASE ? AS staging", (staging_path,))
+    con.execute("PRAGMA staging.journal_mode=OFF")
+    con.execute("CREATE TABLE staging.fields(doc INTEGER, field INTEGER, value TEXT)")
+    rows = []
+    for row in tqdm(_values(inputs), desc="Reading texts", unit=" values"):
+        rows.append(row)
+        if len(rows) >= batch:
+            con.executemany("INSERT INTO staging.fields VALUES (?, ?, ?)", rows)
+            rows = []
+    con.executemany("INSERT INTO staging.fields VALUES (?, ?, ?)", rows)
+    con.execute("""
+        INSERT INTO documents(rowid, title, review, keywords, year)
+        SELECT doc,
+               group_concat(CASE field WHEN 0 THEN value END, ' '),
+               group_concat(CASE field WHEN 1 THEN value END, char(10)),
+               group_concat(CASE field WHEN 2 THEN value END, '; '),
+               CAST(max(CASE field WHEN 3 THEN value END) AS INTEGER)
+        FROM (SELECT * FROM staging.fields ORDER BY doc, field, value)
+        GROUP BY doc
+        HAVING max(field < 3)""")
+    con.execute("INSERT INTO documents(documents) VALUES('optimize')")  # one b-tree segment per index
+    con.commit()
+    con.execute("DETACH DATABASE staging")
+    os.remove(staging_path)
+    documents = con.execute("SELECT count(*) FROM documents").fetchone()[0]
+    reviews = con.execute("SELECT count(*) FROM documents WHERE review IS NOT NULL").fetchone()[0]
+    con.close()
+
+    header = write_header(output_dir, SEARCH_VERSION, inputs, documents=documents, reviews=reviews,
+                          weights=list(SEARCH_WEIGHTS), tokenizer=SEARCH_TOKENIZER)
+    print(f"✅ Search index saved to {output_dir}: {documents} documents ({reviews} with a review), "
+          f"{index_size(output_dir) / 2**20:.1f} MB in {time.time() - start:.1f}s")
+    return header
+
+
+# ==== QUERY ====
+def fts_query(text, any_term=False):
+    """FTS5 query of free text: every word quoted (no operators, no syntax errors), all of them required,
+    or any of them with any_term"""
+    words = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+    return (" OR " if any_term else " ").join(words)
+
+class SearchIndex:
+    """Ranked full-text search over titles, review bodies and keywords (BM25, titles weighted highest).
+    Queries are free text, or FTS5 syntax with syntax=True (column filters, OR/NOT, "phrases", prefix*).
+    Year ranges are inclusive, None leaves a side open."""
+
+    def __init__(self, path):
+        self.header = read_header(path, SEARCH_VERSION)
+        self.path = os.path.join(path, "search.db")
+        self._local = threading.local()  # one read-only connection per thread (Flask)
+
+    @property
+    def db(self):
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = self._local.con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        return con
+
+    def _where(self, query, start, end, syntax, any_term):
+        sql, args = "documents MATCH ?", [query if syntax else fts_query(query, any_term)]
+        if start is not None:
+            sql, args = sql + " AND year >= ?", args + [start]
+        if end is not None:
+            sql, args = sql + " AND year <= ?", args + [end]
+        return sql, args
+
+    def search(self, query, limit=20, start=None, end=None, syntax=False, any_term=False):
+        """Best documents first: [{doc, uri, score, year, title, snippet}], the snippet marking the
+        matches in [brackets] in the best matching column"""
+        where, args = self._where(query, start, end, syntax, any_term)
+        rows = self.db.execute(f"""
+            SELECT rowid, -rank, year, title, snippet(documents, -1, '[', ']', '…', 16)
+            FROM documents WHERE {where} ORDER BY rank LIMIT ?""", args + [limit])
+        return [{"doc": doc, "uri": f"{ZBMATH_BASE}{doc}", "score": round(score, 4), "year": year,
+                 "title": title, "snippet": snippet} for doc, score, year, title, snippet in rows]
+
+    def docs(self, query, limit=None, start=None, end=None, syntax=False, any_term=False):
+        """Document numbers of the matches, best first (all of them without a limit)"""
+        where, args = self._where(query, start, end, syntax, any_term)
+        rows = self.db.execute(f"SELECT rowid FROM documents WHERE {where} ORDER BY rank LIMIT ?",
+                               args + [-1 if limit is None else limit])
+        return np.array([doc for doc, in rows], dtype=np.int64)
+
+    def count(self, query, start=None, end=None, syntax=False, any_term=False):
+        where, args = self._where(query, start, end, syntax, any_term)
+        return self.db.execute(f"SELECT count(*) FROM documents WHERE {where}", args).fetchone()[0]
+
+    def __len__(self):
+        return self.header["documents"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the full-text search index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="JSONL files/directories or N-Triples dumps -> index directory")
+    build.add_argument("inputs", nargs="+", help="create-rdf.py input (JSONL) or output (.nt/.nq, .gz/.zst)")
+    build.add_argument("output", help="index directory")
+    query = commands.add_parser("query", help="documents matching a text, best first")
+    query.add_argument("index", help="index directory")
+    query.add_argument("text", help="words that must all occur (FTS5 query syntax with --syntax)")
+    query.add_argument("--syntax", action="store_true", help="the text is an FTS5 query")
+    query.add_argument("--any", action="store_true", help="any of the words is enough")
+    query.add_argument("--start", type=int, help="first year (inclusive)")
+    query.add_argument("--end", type=int, help="last year (inclusive)")
+    query.add_argument("--limit", type=int, default=20, help="number of results (default: 20)")
+    query.add_argument("--count", action="store_true", help="print the number of matches only")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        write_search(args.inputs, args.output)
+    else:
+        index = SearchIndex(args.index)
+        options = dict(start=args.start, end=args.end, syntax=args.syntax, any_term=args.any)
+        start = time.time()
+        if args.count:
+            print(index.count(args.text, **options))
+        else:
+            hits = index.search(args.text, args.limit, **options)
+            for hit in hits:
+                print(f"{hit['doc']}\t{hit['score']:.2f}\t{hit['year']}\t{hit['title']}")
+                print(f"\t{hit['snippet']}")
+            print(f"✅ {len(hits)} documents in {(time.time() - start) * 1000:.1f} ms")
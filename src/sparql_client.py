@@ -0,0 +1,267 @@
+#shared SPARQL HTTP client: pooled keep-alive session, timeouts, retry with backoff, streamed result rows
+import os
+import re
+import csv
+import codecs
+import json
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from query_cache import get_cache
+
+# --- CONFIGURATION ---
+TIMEOUT = (10, 600)     # (connect, read) seconds; long aggregations on the full KG take minutes
+MAX_RETRIES = 3
+BACKOFF_BASE = 2        # seconds, doubled per retry
+RETRY_STATUS = {429, 500, 502, 503, 504}
+POOL_SIZE = 16          # keep-alive connections per endpoint
+VERSION_TTL = 300       # seconds before the dataset version reported by the endpoint is checked again
+READ_CHUNK = 1 << 16
+
+ACCEPT = {
+    "json": "application/sparql-results+json",
+    "tsv": "text/tab-separated-values",
+    "csv": "text/csv",
+}
+
+_clients = {}
+
+
+def get_client(endpoint, **options):
+    """Shared client per endpoint and options, so repeated queries (and Flask requests) reuse its connections"""
+    key = (endpoint, tuple(sorted(options.items())))
+    client = _clients.get(key)
+    if client is None:
+        client = _clients[key] = SparqlClient(endpoint, **options)
+    return client
+
+
+# ==== RESULT PARSING ====
+# rows are yielded as SPARQL JSON bindings ({"var": {"type": ..., "value": ...}}), whatever the wire format
+
+_XSD = "http://www.w3.org/2001/XMLSchema#"
+_TSV_ESCAPE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_TSV_UNESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+def _unescape(text):
+    def replace(m):
+        code = m.group(1)
+        if len(code) > 1:
+            return chr(int(code[1:], 16))
+        return _TSV_UNESCAPES.get(code, code)
+    return _TSV_ESCAPE.sub(replace, text) if "\\" in text else text
+
+def parse_tsv_term(value):
+    """SPARQL TSV term -> JSON binding (None for unbound)"""
+    if not value:
+        return None
+    if value[0] == "<" and value[-1] == ">":
+        return {"type": "uri", "value": value[1:-1]}
+    if value.startswith("_:"):
+        return {"type": "bnode", "value": value[2:]}
+    if value[0] == '"':
+        end = value.rfind('"')
+        binding = {"type": "literal", "value": _unescape(value[1:end])}
+        rest = value[end + 1:]
+        if rest.startswith("@"):
+            binding["xml:lang"] = rest[1:]
+        elif rest.startswith("^^<"):
+            binding["datatype"] = rest[3:-1]
+        return binding
+    # bare numbers and booleans (Turtle abbreviations)
+    if value in ("true", "false"):
+        datatype = "boolean"
+    elif "e" in value or "E" in value:
+        datatype = "double"
+    elif "." in value:
+        datatype = "decimal"
+    else:
+        datatype = "integer"
+    return {"type": "literal", "value": value, "datatype": _XSD + datatype}
+
+def iter_lines(chunks):
+    """Lines (with their line endings) from an iterator of text chunks"""
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + chunk).split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
+
+def iter_tsv(chunks):
+    lines = iter_lines(chunks)
+    header = next(lines, "").rstrip("\r\n")
+    names = [name.lstrip("?$") for name in header.split("\t")]
+    for line in lines:
+        values = line.rstrip("\r\n").split("\t")
+        row = {}
+        for name, value in zip(names, values):
+            term = parse_tsv_term(value)
+            if term is not None:
+                row[name] = term
+        yield row
+
+def iter_csv(chunks):
+    """CSV carries no term types: bindings only have a value"""
+    reader = csv.reader(iter_lines(chunks))
+    names = next(reader, [])
+    for values in reader:
+        yield {name: {"value": value} for name, value in zip(names, values) if value != ""}
+
+def iter_json(chunks):
+    """Incrementally decode the bindings array of a SPARQL JSON result, one binding at a time"""
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = None
+    while pos is None:
+        results = buf.find('"results"')
+        start = buf.find('"bindings"', results) if results != -1 else -1
+        bracket = buf.find("[", start) if start != -1 else -1
+        if bracket != -1:
+            pos = bracket + 1
+            break
+        chunk = next(chunks, "")
+        if not chunk:
+            raise ValueError("No bindings in the SPARQL JSON result (ASK/CONSTRUCT query?)")
+        buf += chunk
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        try:
+            if pos >= len(buf):
+                raise json.JSONDecodeError("need more data", buf, pos)
+            row, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            chunk = next(chunks, "")
+            if not chunk:
+                raise
+            buf = buf[pos:] + chunk
+            pos = 0
+            continue
+        yield row
+        pos = end
+
+PARSERS = {"json": iter_json, "tsv": iter_tsv, "csv": iter_csv}
+
+
+class SparqlClient:
+    """SPARQL protocol client for one endpoint. Queries are POSTed (no URL length limit) over a pooled
+    keep-alive session; connection errors and 429/5xx answers are retried with exponential backoff
+    (only before any row was returned, so results are never duplicated).
+
+    Results are cached on disk (query_cache.py) per normalized query and dataset version, unless
+    cache=False, ZBMATH_CACHE=off or use_cache=False on the call. Without a known version (no
+    ZBMATH_DATASET_VERSION, no version= and no ETag/Last-Modified from the endpoint) nothing is cached."""
+
+    def __init__(self, endpoint, timeout=TIMEOUT, retries=MAX_RETRIES, backoff=BACKOFF_BASE, pool_size=POOL_SIZE,
+                 cache=True, version=None):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.cache = get_cache() if cache is True else (cache or None)
+        self._version = version
+        self._reported = None  # (version reported by the endpoint or None, time of the check)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, query, fmt="json", stream=True):
+        """POST the query and return the (streamed) response, retrying transient failures"""
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(self.endpoint, data={"query": query},
+                                             headers={"Accept": ACCEPT[fmt]},
+                                             timeout=self.timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+            if response.status_code in RETRY_STATUS and attempt < self.retries:
+                retry_after = response.headers.get("Retry-After", "")
+                response.close()
+                time.sleep(int(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt)
+                continue
+            if response.status_code >= 400:
+                message = response.text[:500]
+                response.close()
+                raise requests.HTTPError(f"{response.status_code} from {self.endpoint}: {message}", response=response)
+            return response
+
+    @property
+    def version(self):
+        """Dataset version for the cache keys: the version given to the client, ZBMATH_DATASET_VERSION,
+        or the endpoint's ETag/Last-Modified (checked again every VERSION_TTL seconds, so a reload is
+        noticed). None when no version is known: a reload could not be told apart, results are not cached."""
+        version = self._version or os.environ.get("ZBMATH_DATASET_VERSION")
+        if version:
+            return version
+        if self._reported is None or time.monotonic() - self._reported[1] > VERSION_TTL:
+            try:
+                with self.request("ASK {}", "json", stream=False) as response:
+                    reported = response.headers.get("ETag") or response.headers.get("Last-Modified")
+            except requests.RequestException:
+                return None  # not remembered: checked again on the next query
+            self._reported = (reported, time.monotonic())
+        return self._reported[0]
+
+    def _cached(self, use_cache, kind, query):
+        if self.cache is None or not use_cache:
+            return None
+        version = self.version
+        if not version:
+            return None
+        return self.cache.key(query, version, f"{self.endpoint}|{kind}")
+
+    def query(self, query, use_cache=True):
+        """Full SPARQL JSON result document (ASK answers, small SELECTs)"""
+        key = self._cached(use_cache, "query", query)
+        if key:
+            return self.cache.document(key, self.version, lambda: self._query(query))
+        return self._query(query)
+
+    def _query(self, query):
+        with self.request(query, "json", stream=False) as response:
+            return response.json()
+
+    def rows(self, query, fmt="json", use_cache=True):
+        """Yield the result rows as JSON bindings while they arrive, in constant memory.
+        fmt: json (exact terms), tsv (compact, typed) or csv (values only)."""
+        key = self._cached(use_cache, f"rows|{fmt}", query)
+        if key:
+            return self.cache.rows(key, self.version, lambda: self._rows(query, fmt))
+        return self._rows(query, fmt)
+
+    def _rows(self, query, fmt):
+        response = self.request(query, fmt)
+        try:
+            chunks = codecs.iterdecode(response.iter_content(READ_CHUNK), "utf-8")
+            yield from PARSERS[fmt](chunks)
+        finally:
+            response.close()
+
+    def stream(self, query, fmt="json", use_cache=True):
+        """(content type, iterator of raw result chunks) for passing results through unparsed"""
+        key = self._cached(use_cache, f"raw|{fmt}", query)
+        if key:
+            data = self.cache.get(key)
+            if data is not None:
+                return ACCEPT[fmt], iter([data])
+        response = self.request(query, fmt)
+        def chunks():
+            try:
+                yield from response.iter_content(READ_CHUNK)
+            finally:
+                response.close()
+        if key:
+            return response.headers.get("Content-Type", ACCEPT[fmt]), self.cache.collect(key, self.version, chunks())
+        return response.headers.get("Content-Type", ACCEPT[fmt]), chunks()
+
+    def close(self):
+        self.session.close()
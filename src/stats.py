@@ -1,138 +1,187 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
-
-sparql = SPARQLWrapper("http://localhost:8890/sparql")
-
-def run_query(query):
-    sparql.setQuery(query)
-    sparql.setReturnFormat(JSON)
-    return sparql.query().convert()["results"]["bindings"]
-
-print (f"✅ Triple Samples: ")
-
-# 0. Sample triples
-sample_q = """
-SELECT * FROM <https://zbmath.org> WHERE { ?s ?p ?o } LIMIT 5
-# SELECT COUNT(*) WHERE { GRAPH <https://zbmath.org> { ?s ?p ?o } };
-"""
-sample_triples = run_query(sample_q)
-for r in sample_triples:
-    print (r)
-
-print (f"✅ Metrics: ")
-
-# 1. Entities
-entities_q = """
-SELECT (COUNT(*) AS ?count)
-FROM <https://zbmath.org>
-WHERE {
-  {
-    SELECT DISTINCT ?entity
-    FROM <https://zbmath.org>
-    WHERE { 
-      { ?entity ?p ?o } 
-      UNION 
-      { ?s ?p ?entity } 
-    }
-  }
-}
-
-"""
-entities = int(run_query(entities_q)[0]["count"]["value"])
-print("Entities:", entities)
-
-# 2. Edges
-edges_q = """
-SELECT (COUNT(*) AS ?count)
-FROM <https://zbmath.org>
-WHERE { ?s ?p ?o }
-"""
-# edges = int(run_query(edges_q)[0]["count"]["value"])
-edges = 159154246
-print("Edges/Triples:", edges)
-
-# 3. Average Degree
-avg_degree = 2 * edges / entities
-print("Average Degree:", round(avg_degree, 2))
-
-# 4. Density
-density = edges / (entities * (entities - 1))
-print("Graph Density:", "{:.2e}".format(density))
-
-# 5. Relation Types
-preds_q = """
-SELECT (COUNT(DISTINCT ?p) AS ?count)
-FROM <https://zbmath.org>
-WHERE { ?s ?p ?o }
-"""
-relations = int(run_query(preds_q)[0]["count"]["value"])
-print("Relation Types:", relations)
-
-# 6. Entity Types
-ent_type_q = """
-SELECT ?type (COUNT(DISTINCT ?entity) AS ?count)
-FROM <https://zbmath.org>
-WHERE {
-  ?entity a ?type .
-}
-GROUP BY ?type
-ORDER BY DESC(?count)
-"""
-ent_types = run_query(ent_type_q)
-for type in ent_types:
-    print (type)
-
-# 7. Entity Types (rdf:type and dcterms:type coverage)
-typed_ent_q = """
-PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+#KG statistics: partitioned parallel SPARQL counts, or one streaming pass over the N-Triples dumps
+# python stats.py                                      (endpoint or ZBMATH_SPARQL, see kg_backend.py)
+# python stats.py --workers 16 --buckets 16            (distinct counts split further into 16 hash buckets)
+# python stats.py --dump all-*.nt.zst --workers 8      (offline, HyperLogLog distinct counts)
+# python stats.py --reports all.nt.stats.json --years year-count.tsv   (reports written by create-rdf.py --stats)
+import argparse
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from tqdm import tqdm
+from kg_backend import open_backend, open_dump, dump_format
+from jsonl_io import plan_shards, iter_shard_lines
+from rdf_stats import GraphStats, merge_reports
+
+# --- CONFIGURATION ---
+ENDPOINT = "http://localhost:8890/sparql"  # or a local store / dump (see kg_backend.py)
+WORKERS = 8
+SHARD_SIZE = 256 << 20  # bytes of uncompressed N-Triples per offline shard
+
+PREFIXES = """PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
 PREFIX dcterms: <http://purl.org/dc/terms/>
-
-SELECT
-  (COUNT(DISTINCT ?typedEntity) AS ?typedCount)
-  (COUNT(DISTINCT ?entity) AS ?totalCount)
-  ((COUNT(DISTINCT ?typedEntity) * 100.0) / COUNT(DISTINCT ?entity) AS ?typeCoveragePercent)
-FROM <https://zbmath.org>
-WHERE {
-  {
-    SELECT DISTINCT ?entity
-    WHERE {
-      { ?entity ?p ?o } UNION { ?s ?p ?entity }
-    }
-  }
-  OPTIONAL {
-    {
-      ?entity rdf:type ?anyType .
-    }
-    UNION
-    {
-      ?entity dcterms:type ?anyType .
-    }
-    BIND(?entity AS ?typedEntity)
-  }
-}
-"""
-typed_ent = run_query(typed_ent_q)
-typed_count = typed_ent[0]["typedCount"]["value"]
-total_count = typed_ent[0]["totalCount"]["value"]
-type_coverage = typed_ent[0]["typeCoveragePercent"]["value"]
-print(f"Entities with rdf:type or dcterms:type: {typed_count}/{total_count} ({type_coverage}%)")
-
-# 8. Distinct Authors and Reviewers
-author_reviewer_q = """
 PREFIX schema: <https://schema.org/>
-
-SELECT
-  (COUNT(DISTINCT ?author) AS ?totalDistinctAuthors)
-  (COUNT(DISTINCT ?reviewer) AS ?totalDistinctReviewers)
-FROM <https://zbmath.org>
-WHERE {
-  OPTIONAL { ?article schema:author ?author . }
-  OPTIONAL { ?article schema:review/schema:reviewer ?reviewer . }
-}
 """
 
-author_reviewer = run_query(author_reviewer_q)
-authors = author_reviewer[0]["totalDistinctAuthors"]["value"]
-reviewers = author_reviewer[0]["totalDistinctReviewers"]["value"]
-
-print(f"Distinct Authors: {authors}")
-print(f"Distinct Reviewers: {reviewers}")
+# distinct counts are summed over disjoint partitions of the counted terms: IRIs by namespace (a term belongs
+# to the most specific prefix, more specific prefixes first), other IRIs, blank nodes and literals
+ENTITY_PREFIXES = [
+    "https://zbmath.org/keyword/",
+    "https://zbmath.org/authors/",
+    "https://zbmath.org/author/",
+    "https://zbmath.org/journal/",
+    "https://zbmath.org/publisher/",
+    "https://zbmath.org/software/",
+    "https://zbmath.org/doctype/",
+    "https://zbmath.org/classification/",
+    "https://zbmath.org/ontology/",
+    "https://zbmath.org/",  # publications
+    "http://msc2010.org/",
+    "https://schema.org/",
+    "http://www.w3.org/",
+]
+
+
+# ==== SPARQL PATH ====
+def partitions(var, buckets=1):
+    """FILTER conditions splitting the values of var into disjoint partitions"""
+    text = f"STR({var})"
+    conditions = []
+    for i, prefix in enumerate(ENTITY_PREFIXES):
+        nested = [p for p in ENTITY_PREFIXES[:i] if p.startswith(prefix)]
+        condition = f'isIRI({var}) && STRSTARTS({text}, "{prefix}")'
+        conditions.append(condition + "".join(f' && !STRSTARTS({text}, "{p}")' for p in nested))
+    conditions.append(f"isIRI({var}) && " + " && ".join(f'!STRSTARTS({text}, "{p}")' for p in ENTITY_PREFIXES))
+    conditions.append(f"isLiteral({var})")
+    if buckets > 1:
+        width = len(f"{buckets - 1:x}")
+        conditions = [f'{condition} && STRSTARTS(MD5({text}), "{bucket:0{width}x}")'
+                      for condition in conditions for bucket in range(buckets)]
+    return conditions + [f"isBlank({var})"]  # STR() of a blank node is an error: not bucketed
+
+def count_query(pattern, expression="COUNT(*)", condition=None):
+    where = f"{pattern} FILTER({condition})" if condition else pattern
+    return f"{PREFIXES}SELECT ({expression} AS ?count) FROM <https://zbmath.org> WHERE {{ {where} }}"
+
+def sparql_stats(kg, workers=WORKERS, buckets=1):
+    """Metrics from many small count queries run in parallel: edges per predicate, entities per rdf:type,
+    distinct counts per term partition. Returns (metrics, sample triples)."""
+    def count(query):
+        rows = kg.select(query)
+        return int(rows[0]["count"]["value"]) if rows else 0
+
+    samples = [(r["s"]["value"], r["p"]["value"], r["o"]["value"])
+               for r in kg.select("SELECT * FROM <https://zbmath.org> WHERE { ?s ?p ?o } LIMIT 5")]
+    predicates = [r["p"]["value"] for r in kg.rows("SELECT DISTINCT ?p FROM <https://zbmath.org> WHERE { ?s ?p ?o }")]
+    types = [r["type"]["value"] for r in kg.rows("SELECT DISTINCT ?type FROM <https://zbmath.org> WHERE { ?e a ?type }")]
+
+    distinct = {
+        "entities": "{ ?e ?p ?o } UNION { ?s ?p ?e }",
+        "typed": "{ ?e rdf:type ?t } UNION { ?e dcterms:type ?t }",
+        "authors": "?article schema:author ?e .",
+        "reviewers": "?article schema:review/schema:reviewer ?e .",
+    }
+    jobs = [("edges", count_query(f"?s <{p}> ?o")) for p in predicates]
+    jobs += [(t, count_query(f"?e a <{t}>", "COUNT(DISTINCT ?e)")) for t in types]
+    jobs += [(name, count_query(pattern, "COUNT(DISTINCT ?e)", condition))
+             for name, pattern in distinct.items() for condition in partitions("?e", buckets)]
+
+    totals = dict.fromkeys(["edges"] + types + list(distinct), 0)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(count, query): name for name, query in jobs}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Count queries"):
+            totals[futures[future]] += future.result()
+
+    metrics = {
+        "entities": totals["entities"],
+        "edges": totals["edges"],
+        "relations": len(predicates),
+        "types": sorted(((t, totals[t]) for t in types), key=lambda item: -item[1]),
+        "typed": totals["typed"],
+        "authors": totals["authors"],
+        "reviewers": totals["reviewers"],
+    }
+    return metrics, samples
+
+
+# ==== OFFLINE PATH ====
+def dump_shards(paths, shard_size=SHARD_SIZE):
+    """Byte ranges of the plain N-Triples files, whole files for compressed ones"""
+    plain, compressed = [], []
+    for path in paths:
+        fmt, compression = dump_format(path)
+        if fmt == "turtle":
+            raise ValueError(f"Offline statistics need N-Triples/N-Quads dumps (create-rdf.py --format nt): {path}")
+        (compressed if compression else plain).append(path)
+    return plan_shards(plain, shard_size) + [(path, 0, None) for path in compressed]
+
+def shard_stats(shard):
+    path, start, end = shard
+    stats = GraphStats(quads=dump_format(path)[0] == "nquads")
+    if end is not None:
+        return stats.add_lines(iter_shard_lines(path, start, end)).to_json()
+    with open_dump(path) as f:
+        return stats.add_lines(f).to_json()
+
+def dump_stats(paths, workers=WORKERS, shard_size=SHARD_SIZE):
+    """Metrics from one streaming pass over the dumps, sharded over processes and merged"""
+    shards = dump_shards(paths, shard_size)
+    stats = GraphStats()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for report in tqdm(executor.map(shard_stats, shards), total=len(shards), desc="Dump shards"):
+            stats.update(GraphStats.from_json(report))
+    return stats
+
+def stats_samples(stats):
+    return [tuple(term.decode("utf-8") for term in triple) for triple in stats.samples]
+
+
+# ==== REPORT ====
+def print_metrics(metrics, samples, approximate=False):
+    approx = "~" if approximate else ""
+    print(f"✅ Triple Samples: ")
+    for sample in samples:
+        print(sample)
+
+    print(f"✅ Metrics: ")
+    entities, edges = metrics["entities"], metrics["edges"]
+    print("Entities:", approx + str(entities))
+    print("Edges/Triples:", edges)
+    print("Average Degree:", round(2 * edges / entities, 2))
+    print("Graph Density:", "{:.2e}".format(edges / (entities * (entities - 1))))
+    print("Relation Types:", metrics["relations"])
+    for rdf_type, count in metrics["types"]:
+        print(f"{rdf_type}: {approx}{count}")
+    typed = metrics["typed"]
+    print(f"Entities with rdf:type or dcterms:type: {approx}{typed}/{approx}{entities} ({typed * 100 / entities:.2f}%)")
+    print(f"Distinct Authors: {approx}{metrics['authors']}")
+    print(f"Distinct Reviewers: {approx}{metrics['reviewers']}")
+    if "people" in metrics:
+        print(f"Distinct Authors/Reviewers: {approx}{metrics['people']}")
+
+def write_years(metrics, path):
+    """Publications per dcterms:issued value, in the format of retrieval-tasks/year-count.tsv"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("?year\t?count\n")
+        for year, count in metrics["years"]:
+            f.write(f"{year}\t{count}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="zbMATH KG statistics")
+    parser.add_argument("--target", default=ENDPOINT, help="SPARQL endpoint, local store or dump (see kg_backend.py)")
+    parser.add_argument("--dump", nargs="+", help="compute offline from N-Triples dumps (.nt, .nt.gz, .nt.zst) instead")
+    parser.add_argument("--reports", nargs="+", help="merge the .stats.json reports of create-rdf.py --stats instead")
+    parser.add_argument("--years", help="with --dump/--reports: write the per-year histogram to this TSV file")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"parallel queries / processes (default: {WORKERS})")
+    parser.add_argument("--buckets", type=int, default=1, choices=[1, 16, 256],
+                        help="split each distinct-count partition into hash buckets (default: 1)")
+    args = parser.parse_args()
+
+    if args.dump or args.reports:
+        stats = dump_stats(args.dump, args.workers) if args.dump else merge_reports(args.reports)
+        metrics, samples = stats.metrics(), stats_samples(stats)
+        if args.years:
+            write_years(metrics, args.years)
+    elif args.years:
+        parser.error("--years requires --dump or --reports")
+    else:
+        metrics, samples = sparql_stats(open_backend(args.target), args.workers, args.buckets)
+    print_metrics(metrics, samples, approximate=bool(args.dump or args.reports))
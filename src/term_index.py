@@ -0,0 +1,224 @@
+#keyword/MSC inverted index: compressed sorted posting lists with MSC prefix rollups, AND/OR queries with year filters
+# python term_index.py build out/ terms                                   (JSONL input, or N-Triples dumps)
+# python term_index.py query terms -t keyword:MValgebra keyword:BCKalgebra -t msc:03 msc:06 --end 1989
+import os
+import time
+import argparse
+from array import array
+import numpy as np
+from rdf_hdt import write_dictionary, Dictionary
+from rdf_terms import make_id
+from kg_index import (DocIds, KEYWORD_BASE, MSC_BASE, ZBMATH_BASE, build_csr, encode_deltas, decode_deltas, decode_rows,
+                      collect, write_header, read_header, index_size)
+
+TERMS_VERSION = "zbmath-terms/1"
+MSC_LEVELS = (2, 3)  # rollup prefixes of every MSC code: 55 and 55N for 55N20
+
+
+# ==== TERMS ====
+def keyword_term(keyword):
+    """Index term of a keyword: its URI (https://zbmath.org/keyword/MValgebra), id or label"""
+    if keyword.startswith(KEYWORD_BASE):
+        return "keyword:" + keyword[len(KEYWORD_BASE):]
+    return "keyword:" + make_id(keyword)
+
+def msc_term(code):
+    """Index term of an MSC code or prefix of 2 or 3 characters (03, 03G, 03G25, or its URI)"""
+    if code.startswith(MSC_BASE):
+        code = code[len(MSC_BASE):]
+    return "msc:" + code.strip().replace(" ", "")
+
+def _term(term):
+    return term if term.startswith(("keyword:", "msc:")) else keyword_term(term)
+
+
+# ==== BUILD ====
+def write_terms(inputs, output_dir):
+    """Build the inverted index from JSONL or N-Triples dumps: one posting list of documents per keyword,
+    MSC code and MSC prefix, delta + varint compressed, plus the publication year of every document"""
+    start = time.time()
+    data = collect(inputs, ["keyword", "msc", "year"], desc="Reading terms")
+    year_docs, year_values = data["year"]
+    doc_ids = DocIds.build(np.concatenate([data["keyword"][0], data["msc"][0], year_docs]))
+    doc_years = np.full(len(doc_ids), -1, dtype=np.int16)
+    doc_years[doc_ids.ids(year_docs)] = year_values
+
+    vocabulary = {}
+    term_ids, term_docs = array("q"), array("q")
+    for field, (docs, values) in (("keyword", data["keyword"]), ("msc", data["msc"])):
+        ids = doc_ids.ids(docs)
+        for doc, value in zip(ids, values):
+            if field == "keyword":
+                terms = ["keyword:" + value[len(KEYWORD_BASE):]]
+            else:
+                terms = ["msc:" + value] + ["msc:" + value[:width] for width in MSC_LEVELS if len(value) > width]
+            for term in terms:
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                term_docs.append(doc)
+
+    # dictionary order (rdf_hdt.Dictionary compares the terms with "\n" appended)
+    terms = sorted(vocabulary, key=lambda term: term + "\n")
+    remap = np.empty(len(terms), dtype=np.int64)
+    remap[[vocabulary[term] for term in terms]] = np.arange(len(terms))
+    indptr, indices = build_csr(remap[np.frombuffer(term_ids, dtype=np.int64)],
+                                np.frombuffer(term_docs, dtype=np.int64), len(terms), dtype=np.int64)
+    offsets, postings = encode_deltas(indptr, indices)
+
+    os.makedirs(output_dir, exist_ok=True)
+    blocks = write_dictionary(terms, os.path.join(output_dir, "dictionary.bin"))
+    np.save(os.path.join(output_dir, "dictionary.idx.npy"), blocks)
+    postings.tofile(os.path.join(output_dir, "postings.bin"))
+    np.save(os.path.join(output_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(output_dir, "frequencies.npy"), np.diff(indptr).astype(np.int32))
+    doc_ids.save(os.path.join(output_dir, "doc_ids.npy"))
+    np.save(os.path.join(output_dir, "doc_years.npy"), doc_years)
+    header = write_header(output_dir, TERMS_VERSION, inputs, documents=len(doc_ids), terms=len(terms),
+                          keywords=sum(term.startswith("keyword:") for term in terms), postings=int(len(indices)))
+    print(f"✅ Term index saved to {output_dir}: {header['terms']} terms ({header['keywords']} keywords), "
+          f"{len(indices)} postings in {len(postings) / max(len(indices), 1):.2f} bytes each, "
+          f"{index_size(output_dir) / 2**20:.1f} MB in {time.time() - start:.1f}s")
+    return header
+
+
+# ==== QUERY ====
+class TermIndex:
+    """Posting lists of keywords (keyword:<id>) and MSC codes and prefixes (msc:03, msc:03G, msc:03G25),
+    memory-mapped. Queries return sorted zbMATH document numbers."""
+
+    def __init__(self, path):
+        self.header = read_header(path, TERMS_VERSION)
+        self.dictionary = Dictionary(os.path.join(path, "dictionary.bin"),
+                                     os.path.join(path, "dictionary.idx.npy"), self.header["terms"])
+        size = os.path.getsize(os.path.join(path, "postings.bin"))
+        self.postings = (np.memmap(os.path.join(path, "postings.bin"), dtype=np.uint8, mode="r")
+                         if size else np.zeros(0, dtype=np.uint8))
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.frequencies = np.load(os.path.join(path, "frequencies.npy"), mmap_mode="r")
+        self.doc_ids = DocIds.load(os.path.join(path, "doc_ids.npy"))
+        self.doc_years = np.load(os.path.join(path, "doc_years.npy"), mmap_mode="r")
+
+    def _term_id(self, term):
+        return self.dictionary.id(_term(term)) if len(self.dictionary) else None
+
+    def _ids(self, term):
+        term_id = self._term_id(term)
+        if term_id is None:
+            return np.zeros(0, dtype=np.int64)
+        return decode_deltas(self.postings[int(self.offsets[term_id]):int(self.offsets[term_id + 1])])
+
+    def frequency(self, term):
+        """Number of documents with the term"""
+        term_id = self._term_id(term)
+        return 0 if term_id is None else int(self.frequencies[term_id])
+
+    def _any(self, terms):
+        """Union of the posting lists of terms (int ids)"""
+        if isinstance(terms, str):
+            return self._ids(terms)
+        lists = [self._ids(term) for term in terms]
+        return np.unique(np.concatenate(lists)) if lists else np.zeros(0, dtype=np.int64)
+
+    def _years(self, ids, start=None, end=None):
+        if start is None and end is None:
+            return ids
+        years = np.asarray(self.doc_years[ids])
+        keep = years >= 0
+        if start is not None:
+            keep &= years >= start
+        if end is not None:
+            keep &= years <= end
+        return ids[keep]
+
+    def match_ids(self, *groups, start=None, end=None):
+        """Int ids of the documents matching every group (AND), a group being a term or a list of
+        terms of which any must match (OR), published in start..end (inclusive, None: open)"""
+        if not groups:
+            return np.zeros(0, dtype=np.int64)
+        estimates = [self.frequency(g) if isinstance(g, str) else sum(self.frequency(t) for t in g) for g in groups]
+        result = None
+        for group in (groups[i] for i in np.argsort(estimates, kind="stable")):  # smallest first
+            ids = self._any(group)
+            result = ids if result is None else np.intersect1d(result, ids, assume_unique=True)
+            if not len(result):
+                break
+        return self._years(result, start, end)
+
+    def match(self, *groups, start=None, end=None):
+        """zbMATH document numbers matching the query (see match_ids), e.g.
+        match(["keyword:MValgebra", "keyword:BCKalgebra"], ["msc:03", "msc:06"], end=1989)"""
+        return self.doc_ids.docs(self.match_ids(*groups, start=start, end=end))
+
+    def count(self, *groups, start=None, end=None):
+        return len(self.match_ids(*groups, start=start, end=end))
+
+    def term_ids(self, field):
+        """Dictionary ids of all keyword terms, or of the full MSC codes (no rollup prefixes)"""
+        keywords = self.header["keywords"]  # keyword: terms sort before msc: terms
+        if field == "keyword":
+            return np.arange(keywords)
+        return np.array([i for i in range(keywords, len(self))
+                         if len(self.dictionary.term(i)) - len("msc:") > max(MSC_LEVELS)], dtype=np.int64)
+
+    def incidence(self, field, batch=1 << 24):
+        """Document x term incidence matrix (scipy CSR; rows: int ids, columns: term_ids(field)) of the
+        keywords or the full MSC codes, decoded from the posting lists about batch bytes at a time"""
+        from scipy import sparse
+        term_ids = self.term_ids(field)
+        rows, cols = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+        if len(term_ids):
+            first, end = int(term_ids[0]), int(term_ids[-1]) + 1
+            column = np.full(end - first, -1, dtype=np.int64)  # dictionary id -> column (-1: MSC rollups)
+            column[term_ids - first] = np.arange(len(term_ids))
+            offsets = np.asarray(self.offsets[first:end + 1], dtype=np.int64)
+            bounds = np.unique(np.concatenate([
+                np.searchsorted(offsets, np.arange(offsets[0], offsets[-1], batch), "right") - 1, [end - first]]))
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                indptr, indices = decode_rows(offsets[lo:hi + 1], self.postings[offsets[lo]:offsets[hi]])
+                row_columns = np.repeat(column[lo:hi], np.diff(indptr))
+                rows.append(indices[row_columns >= 0])
+                cols.append(row_columns[row_columns >= 0])
+        rows, cols = np.concatenate(rows), np.concatenate(cols)
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(len(self.doc_ids), len(term_ids)))
+        return matrix, term_ids
+
+    def __len__(self):
+        return len(self.dictionary)
+
+
+def sample_uris(docs, limit, seed=None):
+    """Up to limit documents drawn at random (ORDER BY RAND() LIMIT), as zbMATH URIs"""
+    docs = np.asarray(docs)
+    if len(docs) > limit:
+        docs = np.sort(np.random.default_rng(seed).choice(docs, limit, replace=False))
+    return [f"{ZBMATH_BASE}{doc}" for doc in docs]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the keyword/MSC inverted index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="JSONL files/directories or N-Triples dumps -> index directory")
+    build.add_argument("inputs", nargs="+", help="create-rdf.py input (JSONL) or output (.nt/.nq, .gz/.zst)")
+    build.add_argument("output", help="index directory")
+    query = commands.add_parser("query", help="documents matching all groups of terms")
+    query.add_argument("index", help="index directory")
+    query.add_argument("-t", "--terms", nargs="+", action="append", required=True,
+                       help="a group of terms, any of which matches (keyword:<id>, msc:<code or prefix>); "
+                            "repeat for groups that must all match")
+    query.add_argument("--start", type=int, help="first year (inclusive)")
+    query.add_argument("--end", type=int, help="last year (inclusive)")
+    query.add_argument("--count", action="store_true", help="print the number of documents only")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        write_terms(args.inputs, args.output)
+    else:
+        index = TermIndex(args.index)
+        start = time.time()
+        docs = index.match(*args.terms, start=args.start, end=args.end)
+        if args.count:
+            print(len(docs))
+        else:
+            for doc in docs:
+                print(doc)
+        print(f"✅ {len(docs)} documents in {(time.time() - start) * 1000:.1f} ms")
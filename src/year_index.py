@@ -0,0 +1,117 @@
+#publication year index, memory-mapped: documents sorted by year for range scans, years of documents for filters
+# python year_index.py build out/ years                    (JSONL input, or N-Triples dumps)
+# python year_index.py query years --end 1989 --count
+import os
+import time
+import argparse
+import numpy as np
+from kg_index import DocIds, collect, write_header, read_header, index_size
+
+YEARS_VERSION = "zbmath-years/1"
+
+
+# ==== BUILD ====
+def write_years(inputs, output_dir):
+    """Build the year index from JSONL (publication_year) or N-Triples dumps (dcterms:issued)"""
+    start = time.time()
+    docs, years = collect(inputs, ["year"], desc="Reading years")["year"]
+    doc_ids = DocIds.build(docs)
+    doc_years = np.full(len(doc_ids), -1, dtype=np.int64)
+    doc_years[doc_ids.ids(docs)] = years
+    first_year = int(doc_years.min()) if len(doc_years) else 0
+    n_years = int(doc_years.max()) - first_year + 1 if len(doc_years) else 0
+
+    order = np.argsort(doc_years, kind="stable")  # by year, document numbers ascending within a year
+    offsets = np.zeros(n_years + 1, dtype=np.int64)
+    np.cumsum(np.bincount(doc_years - first_year, minlength=n_years), out=offsets[1:])
+
+    os.makedirs(output_dir, exist_ok=True)
+    doc_ids.save(os.path.join(output_dir, "doc_ids.npy"))
+    np.save(os.path.join(output_dir, "doc_years.npy"), doc_years.astype(np.int16))
+    np.save(os.path.join(output_dir, "by_year.npy"), np.asarray(doc_ids.numbers)[order])
+    np.save(os.path.join(output_dir, "offsets.npy"), offsets)
+    header = write_header(output_dir, YEARS_VERSION, inputs, documents=len(doc_ids), first_year=first_year,
+                          years=n_years)
+    print(f"✅ Year index saved to {output_dir}: {len(doc_ids)} documents, {first_year}-{first_year + n_years - 1}, "
+          f"{index_size(output_dir) / 2**20:.1f} MB in {time.time() - start:.1f}s")
+    return header
+
+
+# ==== QUERY ====
+class YearIndex:
+    """Documents by publication year and years by document, memory-mapped. Year ranges are inclusive,
+    None leaves a side open; documents are zbMATH document numbers (see kg_index.doc_number)."""
+
+    def __init__(self, path):
+        self.header = read_header(path, YEARS_VERSION)
+        self.first_year = self.header["first_year"]
+        self.doc_ids = DocIds.load(os.path.join(path, "doc_ids.npy"))
+        self.doc_years = np.load(os.path.join(path, "doc_years.npy"), mmap_mode="r")
+        self.by_year = np.load(os.path.join(path, "by_year.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+
+    def _span(self, start=None, end=None):
+        n_years = len(self.offsets) - 1
+        lo = 0 if start is None else min(max(start - self.first_year, 0), n_years)
+        hi = n_years if end is None else min(max(end - self.first_year + 1, 0), n_years)
+        return int(self.offsets[lo]), int(self.offsets[max(hi, lo)])
+
+    def docs(self, start=None, end=None):
+        """Documents published in start..end, by year (a slice of the sorted array: no scan)"""
+        lo, hi = self._span(start, end)
+        return np.asarray(self.by_year[lo:hi])
+
+    def count(self, start=None, end=None):
+        lo, hi = self._span(start, end)
+        return hi - lo
+
+    def years(self, docs):
+        """Publication years of documents (array), -1 where unknown"""
+        ids = self.doc_ids.ids(docs)
+        years = np.full(len(ids), -1, dtype=np.int64)
+        years[ids >= 0] = self.doc_years[ids[ids >= 0]]
+        return years
+
+    def year(self, doc):
+        return int(self.years([doc])[0])
+
+    def mask(self, docs, start=None, end=None):
+        """Boolean array: is docs[i] published in start..end?"""
+        years = self.years(docs)
+        keep = years >= 0
+        if start is not None:
+            keep &= years >= start
+        if end is not None:
+            keep &= years <= end
+        return keep
+
+    def histogram(self):
+        """(years, publications per year)"""
+        return np.arange(self.first_year, self.first_year + len(self.offsets) - 1), np.diff(self.offsets)
+
+    def __len__(self):
+        return len(self.doc_ids)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or query the publication year index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="JSONL files/directories or N-Triples dumps -> index directory")
+    build.add_argument("inputs", nargs="+", help="create-rdf.py input (JSONL) or output (.nt/.nq, .gz/.zst)")
+    build.add_argument("output", help="index directory")
+    query = commands.add_parser("query", help="documents of a year range")
+    query.add_argument("index", help="index directory")
+    query.add_argument("--start", type=int, help="first year (inclusive)")
+    query.add_argument("--end", type=int, help="last year (inclusive)")
+    query.add_argument("--count", action="store_true", help="print the number of documents only")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        write_years(args.inputs, args.output)
+    else:
+        index = YearIndex(args.index)
+        if args.count:
+            print(index.count(args.start, args.end))
+        else:
+            for doc in index.docs(args.start, args.end):
+                print(doc)
@@ -0,0 +1,29 @@
+import os
+import sys
+import importlib.util
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data")
+sys.path.insert(0, SRC)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_script(name):
+    """Import a hyphenated script of src/ (harvest-by-id.py) as a module"""
+    spec = importlib.util.spec_from_file_location(name.replace("-", "_"), os.path.join(SRC, name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # so its functions pickle (multiprocessing pools)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def create_rdf():
+    """create-rdf.py as a module (it reads msc_codes.jsonl from the working directory on import)"""
+    cwd = os.getcwd()
+    os.chdir(DATA)
+    try:
+        return load_script("create-rdf")
+    finally:
+        os.chdir(cwd)
@@ -0,0 +1,132 @@
+#stand-in OAI-PMH server for the harvester tests: canned GetRecord and ListRecords pages with scripted failures
+# python tests/mock_oai.py --port 8000 --records 250 --page-size 100
+# python src/harvest-by-id.py --list-records --base-url http://localhost:8000/ --output records-list.jsonl
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+
+OAI_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+              '<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">')
+OAI_FOOTER = "</OAI-PMH>"
+
+
+def record_xml(doc_id, datestamp):
+    return (f"<record><header><identifier>oai:zbmath.org:{doc_id}</identifier><datestamp>{datestamp}</datestamp>"
+            f"</header><metadata><zbmath:zbmath xmlns:zbmath=\"https://zbmath.org/zbmath/elements/1.0/\">"
+            f"<zbmath:document_id>{doc_id}</zbmath:document_id>"
+            f"<zbmath:document_title>{escape(f'Paper {doc_id}')}</zbmath:document_title>"
+            f"<zbmath:publication_year>{1950 + int(doc_id) % 70}</zbmath:publication_year>"
+            f"</zbmath:zbmath></metadata></record>")
+
+
+class MockOAI:
+    """Records 1000..1000+n with datestamps 2025-01-01, 2025-01-02, ..; ListRecords pages of page_size records.
+
+    failures: {document id or ("ListRecords", page number): [HTTP statuses]} answered, in order, before the
+    real response. truncated: ListRecords page numbers cut off in the middle of a record once (a crash).
+    requests: log of the (verb, document id or page number) served."""
+
+    def __init__(self, records=10, page_size=4):
+        self.records = [(str(1000 + i), f"2025-01-{1 + i % 28:02d}") for i in range(records)]
+        self.page_size = page_size
+        self.failures = {}
+        self.truncated = set()
+        self.requests = []
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    @property
+    def get_record_template(self):
+        return self.url + "?verb=GetRecord&identifier=oai:zbmath.org:{id}&metadataPrefix=oai_zb_preview"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _failure(self, key):
+        with self.lock:
+            self.requests.append(key)
+            statuses = self.failures.get(key)
+            return statuses.pop(0) if statuses else None
+
+    def respond(self, query):
+        """(HTTP status, body) of a request"""
+        verb = query.get("verb", [""])[0]
+        if verb == "GetRecord":
+            doc_id = query.get("identifier", [""])[0].rsplit(":", 1)[-1]
+            status = self._failure(doc_id)
+            if status:
+                return status, ""
+            datestamp = dict(self.records).get(doc_id)
+            if datestamp is None:
+                return 200, f'{OAI_HEADER}<error code="idDoesNotExist">{doc_id}</error>{OAI_FOOTER}'
+            return 200, f"{OAI_HEADER}<GetRecord>{record_xml(doc_id, datestamp)}</GetRecord>{OAI_FOOTER}"
+        if verb == "ListRecords":
+            token = query.get("resumptionToken", [None])[0]
+            if token:
+                start, since = token.split("|")
+                page = int(start) // self.page_size
+            else:
+                start, since = 0, query.get("from", [""])[0]
+                page = 0
+            status = self._failure(("ListRecords", page))
+            if status:
+                return status, ""
+            records = [(d, date) for d, date in self.records if date >= since]
+            if not records:
+                return 200, f'{OAI_HEADER}<error code="noRecordsMatch"/>{OAI_FOOTER}'
+            end = int(start) + self.page_size
+            body = "".join(record_xml(*record) for record in records[int(start):end])
+            next_token = f"{end}|{since}" if end < len(records) else ""
+            body = (f"{OAI_HEADER}<ListRecords>{body}<resumptionToken>{next_token}</resumptionToken>"
+                    f"</ListRecords>{OAI_FOOTER}")
+            with self.lock:
+                if page in self.truncated:
+                    self.truncated.discard(page)
+                    body = body[:body.index("<record>", body.index("</record>")) + 30]  # inside the 2nd record
+            return 200, body
+        return 400, f'{OAI_HEADER}<error code="badVerb"/>{OAI_FOOTER}'
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, body = mock.respond(parse_qs(urlparse(self.path).query))
+                data = body.encode("utf-8")
+                self.send_response(status)
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.send_header("Content-Type", "text/xml; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in OAI-PMH server (GetRecord, ListRecords)")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--records", type=int, default=250)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    mock = MockOAI(args.records, args.page_size)
+    mock.server.server_close()
+    mock.server = ThreadingHTTPServer(("127.0.0.1", args.port), mock._handler())
+    print(f"Serving {args.records} records at http://127.0.0.1:{args.port}/")
+    mock.server.serve_forever()
@@ -0,0 +1,20 @@
+from rdflib import Graph
+from test_jsonl_io import LINES, jsonl  # noqa: F401 (fixture)
+
+
+def test_scan_records_skips_truncated_lines(create_rdf, jsonl):
+    assert [row[0] for row in create_rdf.scan_records(jsonl)] == ["1001", "1003"]
+
+
+def test_scan_records_skips_lines_without_a_document_id(create_rdf, tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(b'{"document_id": []}\n[1, 2]\n"text"\n{"document_id": [null]}\n' + LINES[0])
+    assert [row[0] for row in create_rdf.scan_records(str(path))] == ["1001"]
+
+
+def test_convert_lines_survives_unexpected_value_types(create_rdf, capsys):
+    g = Graph()
+    lines = [b'{"document_id": ["1004"], "serial_title": {"a": 1}}\n', LINES[0]]
+    create_rdf.convert_lines(g, lines, create_rdf.EntityRegistry())
+    assert "Batch minting skipped" in capsys.readouterr().out
+    assert any(str(s).endswith("/1001") for s in g.subjects())
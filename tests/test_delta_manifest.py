@@ -0,0 +1,21 @@
+from rdflib import Graph, URIRef, Literal
+from rdf_stream import term_nt
+from delta_manifest import write_delete_update
+
+SCHEMA = "https://schema.org/"
+
+
+def test_delete_update_escapes_record_iris(tmp_path):
+    odd = "https://zbmath.org/12 34>x"  # a stray space and ">" in a document id
+    kept = URIRef("https://zbmath.org/5")
+    g = Graph()
+    for uri in (URIRef(odd), kept):
+        g.add((uri, URIRef(SCHEMA + "name"), Literal("Paper")))
+    # the store holds the IRIs as the N-Triples output escaped them
+    g = Graph().parse(data="".join(f"{term_nt(s)} {term_nt(p)} {term_nt(o)} .\n" for s, p, o in g), format="nt")
+
+    path = tmp_path / "delete.ru"
+    write_delete_update(str(path), [odd])
+    assert term_nt(URIRef(odd)) in path.read_text(encoding="utf-8")
+    g.update(path.read_text(encoding="utf-8"))
+    assert {s for s, _, _ in g} == {kept}
@@ -0,0 +1,29 @@
+import os
+import importlib.util
+import pytest
+
+pytest.importorskip("flask")
+spec = importlib.util.spec_from_file_location(
+    "front_app", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "front", "app.py"))
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+
+
+class Index:
+    """Stand-in search index recording the limits it is asked for"""
+
+    def __init__(self):
+        self.limits = []
+
+    def search(self, text, limit, start=None, end=None, syntax=False, any_term=False):
+        self.limits.append(limit)
+        return []
+
+
+@pytest.mark.parametrize("limit, expected", [(None, 20), ("5", 5), ("-5", 1), ("0", 1), ("100000", 1000)])
+def test_search_limit_is_clamped(monkeypatch, limit, expected):
+    index = Index()
+    monkeypatch.setattr(app, "search_index", index)
+    query = {"q": "spectral sequence"} if limit is None else {"q": "spectral sequence", "limit": limit}
+    assert app.app.test_client().get("/search", query_string=query).status_code == 200
+    assert index.limits == [expected]
@@ -0,0 +1,93 @@
+import json
+import pytest
+from conftest import load_script
+from mock_oai import MockOAI
+
+pytest.importorskip("aiohttp")
+harvest = load_script("harvest-by-id")
+
+
+def read_lines(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def read_ids(path):
+    return sorted(json.loads(line)["document_id"][0] for line in read_lines(path))
+
+def run(mock, tmp_path, ids):
+    (tmp_path / "ids.txt").write_text("".join(i + "\n" for i in ids), encoding="utf-8")
+    harvest.harvest_zbmath_by_id_list_async(
+        str(tmp_path / "ids.txt"), str(tmp_path / "records.jsonl"), str(tmp_path / "errors.txt"), max_records=None,
+        url_template=mock.get_record_template, concurrency=4, rate=1000, max_retries=2, backoff=0.01, flat=True)
+
+
+def test_backoff_and_failed_ids(tmp_path):
+    with MockOAI(records=6) as mock:
+        mock.failures["1001"] = [429, 503]       # retried, then fetched
+        mock.failures["1002"] = [500, 502, 503]  # still failing after 2 retries
+        run(mock, tmp_path, ["1000", "1001", "1002", "1003", "9999"])
+        assert mock.requests.count("1001") == 3
+        assert mock.requests.count("1002") == 3
+    assert read_ids(tmp_path / "records.jsonl") == ["1000", "1001", "1003"]
+    assert sorted(read_lines(tmp_path / "records.jsonl.ids")) == ["1000", "1001", "1003"]
+    assert sorted(read_lines(tmp_path / "errors.txt")) == ["1002", "9999"]  # 9999: idDoesNotExist
+
+
+def test_resume_skips_processed_and_failed_ids(tmp_path):
+    with MockOAI(records=6) as mock:
+        mock.failures["1002"] = [500, 500, 500]
+        run(mock, tmp_path, ["1000", "1001", "1002"])
+        mock.requests.clear()
+        run(mock, tmp_path, ["1000", "1001", "1002", "1003", "1004"])
+        assert sorted(mock.requests) == ["1003", "1004"]
+    assert read_ids(tmp_path / "records.jsonl") == ["1000", "1001", "1003", "1004"]
+    assert read_lines(tmp_path / "errors.txt") == ["1002"]
+
+
+def test_resume_rebuilds_a_lost_checkpoint(tmp_path):
+    with MockOAI(records=6) as mock:
+        run(mock, tmp_path, ["1000", "1001"])
+        (tmp_path / "records.jsonl.ids").unlink()  # crashed before the checkpoint was written
+        mock.requests.clear()
+        run(mock, tmp_path, ["1000", "1001", "1002"])
+        assert mock.requests == ["1002"]
+    assert read_ids(tmp_path / "records.jsonl") == ["1000", "1001", "1002"]
+    assert sorted(read_lines(tmp_path / "records.jsonl.ids")) == ["1000", "1001", "1002"]
+
+
+def test_resume_after_crash_between_record_and_checkpoint(tmp_path):
+    ids_file = tmp_path / "records.jsonl.ids"
+    with MockOAI(records=6) as mock:
+        run(mock, tmp_path, ["1000", "1001", "1002"])
+        last = json.loads(read_lines(tmp_path / "records.jsonl")[-1])["document_id"][0]
+        ids_file.write_text("".join(i + "\n" for i in read_lines(ids_file) if i != last), encoding="utf-8")
+        mock.requests.clear()
+        run(mock, tmp_path, ["1000", "1001", "1002"])
+        assert mock.requests == []  # the saved record is checkpointed, not fetched again
+    assert read_ids(tmp_path / "records.jsonl") == ["1000", "1001", "1002"]
+    assert sorted(read_lines(ids_file)) == ["1000", "1001", "1002"]
+
+
+def test_resume_after_interrupted_appends(tmp_path):
+    output, ids_file = tmp_path / "records.jsonl", tmp_path / "records.jsonl.ids"
+    with MockOAI(records=6) as mock:
+        run(mock, tmp_path, ["1000", "1001"])
+        with open(output, "a", encoding="utf-8") as f:
+            f.write('{"document_id": ["1002"], "docu')  # crashed inside the record
+        with open(ids_file, "a", encoding="utf-8") as f:
+            f.write("10")  # and inside an ID
+        run(mock, tmp_path, ["1000", "1001", "1002"])
+    assert read_ids(output) == ["1000", "1001", "1002"]
+    assert sorted(read_lines(ids_file)) == ["1000", "1001", "1002"]
+
+
+@pytest.mark.parametrize("block", [4, 1 << 16])
+def test_cut_partial_line(tmp_path, block):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(b"first line\nsecond line\nunterminat")
+    assert harvest.cut_partial_line(str(path), block) == b"second line"
+    assert path.read_bytes() == b"first line\nsecond line\n"
+    assert harvest.cut_partial_line(str(path), block) == b"second line"
+    path.write_bytes(b"partial")
+    assert harvest.cut_partial_line(str(path), block) is None
+    assert path.read_bytes() == b""
@@ -0,0 +1,77 @@
+import json
+import xml.etree.ElementTree as ET
+import pytest
+from conftest import load_script
+from mock_oai import MockOAI
+
+harvest = load_script("harvest-by-id")
+
+
+def read_ids(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["document_id"][0] for line in f]
+
+def run(mock, output, **options):
+    harvest.harvest_list_records(str(output), base_url=mock.url, max_retries=2, backoff=0.01, **options)
+
+
+def test_fresh_start(tmp_path):
+    output = tmp_path / "records.jsonl"
+    with MockOAI(records=10, page_size=4) as mock:
+        mock.failures[("ListRecords", 1)] = [503]  # retried
+        run(mock, output)
+    assert read_ids(output) == [str(1000 + i) for i in range(10)]
+    assert json.loads((tmp_path / "records.jsonl.token").read_text())["token"] is None
+
+
+def test_fresh_start_appends_to_existing_output(tmp_path):
+    output = tmp_path / "prev.jsonl"
+    output.write_text('{"document_id": ["1"]}\n{"document_id": ["2"]}\n', encoding="utf-8")
+    with MockOAI(records=5, page_size=2) as mock:
+        run(mock, output)
+    assert read_ids(output) == ["1", "2"] + [str(1000 + i) for i in range(5)]
+
+
+def test_crash_and_resume(tmp_path):
+    output = tmp_path / "records.jsonl"
+    with MockOAI(records=10, page_size=4) as mock:
+        mock.truncated.add(1)  # page 1 breaks off after its first record
+        with pytest.raises(ET.ParseError):
+            run(mock, output)
+        assert len(read_ids(output)) == 5  # page 0 and a partial page 1
+        run(mock, output)
+        assert mock.requests.count(("ListRecords", 0)) == 1  # resumed at page 1
+    assert read_ids(output) == [str(1000 + i) for i in range(10)]
+
+
+def test_crash_in_first_page_and_resume(tmp_path):
+    output = tmp_path / "prev.jsonl"
+    output.write_text('{"document_id": ["1"]}\n', encoding="utf-8")
+    with MockOAI(records=6, page_size=4) as mock:
+        mock.truncated.add(0)  # no page finished yet
+        with pytest.raises(ET.ParseError):
+            run(mock, output)
+        assert read_ids(output) == ["1", "1000"]
+        run(mock, output)
+        assert mock.requests.count(("ListRecords", 0)) == 2  # restarted, after the records already there
+    assert read_ids(output) == ["1"] + [str(1000 + i) for i in range(6)]
+
+
+def test_incremental_harvest_appends(tmp_path):
+    output = tmp_path / "records.jsonl"
+    with MockOAI(records=6, page_size=4) as mock:
+        run(mock, output)
+        run(mock, output)  # same query, complete: nothing to do
+        run(mock, output, from_date="2025-01-05")
+    assert read_ids(output) == [str(1000 + i) for i in range(6)] + ["1004", "1005"]
+
+
+def test_other_unfinished_harvest_is_refused(tmp_path):
+    output = tmp_path / "records.jsonl"
+    with MockOAI(records=10, page_size=4) as mock:
+        mock.truncated.add(1)
+        with pytest.raises(ET.ParseError):
+            run(mock, output)
+        with pytest.raises(SystemExit):
+            run(mock, output, from_date="2025-01-05")
+    assert len(read_ids(output)) == 5
@@ -0,0 +1,55 @@
+import json
+import pytest
+from conftest import load_script
+
+validation = load_script("input-validation-check")
+
+
+def record(doc_id, title="Paper"):
+    return json.dumps({"document_id": [doc_id], "document_title": [title]}, ensure_ascii=False) + "\n"
+
+TRUNCATED = '{"document_id": ["1003"], "rights": ["Use under the licenses.\' and more text'  # repairable
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    out = tmp_path / "out"
+    out.mkdir()
+    (out / "a.jsonl").write_bytes("".join([
+        record("1001", "Spektralfolgen über Ringe"),
+        "{broken\n",
+        TRUNCATED + "\n",
+        record("1001", "again"),  # duplicate within the file
+        "\n",
+    ]).encode("utf-8") + b'{"document_id": ["1004"], "document_title": ["\xff\xfe"]}\n' + record("1005").encode())
+    (out / "b.jsonl").write_text(record("1003") + record("1006") + '{"document_id": []}\n', encoding="utf-8")
+    return out
+
+
+def read(path):
+    return path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("workers, shard_size", [(1, 1 << 20), (2, 16)])  # whole files, or a shard per line or two
+def test_validate_all(tmp_path, inputs, workers, shard_size):
+    cleaned = tmp_path / "cleaned"
+    total = validation.validate_all(str(inputs), str(cleaned), workers, shard_size)
+    assert sorted(p.name for p in cleaned.iterdir()) == ["a.jsonl", "a_error_lines.txt", "b.jsonl", "b_error_lines.txt"]
+
+    kept = [json.loads(line)["document_id"][0] for line in read(cleaned / "a.jsonl").splitlines()]
+    assert kept == ["1001", "1003", "1005"]  # repaired 1003 kept, first 1001 only
+    assert json.loads(read(cleaned / "a.jsonl").splitlines()[0])["document_title"] == ["Spektralfolgen über Ringe"]
+    assert [json.loads(line)["document_id"][0] for line in read(cleaned / "b.jsonl").splitlines()] == ["1006"]
+
+    errors = [line for line in read(cleaned / "a_error_lines.txt").splitlines() if line.startswith("Line ")]
+    assert [line.split(":")[0] for line in errors] == ["Line 2", "Line 6"]  # line numbers in the input file
+    assert "encoding error" in errors[1]
+    assert read(cleaned / "b_error_lines.txt").startswith("Line 3: missing document_id")
+    assert total == {"bytes": sum(p.stat().st_size for p in inputs.iterdir()), "lines": 10, "valid": 6,
+                     "repaired": 1, "errors": 3, "duplicates": 2}
+
+
+def test_output_dir_must_not_hold_the_inputs(inputs):
+    with pytest.raises(SystemExit):
+        validation.validate_all(str(inputs), str(inputs), 1)
+    assert read(inputs / "b.jsonl").count("\n") == 3
@@ -0,0 +1,25 @@
+import pytest
+from jsonl_io import decode_record, DecodeError
+from kg_index import iter_fields
+
+LINES = [
+    b'{"document_id": ["1001"], "time": ["2025-01-01"], "keyword": ["MV-algebra"]}\n',
+    b'{"document_id": ["1002"], "time": ["2025-01-02"], "keyword": ["BCK-alge\n',  # truncated
+    b'{"document_id": ["1003"], "time": ["2025-01-03"], "keyword": ["spectral sequences"]}\n',
+]
+
+
+@pytest.fixture
+def jsonl(tmp_path):
+    path = tmp_path / "records.jsonl"
+    path.write_bytes(b"".join(LINES))
+    return str(path)
+
+
+def test_truncated_line_raises_decode_error():
+    with pytest.raises(DecodeError):
+        decode_record(LINES[1])
+
+
+def test_iter_fields_skips_truncated_lines(jsonl):
+    assert [doc for _, doc, _ in iter_fields(jsonl, ["keyword"])] == [1001, 1003]
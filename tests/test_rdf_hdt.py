@@ -0,0 +1,39 @@
+import os
+import filecmp
+import rdf_hdt
+from rdf_hdt import HDT, write_hdt
+
+TRIPLES = [
+    ('<https://zbmath.org/1>', '<https://schema.org/name>', '"Paper 1"'),
+    ('<https://zbmath.org/1>', '<https://schema.org/keywords>', '<https://zbmath.org/keyword/MValgebra>'),
+    ('<https://zbmath.org/2>', '<https://schema.org/name>', '"Pap\\u00E9r 2"@en'),
+    ('<https://zbmath.org/2>', '<https://schema.org/citation>', '<https://zbmath.org/1>'),
+    ('<https://zbmath.org/3>', '<https://schema.org/name>', '"Paper 3"'),
+    ('<https://zbmath.org/3>', '<https://schema.org/keywords>', '<https://zbmath.org/keyword/MValgebra>'),
+]
+
+
+def _build(tmp_path, name):
+    nt = tmp_path / "input.nt"
+    nt.write_text("".join(f"{s} {p} {o} .\n" for s, p, o in TRIPLES), encoding="utf-8")
+    output = tmp_path / name
+    write_hdt(str(nt), str(output))
+    return output
+
+
+def test_term_hash_is_stable():
+    assert rdf_hdt.term_hash("<https://zbmath.org/1>") == rdf_hdt.term_hash("<https://zbmath.org/1>")
+    assert rdf_hdt.term_hash("a") == 3405396810240292928  # same value in every process
+
+
+def test_colliding_hashes_build_the_same_dump(tmp_path, monkeypatch):
+    expected = _build(tmp_path, "stable")
+    monkeypatch.setattr(rdf_hdt, "term_hash", lambda term: len(term) % 3)  # nearly every term collides
+    colliding = _build(tmp_path, "colliding")
+    for name in os.listdir(expected):
+        if name != "header.json":
+            assert filecmp.cmp(expected / name, colliding / name, shallow=False), name
+
+    hdt = HDT(str(colliding))
+    assert sorted(hdt.triples()) == sorted(TRIPLES)
+    assert hdt.count(o="<https://zbmath.org/keyword/MValgebra>") == 2
@@ -0,0 +1,13 @@
+import gzip
+from rdf_stream import ChunkedWriter
+
+
+def test_chunk_size_counts_utf8_bytes(tmp_path):
+    line = '<https://zbmath.org/1> <https://schema.org/name> "Über Spektralfolgen — Kohomologie" .\n'
+    size = len(line.encode("utf-8"))
+    assert size > len(line)
+    with ChunkedWriter(str(tmp_path / "all.nt"), chunk_size=4 * size) as writer:
+        writer.writelines([line] * 10)
+    chunks = [gzip.decompress(open(path, "rb").read()) for path in writer.paths]
+    assert [len(chunk) for chunk in chunks] == [4 * size, 4 * size, 2 * size]
+    assert writer.raw_bytes == 10 * size
@@ -0,0 +1,88 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+import sparql_client
+from sparql_client import SparqlClient
+from query_cache import QueryCache
+
+
+class Endpoint:
+    """Stand-in SPARQL endpoint: every query answers one row, with an optional ETag"""
+
+    def __init__(self, etag=None):
+        self.etag = etag
+        self.queries = []
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                endpoint.queries.append(self.rfile.read(int(self.headers["Content-Length"])).decode())
+                data = json.dumps({"head": {"vars": ["n"]},
+                                   "results": {"bindings": [{"n": {"type": "literal", "value": "1"}}]}}).encode()
+                self.send_response(200)
+                if endpoint.etag:
+                    self.send_header("ETag", endpoint.etag)
+                self.send_header("Content-Type", "application/sparql-results+json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/sparql"
+
+    def selects(self):
+        return sum("SELECT" in query for query in self.queries)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return QueryCache(str(tmp_path / "queries.db"))
+
+@pytest.fixture(autouse=True)
+def no_version(monkeypatch):
+    monkeypatch.delenv("ZBMATH_DATASET_VERSION", raising=False)
+
+
+def test_unversioned_endpoint_is_not_cached(cache):
+    endpoint = Endpoint()
+    client = SparqlClient(endpoint.url, cache=cache)
+    for _ in range(2):
+        assert client.query("SELECT ?n WHERE {}")["results"]["bindings"][0]["n"]["value"] == "1"
+    assert endpoint.selects() == 2
+    assert client.version is None
+
+
+def test_versioned_results_are_cached(cache, monkeypatch):
+    endpoint = Endpoint()
+    monkeypatch.setenv("ZBMATH_DATASET_VERSION", "2025-09")
+    client = SparqlClient(endpoint.url, cache=cache)
+    client.query("SELECT ?n WHERE {}")
+    client.query("SELECT  ?n WHERE {}  # reformatted")
+    assert endpoint.selects() == 1
+
+
+def test_reported_version_is_checked_again(cache, monkeypatch):
+    endpoint = Endpoint(etag='"v1"')
+    client = SparqlClient(endpoint.url, cache=cache)
+    client.query("SELECT ?n WHERE {}")
+    client.query("SELECT ?n WHERE {}")
+    assert endpoint.selects() == 1
+    endpoint.etag = '"v2"'  # a new dump was loaded
+    monkeypatch.setattr(sparql_client, "VERSION_TTL", 0)
+    client.query("SELECT ?n WHERE {}")
+    assert endpoint.selects() == 2
+
+
+def test_shared_clients_keep_their_options():
+    endpoint = "http://127.0.0.1:9/sparql"
+    default = sparql_client.get_client(endpoint)
+    assert sparql_client.get_client(endpoint) is default
+    quick = sparql_client.get_client(endpoint, timeout=(1, 5), retries=0, cache=False)
+    assert quick is not default
+    assert (quick.timeout, quick.retries, quick.cache) == ((1, 5), 0, None)
+    assert sparql_client.get_client(endpoint, retries=0, timeout=(1, 5), cache=False) is quick